@@ -1,14 +1,19 @@
-import google.generativeai as genai
 import threading
 import logging
 from typing import Callable, Optional
+from response_cache import ResponseCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Above this temperature creative actions (continuing, expanding, drafting,
+# chatting) are expected to answer differently every time and skip the cache.
+CREATIVE_TEMPERATURE = 0.5
+
 
 class AIAssistant:
-    def __init__(self, api_key: str, model_name: str = "gemini-pro", temperature: float = 0.7, max_tokens: int = 2048):
+    def __init__(self, api_key: str, model_name: str = "gemini-pro", temperature: float = 0.7, max_tokens: int = 2048,
+                 defer_init: bool = False, cache: Optional[ResponseCache] = None, force_cache: bool = False):
         self.api_key = (api_key or "").strip()
         self.model_name = model_name.strip() if isinstance(model_name, str) and model_name.strip() else "gemini-pro"
         self.temperature = float(temperature) if isinstance(temperature, (int, float, str)) else 0.7
@@ -16,44 +21,84 @@ class AIAssistant:
             self.max_tokens = max(1, int(max_tokens))
         except (ValueError, TypeError):
             self.max_tokens = 2048
+        self.cache = cache
+        self.force_cache = force_cache
         self.model = None
         self.chat_history = []
         self.is_configured = False
+        self.init_thread = None
         
         # Validate API key more strictly
         if self.api_key and self.api_key != "YOUR_GEMINI_API_KEY_HERE":
-            try:
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel(self.model_name)
-                self.is_configured = True
-                logger.info("AI Assistant initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize AI Assistant: {e}")
-                self.is_configured = False
+            if defer_init:
+                # Importing the Gemini SDK takes most of a second, so it
+                # happens off the startup path.
+                self.init_thread = threading.Thread(target=self.initialize, daemon=True)
+                self.init_thread.start()
+            else:
+                self.initialize()
         else:
             logger.warning("AI Assistant not configured: Invalid or missing API key")
     
+    def initialize(self):
+        try:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self.model = genai.GenerativeModel(self.model_name)
+            self.is_configured = True
+            logger.info("AI Assistant initialized successfully")
+        except Exception as e:
+            logger.error(f"Failed to initialize AI Assistant: {e}")
+            self.is_configured = False
+    
+    def is_initializing(self) -> bool:
+        return self.init_thread is not None and self.init_thread.is_alive()
+    
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        if self.init_thread is not None:
+            self.init_thread.join(timeout)
+        return self.is_ready()
+    
     def is_ready(self) -> bool:
         return self.is_configured and self.model is not None
     
-    def generate_async(self, prompt: str, callback: Callable[[str, Optional[str]], None]):
+    def generation_config(self) -> dict:
+        return {"temperature": self.temperature}
+    
+    def uses_cache(self, creative: bool = False) -> bool:
+        if self.cache is None:
+            return False
+        return self.force_cache or not creative or self.temperature <= CREATIVE_TEMPERATURE
+    
+    def generate_async(self, prompt: str, callback: Callable[[str, Optional[str]], None], creative: bool = False):
         if not self.is_ready():
             error_msg = "AI Assistant is not properly configured"
             logger.error(error_msg)
             callback("", error_msg)
             return
         
+        config = self.generation_config()
+        key = ResponseCache.cache_key(self.model_name, config, prompt) if self.uses_cache(creative) else None
+        
         def task():
             try:
+                result = self.cache.get(key) if key else None
+                if result is not None:
+                    logger.info("AI response served from cache")
+                    self.chat_history.append({"prompt": prompt, "response": result})
+                    callback(result, None)
+                    return
+                
+                import google.generativeai as genai
                 response = self.model.generate_content(
                     prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=self.temperature,
-                    )
+                    generation_config=genai.types.GenerationConfig(**config)
                 )
                 result = response.text
                 self.chat_history.append({"prompt": prompt, "response": result})
                 callback(result, None)
+                if key:
+                    self.cache.put(key, result)
             except Exception as e:
                 error_msg = f"AI Error: {str(e)}"
                 logger.error(error_msg)
@@ -87,7 +132,7 @@ class AIAssistant:
 {text}
 
 Верни только переписанный текст без дополнительных комментариев."""
-        self.generate_async(prompt, callback)
+        self.generate_async(prompt, callback, creative=style == "creative")
     
     def continue_text(self, text: str, callback: Callable[[str, Optional[str]], None]):
         prompt = f"""Продолжи следующий текст логичным и связным образом. 
@@ -96,7 +141,7 @@ class AIAssistant:
 {text}
 
 Верни только продолжение текста без дополнительных комментариев."""
-        self.generate_async(prompt, callback)
+        self.generate_async(prompt, callback, creative=True)
     
     def fix_grammar(self, text: str, callback: Callable[[str, Optional[str]], None]):
         prompt = f"""Исправь все грамматические, орфографические и пунктуационные ошибки в следующем тексте:
@@ -120,7 +165,7 @@ class AIAssistant:
 {text}
 
 Верни только расширенный текст без дополнительных комментариев."""
-        self.generate_async(prompt, callback)
+        self.generate_async(prompt, callback, creative=True)
     
     def translate_text(self, text: str, target_language: str, callback: Callable[[str, Optional[str]], None]):
         prompt = f"""Переведи следующий текст на {target_language}:
@@ -153,7 +198,7 @@ class AIAssistant:
 {description}
 
 Создай полный, структурированный и профессиональный документ."""
-        self.generate_async(prompt, callback)
+        self.generate_async(prompt, callback, creative=True)
     
     def answer_question(self, question: str, context: str, callback: Callable[[str, Optional[str]], None]):
         prompt = f"""На основе следующего контекста ответь на вопрос:
@@ -181,7 +226,7 @@ class AIAssistant:
 {message}
 
 Дай полезный и конкретный ответ."""
-        self.generate_async(prompt, callback)
+        self.generate_async(prompt, callback, creative=True)
     
     def get_chat_history(self):
         return self.chat_history
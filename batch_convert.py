@@ -0,0 +1,135 @@
+import os
+import sys
+import argparse
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+from file_operations import FileOperations
+
+logger = logging.getLogger(__name__)
+
+TARGET_FORMATS = ('txt', 'docx', 'pdf', 'html', 'md')
+SOURCE_EXTENSIONS = ('.txt', '.md', '.docx', '.html', '.htm', '.pdf')
+
+
+def convert_file(source: str, destinations: List[Tuple[str, str]], formatting: Optional[dict] = None) -> int:
+    for destination, _ in destinations:
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+    FileOperations.export_paragraphs(FileOperations.iter_paragraphs(source), destinations, formatting)
+    return os.path.getsize(source)
+
+
+def is_up_to_date(source: str, destination: str) -> bool:
+    try:
+        return os.path.getmtime(destination) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def plan_conversion(in_dir: str, out_dir: str, targets: List[str],
+                    force: bool = False) -> Tuple[List[Tuple[str, List[Tuple[str, str]]]], int]:
+    in_dir = os.path.abspath(in_dir)
+    out_dir = os.path.abspath(out_dir)
+    tasks = []
+    skipped = 0
+    for root, dirs, files in os.walk(in_dir):
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith('.') and os.path.join(root, d) != out_dir
+        )
+        for name in sorted(files):
+            ext = FileOperations.get_file_extension(name)
+            if name.startswith('.') or ext not in SOURCE_EXTENSIONS:
+                continue
+            source = os.path.join(root, name)
+            stem = os.path.splitext(os.path.relpath(source, in_dir))[0]
+            destinations = []
+            up_to_date = False
+            for target in targets:
+                if ext == '.' + target:
+                    continue
+                destination = os.path.join(out_dir, stem + '.' + target)
+                if not force and is_up_to_date(source, destination):
+                    up_to_date = True
+                    continue
+                destinations.append((destination, target))
+            # Counted per source file, like the files in the task list.
+            if destinations:
+                tasks.append((source, destinations))
+            elif up_to_date:
+                skipped += 1
+    return tasks, skipped
+
+
+def parse_targets(value: str) -> List[str]:
+    targets = []
+    for target in value.split(','):
+        target = target.strip().lower().lstrip('.')
+        if target not in TARGET_FORMATS:
+            raise argparse.ArgumentTypeError(
+                f"неизвестный формат {target!r}, доступны: {', '.join(TARGET_FORMATS)}"
+            )
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+def run(args) -> int:
+    if not os.path.isdir(args.in_dir):
+        print(f"Папка не найдена: {args.in_dir}", file=sys.stderr)
+        return 2
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    formatting = {'pdf_font': args.pdf_font} if args.pdf_font else None
+    tasks, skipped = plan_conversion(args.in_dir, args.out_dir, args.to, args.force)
+    outputs = sum(len(destinations) for _, destinations in tasks)
+    print(f"К конвертации: {len(tasks)} файлов ({outputs} результатов), без изменений: {skipped}, процессов: {jobs}")
+
+    show_progress = not args.quiet and sys.stdout.isatty()
+    start = time.perf_counter()
+    converted = 0
+    failed = 0
+    total_bytes = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            futures = {
+                executor.submit(convert_file, source, destinations, formatting): source
+                for source, destinations in tasks
+            }
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    total_bytes += future.result()
+                    converted += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"✗ {source}: {e}", file=sys.stderr)
+                if show_progress:
+                    print(f"\r{converted + failed}/{len(tasks)}", end='', flush=True)
+        if show_progress:
+            print()
+    elapsed = time.perf_counter() - start
+
+    rate = elapsed if elapsed > 0 else 1e-9
+    print(f"Готово за {elapsed:.2f} s: конвертировано {converted}, пропущено {skipped}, ошибок {failed}")
+    print(f"Производительность: {converted / rate:.1f} файлов/s, {total_bytes / 1024 / 1024 / rate:.2f} MB/s")
+    return 1 if failed else 0
+
+
+def add_arguments(parser):
+    parser.add_argument('in_dir', help="папка с исходными документами (обрабатывается рекурсивно)")
+    parser.add_argument('out_dir', help="папка для результатов, структура подпапок сохраняется")
+    parser.add_argument(
+        '--to',
+        required=True,
+        type=parse_targets,
+        help=f"целевые форматы через запятую ({', '.join(TARGET_FORMATS)}); "
+             f"несколько форматов пишутся за один проход по документу"
+    )
+    parser.add_argument('--jobs', type=int, default=0, help="число процессов (0 = по числу ядер)")
+    parser.add_argument('--force', action='store_true', help="конвертировать даже актуальные файлы")
+    parser.add_argument('--pdf-font', help="шрифт для PDF: путь к .ttf или имя файла шрифта")
+    parser.add_argument('--quiet', action='store_true', help="не показывать прогресс")
+    parser.add_argument('--verbose', action='store_true', help="выводить журнал работы")
+    parser.set_defaults(handler=run)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Сравнение скорости чтения DOCX: потоковый парсер против python-docx
+
+Использование: python benchmarks/docx_read.py [--paragraphs N] [файл.docx]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from file_operations import FileOperations
+
+
+def build_sample(filepath: str, paragraphs: int):
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Пункт {i}. Стороны договорились о следующем: исполнитель обязуется "
+                          f"выполнить работы в срок, а заказчик - принять и оплатить их.")
+    doc.save(filepath)
+
+
+def measure(name: str, read):
+    tracemalloc.start()
+    start = time.perf_counter()
+    text = read()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<22} {elapsed:8.3f} s   пик памяти {peak / 1024 / 1024:8.1f} MB")
+    return text, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("filepath", nargs="?")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = args.filepath
+        if not filepath:
+            filepath = os.path.join(tmp, "sample.docx")
+            print(f"Создание тестового документа ({args.paragraphs} абзацев)...")
+            build_sample(filepath, args.paragraphs)
+        print(f"Файл: {filepath} ({os.path.getsize(filepath) / 1024:.0f} KB)\n")
+
+        dom_text, dom_time = measure(
+            "python-docx",
+            lambda: '\n'.join(FileOperations.iter_docx_paragraphs_dom(filepath))
+        )
+        stream_text, stream_time = measure(
+            "потоковый парсер",
+            lambda: '\n'.join(FileOperations.iter_docx_paragraphs(filepath))
+        )
+
+        start = time.perf_counter()
+        next(FileOperations.iter_docx_chunks(filepath), None)
+        first_chunk = time.perf_counter() - start
+
+        print(f"\nПервая порция текста через {first_chunk * 1000:.1f} ms")
+        print(f"Ускорение: x{dom_time / stream_time:.1f}")
+        print("Результаты совпадают" if dom_text == stream_text else "ВНИМАНИЕ: результаты различаются")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Сравнение скорости сохранения DOCX: форматирование через стиль против форматирования каждого абзаца
+
+Использование: python benchmarks/docx_write.py [--lines N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from docx.shared import Pt
+from file_operations import FileOperations
+
+FORMATTING = {'font_name': 'Times New Roman', 'font_size': 12, 'bold': False, 'italic': False, 'underline': False}
+
+
+def legacy_save_docx(filepath: str, content: str, formatting: dict):
+    # Прежняя реализация: абзац и свойства шрифта добавляются по одному
+    doc = Document()
+    for para_text in content.split('\n'):
+        if para_text.strip():
+            para = doc.add_paragraph(para_text)
+            para.runs[0].font.name = formatting['font_name']
+            para.runs[0].font.size = Pt(formatting['font_size'])
+            para.runs[0].font.bold = formatting['bold']
+            para.runs[0].font.italic = formatting['italic']
+            para.runs[0].font.underline = formatting['underline']
+        else:
+            doc.add_paragraph('')
+    doc.save(filepath)
+
+
+def measure(name: str, save, filepath: str) -> float:
+    start = time.perf_counter()
+    save(filepath)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<18} {elapsed:8.3f} s   размер {os.path.getsize(filepath) / 1024:8.0f} KB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=5000)
+    args = parser.parse_args()
+
+    content = '\n'.join(
+        f"Строка {i}: исполнитель обязуется выполнить работы в срок." if i % 10 else ""
+        for i in range(args.lines)
+    )
+    print(f"Документ: {args.lines} строк\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.docx")
+        styled_path = os.path.join(tmp, "styled.docx")
+        legacy_time = measure("по абзацам", lambda fp: legacy_save_docx(fp, content, FORMATTING), legacy_path)
+        styled_time = measure("через стиль", lambda fp: FileOperations.save_docx(fp, content, FORMATTING), styled_path)
+
+        print(f"\nУскорение: x{legacy_time / styled_time:.1f}")
+        same = FileOperations.open_docx(legacy_path) == FileOperations.open_docx(styled_path)
+        print("Текст совпадает" if same else "ВНИМАНИЕ: текст различается")
+
+
+if __name__ == "__main__":
+    main()
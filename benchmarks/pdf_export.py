@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Сравнение скорости экспорта в PDF: прежний перенос строк против PdfLayout
+
+Использование: python benchmarks/pdf_export.py [--paragraphs N] [--words N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from file_operations import FileOperations
+from pdf_layout import PdfLayout
+
+WORDS = ("the of and to in contract parties agree that supplier shall deliver goods within "
+         "thirty days after receiving written notice from customer including all documentation").split()
+
+
+class RecordingCanvas(canvas.Canvas):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.drawn = []
+
+    def drawString(self, x, y, text, *args, **kwargs):
+        self.drawn.append((self.getPageNumber(), x, y, text, self._fontname, self._fontsize))
+        return super().drawString(x, y, text, *args, **kwargs)
+
+
+def legacy_export_pdf(c, content: str, font_size: float = 12):
+    # Прежняя реализация FileOperations.export_pdf
+    width, height = letter
+    y_position = height - 1 * inch
+    line_height = font_size + 4
+
+    for line in content.split('\n'):
+        if y_position < 1 * inch:
+            c.showPage()
+            y_position = height - 1 * inch
+
+        c.setFont("Helvetica", font_size)
+
+        max_width = width - 2 * inch
+        words = line.split()
+        current_line = ""
+
+        for word in words:
+            test_line = current_line + " " + word if current_line else word
+            if c.stringWidth(test_line, "Helvetica", font_size) <= max_width:
+                current_line = test_line
+            else:
+                if current_line:
+                    c.drawString(1 * inch, y_position, current_line)
+                    y_position -= line_height
+                    if y_position < 1 * inch:
+                        c.showPage()
+                        y_position = height - 1 * inch
+                current_line = word
+
+        if current_line:
+            c.drawString(1 * inch, y_position, current_line)
+            y_position -= line_height
+    c.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--words", type=int, default=1500)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    content = '\n'.join(
+        ' '.join(rng.choice(WORDS) for _ in range(args.words)) if i % 5 else ""
+        for i in range(args.paragraphs)
+    )
+    print(f"Документ: {args.paragraphs} абзацев по {args.words} слов ({len(content) / 1024:.0f} KB)\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "out.pdf")
+
+        start = time.perf_counter()
+        legacy_export_pdf(canvas.Canvas(filepath, pagesize=letter), content)
+        legacy_time = time.perf_counter() - start
+        print(f"прежний перенос   {legacy_time:8.3f} s")
+
+        start = time.perf_counter()
+        FileOperations.export_pdf(filepath, content, {'pdf_font': 'Helvetica'})
+        layout_time = time.perf_counter() - start
+        print(f"PdfLayout         {layout_time:8.3f} s")
+        print(f"\nУскорение: x{legacy_time / layout_time:.1f}")
+
+        legacy_canvas = RecordingCanvas(filepath, pagesize=letter)
+        legacy_export_pdf(legacy_canvas, content)
+        layout_canvas = RecordingCanvas(filepath, pagesize=letter)
+        layout = PdfLayout()
+        layout.render(layout_canvas, layout.paginate(content))
+        layout_canvas.save()
+        same = legacy_canvas.drawn == layout_canvas.drawn
+        print("Вывод совпадает (страницы, позиции, текст)" if same else "ВНИМАНИЕ: вывод различается")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import zlib
+import struct
+import hashlib
+import threading
+import logging
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from file_operations import FileOperations, DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+CACHE_MAGIC = b'WRFC'
+CACHE_VERSION = 1
+CACHE_SUFFIX = '.doccache'
+INDEX_NAME = 'index.json'
+FLAG_COMPRESSED = 1
+# magic, version, flags, source size, source mtime_ns, paragraph count,
+# source digest, stored text length
+HEADER = struct.Struct('<4sHHQqI20sQ')
+
+
+def file_digest(filepath: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+class CachedDocument:
+    def __init__(self, text: str, paragraph_offsets: array):
+        self.text = text
+        self.paragraph_offsets = paragraph_offsets
+
+    @property
+    def paragraph_count(self) -> int:
+        return len(self.paragraph_offsets)
+
+    def paragraph(self, index: int) -> str:
+        start = self.paragraph_offsets[index]
+        if index + 1 < len(self.paragraph_offsets):
+            return self.text[start:self.paragraph_offsets[index + 1] - 1]
+        return self.text[start:]
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, int]]:
+        for start in range(0, len(self.text), chunk_size):
+            end = start + chunk_size
+            yield self.text[start:end], min(end, len(self.text))
+
+
+class DocumentCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024, verify_content: bool = False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.verify_content = verify_content
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # last_used changes on every hit; the index is rewritten with the
+        # next put() or flush() rather than each time.
+        self.index_dirty = False
+        self.entries: Dict[str, dict] = self._load_index()
+
+    @staticmethod
+    def cache_key(filepath: str) -> str:
+        return hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:16]
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry['bytes'] for entry in self.entries.values())
+
+    def get(self, filepath: str) -> Optional[CachedDocument]:
+        key = self.cache_key(filepath)
+        with self.lock:
+            entry = self.entries.get(key)
+        document = self._read(key, filepath) if entry else None
+
+        with self.lock:
+            if document is None:
+                self.misses += 1
+                if entry and self.entries.pop(key, None):
+                    self._remove_blob(key)
+                    self._save_index()
+                return None
+            self.hits += 1
+            entry['last_used'] = time.time()
+            self.index_dirty = True
+        logger.info(f"Document cache hit: {filepath}")
+        return document
+
+    def load(self, filepath: str, read: Callable[[], Iterable[Tuple[str, int]]]) -> Iterator[Tuple[str, int]]:
+        # The document's chunks from the cache when it holds a current copy,
+        # otherwise from read(), recorded for next time. Nothing happens
+        # until the first chunk is asked for, so the lookup runs on the
+        # loader's worker thread. Positions are scaled to the source file
+        # size, like those of the readers.
+        document = self.get(filepath)
+        if document is None:
+            yield from self.record(filepath, read())
+            return
+        size = max(1, os.path.getsize(filepath))
+        length = max(1, len(document.text))
+        for text, end in document.iter_chunks():
+            yield text, size * end // length
+
+    def flush(self):
+        with self.lock:
+            if self.index_dirty:
+                self._save_index()
+
+    def record(self, filepath: str, chunks: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        # Passes chunks through unchanged and caches the text only once the
+        # source has been read to the end; an abandoned load stores nothing.
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            yield from chunks
+            return
+        parts = []
+        for text, position in chunks:
+            parts.append(text)
+            yield text, position
+        try:
+            self.put(filepath, ''.join(parts), stat)
+        except Exception as e:
+            logger.warning(f"Could not cache {filepath}: {e}")
+
+    def put(self, filepath: str, text: str, stat: Optional[os.stat_result] = None):
+        if self.max_bytes <= 0 or len(text) >= 2 ** 32:
+            return
+        stat = stat or os.stat(filepath)
+        digest = file_digest(filepath) if self.verify_content else b''
+
+        offsets = array('I', [0])
+        position = text.find('\n')
+        while position != -1:
+            offsets.append(position + 1)
+            position = text.find('\n', position + 1)
+
+        blob = zlib.compress(text.encode('utf-8'), 1)
+        header = HEADER.pack(CACHE_MAGIC, CACHE_VERSION, FLAG_COMPRESSED, stat.st_size, stat.st_mtime_ns,
+                             len(offsets), digest, len(blob))
+        data = header + offsets.tobytes() + blob
+        if len(data) > self.max_bytes:
+            return
+
+        key = self.cache_key(filepath)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        FileOperations.atomic_write(self._blob_path(key), lambda f: f.write(data))
+        with self.lock:
+            self.entries[key] = {
+                'path': os.path.abspath(filepath),
+                'bytes': len(data),
+                'last_used': time.time()
+            }
+            self._evict(keep=key)
+            self._save_index()
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                self._remove_blob(key)
+            self.entries = {}
+            self._save_index()
+
+    def _read(self, key: str, filepath: str) -> Optional[CachedDocument]:
+        try:
+            stat = os.stat(filepath)
+            with open(self._blob_path(key), 'rb') as f:
+                data = f.read()
+            magic, version, flags, size, mtime_ns, count, digest, length = HEADER.unpack_from(data)
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                return None
+            if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None
+            if self.verify_content and digest.strip(b'\0') and digest != file_digest(filepath):
+                return None
+
+            offsets = array('I')
+            start = HEADER.size
+            offsets.frombytes(data[start:start + count * offsets.itemsize])
+            blob = data[start + count * offsets.itemsize:]
+            if len(blob) != length:
+                return None
+            if flags & FLAG_COMPRESSED:
+                blob = zlib.decompress(blob)
+            return CachedDocument(blob.decode('utf-8'), offsets)
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            logger.debug(f"Document cache entry for {filepath} unusable: {e}")
+            return None
+
+    def _evict(self, keep: Optional[str] = None):
+        total = self.total_bytes
+        for key in sorted(self.entries, key=lambda k: self.entries[k]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self.entries.pop(key)['bytes']
+            self._remove_blob(key)
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def _remove_blob(self, key: str):
+        try:
+            os.remove(self._blob_path(key))
+        except OSError:
+            pass
+
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.cache_dir, INDEX_NAME), 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {
+            key: entry for key, entry in entries.items()
+            if isinstance(entry, dict) and os.path.exists(self._blob_path(key))
+        }
+
+    def _save_index(self):
+        self.index_dirty = False
+        if not os.path.isdir(self.cache_dir):
+            return
+        data = json.dumps(self.entries, ensure_ascii=False).encode('utf-8')
+        try:
+            FileOperations.atomic_write(os.path.join(self.cache_dir, INDEX_NAME), lambda f: f.write(data))
+        except OSError as e:
+            logger.warning(f"Could not save document cache index: {e}")
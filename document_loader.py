@@ -0,0 +1,88 @@
+import queue
+import threading
+import time
+import logging
+from typing import Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkedLoader:
+    def __init__(self, widget, chunks: Iterable[Tuple[str, int]], total_bytes: int,
+                 on_progress: Optional[Callable[[float], None]] = None,
+                 on_complete: Optional[Callable[[Optional[str], bool], None]] = None,
+                 queue_size: int = 8, frame_budget: float = 0.012):
+        self.widget = widget
+        self.chunks = chunks
+        self.total_bytes = max(1, total_bytes)
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.frame_budget = frame_budget
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.cancel_event = threading.Event()
+        self.error = None
+        self.is_running = False
+        self.thread = None
+
+    def start(self):
+        self.is_running = True
+        self.widget.configure(state="disabled")
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+        self.widget.after(1, self._drain)
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.is_running:
+            self._finish(cancelled=True)
+
+    def _read(self):
+        try:
+            for text, position in self.chunks:
+                if self.cancel_event.is_set():
+                    return
+                self._put((text, position))
+        except Exception as e:
+            logger.error(f"Error loading document: {e}")
+            self.error = str(e)
+        self._put(None)
+
+    def _put(self, item):
+        while not self.cancel_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self):
+        if not self.is_running:
+            return
+
+        deadline = time.perf_counter() + self.frame_budget
+        position = None
+        self.widget.configure(state="normal")
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._finish(cancelled=False)
+                    return
+                text, position = item
+                self.widget.insert("end", text)
+        finally:
+            if self.is_running:
+                self.widget.configure(state="disabled")
+
+        if position is not None and self.on_progress:
+            self.on_progress(min(1.0, position / self.total_bytes))
+        self.widget.after(1 if position is not None else 10, self._drain)
+
+    def _finish(self, cancelled: bool):
+        self.is_running = False
+        self.widget.configure(state="normal")
+        if self.on_complete:
+            self.on_complete(self.error, cancelled)
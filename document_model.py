@@ -0,0 +1,210 @@
+import bisect
+import logging
+from array import array
+from itertools import accumulate
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from edit_tracker import TextEdit
+
+logger = logging.getLogger(__name__)
+
+BLOCK_LINES = 512
+
+
+def split_blocks(lines: Sequence[str], block_lines: int = BLOCK_LINES) -> List[Tuple[str, ...]]:
+    return [tuple(lines[i:i + block_lines]) for i in range(0, len(lines), block_lines)] or [('',)]
+
+
+class DocumentSnapshot:
+    # Blocks are immutable tuples of lines shared with the live model, so a
+    # snapshot costs one list copy per BLOCK_LINES lines and stays valid
+    # while the editor keeps changing; it is safe to read from any thread.
+    def __init__(self, blocks: List[Tuple[str, ...]], block_starts: array, line_count: int,
+                 char_count: int, version: int):
+        self.blocks = blocks
+        self.block_starts = block_starts
+        self.line_count = line_count
+        self.char_count = char_count
+        self.version = version
+
+    def _locate(self, line: int) -> Tuple[int, int]:
+        block = bisect.bisect_right(self.block_starts, line - 1) - 1
+        return block, line - 1 - self.block_starts[block]
+
+    def line(self, number: int) -> str:
+        if not 1 <= number <= self.line_count:
+            raise IndexError(f"line {number} out of range")
+        block, offset = self._locate(number)
+        return self.blocks[block][offset]
+
+    def lines(self, first: int = 1, last: Optional[int] = None) -> Iterator[str]:
+        last = self.line_count if last is None else min(last, self.line_count)
+        if first > last:
+            return
+        block, offset = self._locate(max(1, first))
+        remaining = last - max(1, first) + 1
+        for lines in self.blocks[block:]:
+            part = lines[offset:offset + remaining]
+            yield from part
+            remaining -= len(part)
+            offset = 0
+            if remaining <= 0:
+                return
+
+    def text_lines(self, first: int, last: Optional[int] = None) -> str:
+        return '\n'.join(self.lines(first, last))
+
+    def get(self, start: Tuple[int, int], end: Tuple[int, int]) -> str:
+        if start[0] == end[0]:
+            return self.line(start[0])[start[1]:end[1]]
+        lines = list(self.lines(start[0], end[0]))
+        lines[0] = lines[0][start[1]:]
+        lines[-1] = lines[-1][:end[1]]
+        return '\n'.join(lines)
+
+    def get_text(self) -> str:
+        return '\n'.join(self.lines())
+
+    def iter_chunks(self, chunk_lines: int = 2000) -> Iterator[str]:
+        # Consecutive pieces of the text; joining them reproduces get_text().
+        for first in range(1, self.line_count + 1, chunk_lines):
+            chunk = self.text_lines(first, first + chunk_lines - 1)
+            yield chunk if first + chunk_lines > self.line_count else chunk + '\n'
+
+
+class DocumentModel(DocumentSnapshot):
+    # Headless copy of the editor buffer kept in step with the widget by the
+    # TextEdit events of EditTracker, so the text can be read without going
+    # through Tk. An edit rebuilds only the blocks it touches.
+    def __init__(self, text: str = "", block_lines: int = BLOCK_LINES):
+        super().__init__([('',)], array('q', [0]), 1, 0, 0)
+        self.block_lines = block_lines
+        self.reset(text)
+
+    def reset(self, text: str):
+        self.blocks = split_blocks(text.split('\n'), self.block_lines)
+        self.block_chars = array('q', [-1]) * len(self.blocks)
+        self.char_tree = None
+        self.char_count = len(text)
+        self.version += 1
+        self._reindex()
+
+    def load_chunks(self, chunks: Iterable[Tuple[str, int]], on_progress: Optional[Callable[[int], None]] = None,
+                    is_cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        # Builds the blocks straight from (text, position) chunks, without
+        # ever holding the whole text as one string.
+        blocks = []
+        pending: List[str] = []
+        tail = ''
+        chars = 0
+        for text, position in chunks:
+            if is_cancelled and is_cancelled():
+                return False
+            pending.extend((tail + text).split('\n'))
+            tail = pending.pop()
+            chars += len(text)
+            full = len(pending) - len(pending) % self.block_lines
+            blocks.extend(split_blocks(pending[:full], self.block_lines) if full else [])
+            pending = pending[full:]
+            if on_progress:
+                on_progress(position)
+        pending.append(tail)
+        self.blocks = blocks + split_blocks(pending, self.block_lines)
+        self.block_chars = array('q', [-1]) * len(self.blocks)
+        self.char_tree = None
+        self.char_count = chars
+        self.version += 1
+        self._reindex()
+        return True
+
+    def offset(self, position: Tuple[int, int]) -> int:
+        # Character offset of a (line, col) position, newlines included.
+        # Characters before the block come from a Fenwick tree over the
+        # per-block counts. An edit inside one block adjusts the tree by
+        # its length; edits that split or merge blocks mark the new blocks'
+        # counts stale (-1) and drop the tree, which is rebuilt here on the
+        # next call, so edits never pay for counting.
+        line, col = position
+        block, offset = self._locate(line)
+        if self.char_tree is None:
+            self._build_char_tree()
+        tree = self.char_tree
+        before = 0
+        index = block
+        while index > 0:
+            before += tree[index]
+            index -= index & -index
+        return before + sum(map(len, self.blocks[block][:offset])) + line - 1 + col
+
+    def _build_char_tree(self):
+        chars = self.block_chars
+        for index, count in enumerate(chars):
+            if count < 0:
+                chars[index] = sum(map(len, self.blocks[index]))
+        size = len(chars)
+        tree = array('q', [0]) * (size + 1)
+        for index in range(1, size + 1):
+            tree[index] += chars[index - 1]
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self.char_tree = tree
+
+    def _add_block_chars(self, block: int, delta: int):
+        self.block_chars[block] += delta
+        tree = self.char_tree
+        index = block + 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def snapshot(self) -> DocumentSnapshot:
+        return DocumentSnapshot(list(self.blocks), self.block_starts, self.line_count,
+                                self.char_count, self.version)
+
+    def apply(self, edit: TextEdit):
+        if edit.kind == 'insert':
+            self.insert(edit.start, edit.text)
+        else:
+            self.delete(edit.start, edit.end)
+
+    def insert(self, position: Tuple[int, int], text: str):
+        line, col = position
+        current = self.line(line)
+        self._replace_lines(line, line, (current[:col] + text + current[col:]).split('\n'),
+                            len(text) - text.count('\n'))
+        self.char_count += len(text)
+
+    def delete(self, start: Tuple[int, int], end: Tuple[int, int]):
+        removed = len(self.get(start, end))
+        first = self.line(start[0])
+        last = first if end[0] == start[0] else self.line(end[0])
+        self._replace_lines(start[0], end[0], [first[:start[1]] + last[end[1]:]],
+                            end[0] - start[0] - removed)
+        self.char_count -= removed
+
+    def _replace_lines(self, first: int, last: int, new_lines: List[str], delta: int):
+        # delta is the change in characters on the lines, newlines excluded.
+        first_block, first_offset = self._locate(first)
+        last_block, last_offset = self._locate(last)
+        lines = (self.blocks[first_block][:first_offset] + tuple(new_lines)
+                 + self.blocks[last_block][last_offset + 1:])
+        if len(lines) > 2 * self.block_lines:
+            replacement = split_blocks(lines, self.block_lines)
+        else:
+            replacement = [lines]
+        self.blocks[first_block:last_block + 1] = replacement
+        if first_block == last_block and len(replacement) == 1 and self.char_tree is not None:
+            self._add_block_chars(first_block, delta)
+        else:
+            self.block_chars[first_block:last_block + 1] = array('q', [-1]) * len(replacement)
+            self.char_tree = None
+        self.version += 1
+        if last - first + 1 != len(new_lines) or len(replacement) != last_block - first_block + 1:
+            self._reindex()
+
+    def _reindex(self):
+        # A fresh array rather than an update in place: snapshots keep
+        # referring to the index that matches their own block list.
+        starts = array('q', accumulate(map(len, self.blocks), initial=0))
+        self.line_count = starts.pop()
+        self.block_starts = starts
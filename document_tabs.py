@@ -0,0 +1,263 @@
+import os
+import time
+import zlib
+import threading
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+IDLE_TIMEOUT = 300.0
+MEMORY_LIMIT = 64 * 1024 * 1024
+SYNC_RESTORE_SIZE = 1024 * 1024
+SPILL_SUFFIX = '.tab'
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_INVALID_PARAMETER = 87
+STILL_ACTIVE = 259
+
+
+class DocumentTab:
+    # Everything that belongs to one open document. While a tab is active
+    # its state lives on the editor and is only copied back here when
+    # another tab is activated. An inactive tab is 'resident' (its
+    # DocumentModel kept as is), 'packed' (the text compressed in memory)
+    # or 'spilled' (the compressed text in a file); the undo history, style
+    # runs and outline are kept either way, they are small next to the text.
+    # A tab restored from the previous session is 'pending': only its path
+    # is known until it is first shown.
+    def __init__(self, filepath: Optional[str] = None, pending: bool = False, viewer: bool = False):
+        self.filepath = filepath
+        self.state = 'pending' if pending else 'resident'
+        self.viewer = viewer
+        self.is_modified = False
+        self.edit_generation = 0
+        self.document = None
+        self.word_counter = None
+        self.outline = None
+        self.history = None
+        self.styles = None
+        self.journal = None
+        self.virtual = False
+        self.cursor = (1, 0)
+        self.top = 1
+        self.payload: Optional[bytes] = None
+        self.spill_path: Optional[str] = None
+        self.last_active = time.monotonic()
+        # Bumped on activation, so a pack still running for the previous
+        # inactive period is dropped.
+        self.version = 0
+        self.is_packing = False
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.filepath) if self.filepath else "Без названия"
+
+    @property
+    def is_offloaded(self) -> bool:
+        return self.state in ('packed', 'spilled')
+
+
+class TabStore:
+    # Open tabs in display order. Memory follows the tabs in use, not the
+    # tabs open: tabs left inactive for idle_timeout are packed on a worker
+    # thread, and once packed text exceeds memory_limit the tabs idle
+    # longest are spilled to spill_dir. Results are delivered on the Tk
+    # thread through widget.after.
+    def __init__(self, widget, spill_dir: str, idle_timeout: float = IDLE_TIMEOUT,
+                 memory_limit: int = MEMORY_LIMIT):
+        self.widget = widget
+        self.spill_dir = spill_dir
+        self.idle_timeout = idle_timeout
+        self.memory_limit = memory_limit
+        self.tabs: List[DocumentTab] = []
+        self.active: Optional[DocumentTab] = None
+        self.packed_bytes = 0
+        self.spill_count = 0
+
+    def __len__(self) -> int:
+        return len(self.tabs)
+
+    def add(self, tab: DocumentTab, index: Optional[int] = None):
+        self.tabs.insert(len(self.tabs) if index is None else index, tab)
+
+    def index(self, tab: DocumentTab) -> int:
+        return self.tabs.index(tab)
+
+    def find(self, filepath: str) -> Optional[DocumentTab]:
+        path = os.path.abspath(filepath)
+        for tab in self.tabs:
+            if tab.filepath and os.path.abspath(tab.filepath) == path:
+                return tab
+        return None
+
+    def activate(self, tab: DocumentTab):
+        if self.active is not None:
+            self.active.last_active = time.monotonic()
+        self.active = tab
+        tab.version += 1
+        tab.is_packing = False
+        tab.last_active = time.monotonic()
+
+    def remove(self, tab: DocumentTab) -> Optional[DocumentTab]:
+        # Returns the tab to show in its place if it was the active one.
+        index = self.tabs.index(tab)
+        self.tabs.remove(tab)
+        self.release(tab)
+        tab.version += 1
+        if tab is not self.active:
+            return None
+        self.active = None
+        if not self.tabs:
+            return None
+        return self.tabs[min(index, len(self.tabs) - 1)]
+
+    def idle_tabs(self) -> List[DocumentTab]:
+        deadline = time.monotonic() - self.idle_timeout
+        return [tab for tab in self.tabs
+                if tab is not self.active and tab.state == 'resident' and tab.document is not None
+                and not tab.is_packing and tab.last_active <= deadline]
+
+    def pack(self, tab: DocumentTab):
+        # An inactive tab's model is not touched until the tab is activated
+        # again, which bumps its version and discards this result.
+        tab.is_packing = True
+        version = tab.version
+        document = tab.document
+
+        def run():
+            try:
+                payload = zlib.compress(document.get_text().encode('utf-8'), 1)
+            except Exception as e:
+                logger.error(f"Failed to pack tab {tab.name}: {e}")
+                payload = None
+            self.widget.after(0, self._packed, tab, version, payload)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _packed(self, tab: DocumentTab, version: int, payload: Optional[bytes]):
+        tab.is_packing = False
+        if payload is None or tab.version != version or tab is self.active or tab not in self.tabs:
+            return
+        tab.document = None
+        tab.word_counter = None
+        tab.payload = payload
+        tab.state = 'packed'
+        self.packed_bytes += len(payload)
+        logger.info(f"Tab {tab.name} packed to {len(payload)} bytes")
+        self._spill()
+
+    def _spill(self):
+        while self.packed_bytes > self.memory_limit:
+            packed = [tab for tab in self.tabs if tab.state == 'packed']
+            if not packed:
+                return
+            tab = min(packed, key=lambda tab: tab.last_active)
+            self.spill_count += 1
+            path = os.path.join(self.spill_dir, f"{os.getpid()}-{self.spill_count}{SPILL_SUFFIX}")
+            try:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(tab.payload)
+            except OSError as e:
+                logger.error(f"Failed to spill tab {tab.name}: {e}")
+                return
+            self.packed_bytes -= len(tab.payload)
+            tab.payload = None
+            tab.spill_path = path
+            tab.state = 'spilled'
+
+    def text(self, tab: DocumentTab) -> str:
+        if tab.document is not None:
+            return tab.document.get_text()
+        if tab.state == 'packed':
+            return zlib.decompress(tab.payload).decode('utf-8')
+        if tab.state == 'spilled':
+            with open(tab.spill_path, 'rb') as f:
+                return zlib.decompress(f.read()).decode('utf-8')
+        return ""
+
+    def release(self, tab: DocumentTab):
+        # Drops whatever the tab holds once its state is back on the editor
+        # (or the tab is closed).
+        if tab.state == 'packed':
+            self.packed_bytes -= len(tab.payload)
+        elif tab.state == 'spilled':
+            try:
+                os.remove(tab.spill_path)
+            except OSError:
+                pass
+        if tab.state != 'pending':
+            tab.state = 'resident'
+        tab.payload = None
+        tab.spill_path = None
+        tab.document = None
+        tab.word_counter = None
+        tab.outline = None
+        tab.history = None
+        tab.styles = None
+        tab.journal = None
+
+    def close(self):
+        for tab in self.tabs:
+            if tab.state == 'spilled':
+                self.release(tab)
+
+    def purge(self):
+        # Spill files left behind by editors that are no longer running.
+        try:
+            names = os.listdir(self.spill_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(SPILL_SUFFIX):
+                continue
+            try:
+                pid = int(name.split('-', 1)[0])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not _is_running(pid):
+                try:
+                    os.remove(os.path.join(self.spill_dir, name))
+                except OSError:
+                    pass
+
+
+def _is_running(pid: int) -> bool:
+    # When liveness cannot be established the process is assumed to be
+    # running: a leftover file costs disk space, deleting a live editor's
+    # spill file costs a document.
+    if os.name == 'nt':
+        return _is_running_windows(pid)
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _is_running_windows(pid: int) -> bool:
+    try:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+        kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+        kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    except (ImportError, OSError, AttributeError):
+        return True
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # Access denied means the process exists but belongs to someone else.
+        return ctypes.get_last_error() != ERROR_INVALID_PARAMETER
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
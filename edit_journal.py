@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import List, Optional, Tuple
+from edit_tracker import TextEdit
+from document_tabs import _is_running
+from file_operations import FileOperations
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = '.journal'
+
+
+def apply_records(text: str, records: List[list]) -> str:
+    lines = text.split('\n')
+    for record in records:
+        if record[0] == 'i':
+            _, line, col, inserted = record
+            current = lines[line - 1]
+            lines[line - 1:line] = (current[:col] + inserted + current[col:]).split('\n')
+        elif record[0] == 'd':
+            _, line, col, end_line, end_col = record
+            lines[line - 1:end_line] = [lines[line - 1][:col] + lines[end_line - 1][end_col:]]
+    return '\n'.join(lines)
+
+
+def _file_signature(filepath: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    if filepath and os.path.exists(filepath):
+        stat = os.stat(filepath)
+        return stat.st_size, stat.st_mtime_ns
+    return None, None
+
+
+class EditJournal:
+    def __init__(self, journal_dir: str, filepath: Optional[str] = None, path: Optional[str] = None):
+        self.journal_dir = journal_dir
+        self.filepath = os.path.abspath(filepath) if filepath else None
+        self.path = path or os.path.join(journal_dir, self.journal_name(self.filepath))
+        # Encoded records since the base file was last written; only the
+        # tail past `flushed` still has to be appended to disk.
+        self.entries: List[str] = []
+        self.first_entry = 0
+        self.flushed = 0
+        self.size = 0
+        self.file = None
+
+    @staticmethod
+    def journal_name(filepath: Optional[str]) -> str:
+        key = filepath or f"untitled-{os.getpid()}-{time.time()}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16] + JOURNAL_SUFFIX
+
+    @property
+    def pending(self) -> int:
+        return len(self.entries) - self.flushed
+
+    def start(self):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._rewrite()
+
+    def record(self, edit: TextEdit):
+        if edit.kind == 'insert':
+            record = ['i', edit.start[0], edit.start[1], edit.text]
+        else:
+            record = ['d', edit.start[0], edit.start[1], edit.end[0], edit.end[1]]
+        self.entries.append(json.dumps(record, ensure_ascii=False))
+
+    def mark(self) -> int:
+        self.entries.append('["s"]')
+        return self.first_entry + len(self.entries)
+
+    def flush(self) -> int:
+        if self.file is None or not self.pending:
+            return 0
+        data = ''.join(entry + '\n' for entry in self.entries[self.flushed:]).encode('utf-8')
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.flushed = len(self.entries)
+        self.size += len(data)
+        return len(data)
+
+    def compact(self, mark: int, filepath: Optional[str] = None):
+        if filepath:
+            new_filepath = os.path.abspath(filepath)
+            if new_filepath != self.filepath:
+                self.discard()
+                self.filepath = new_filepath
+                self.path = os.path.join(self.journal_dir, self.journal_name(new_filepath))
+        dropped = mark - self.first_entry
+        if dropped > 0:
+            self.entries = self.entries[dropped:]
+            self.first_entry = mark
+        self._rewrite()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        self.first_entry += len(self.entries)
+        self.entries = []
+        self.flushed = 0
+        self.size = 0
+
+    def _rewrite(self):
+        base_size, base_mtime = _file_signature(self.filepath)
+        header = json.dumps({
+            'journal': JOURNAL_VERSION,
+            'path': self.filepath,
+            'base_size': base_size,
+            'base_mtime': base_mtime,
+            'pid': os.getpid(),
+            'created': time.time()
+        }, ensure_ascii=False)
+        data = ''.join(line + '\n' for line in [header] + self.entries).encode('utf-8')
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        FileOperations.atomic_write(self.path, lambda f: f.write(data))
+        self.file = open(self.path, 'ab')
+        self.flushed = len(self.entries)
+        self.size = len(data)
+
+    @staticmethod
+    def find_journals(journal_dir: str) -> List[str]:
+        if not os.path.isdir(journal_dir):
+            return []
+        paths = [
+            os.path.join(journal_dir, name)
+            for name in os.listdir(journal_dir)
+            if name.endswith(JOURNAL_SUFFIX)
+        ]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    @staticmethod
+    def read(path: str) -> Tuple[dict, List[list]]:
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn final line left by a crash mid-append.
+                    break
+        return header, records
+
+    @staticmethod
+    def is_owned_by_running_process(header: dict) -> bool:
+        pid = header.get('pid')
+        if not pid or pid == os.getpid():
+            return False
+        return _is_running(pid)
+
+    @staticmethod
+    def pending_edits(path: str) -> Optional[Tuple[Optional[str], List[list]]]:
+        header, records = EditJournal.read(path)
+        if header.get('journal') != JOURNAL_VERSION:
+            return None
+
+        filepath = header.get('path')
+        if filepath and not os.path.exists(filepath):
+            return None
+        if (header.get('base_size'), header.get('base_mtime')) != _file_signature(filepath):
+            # The base file was replaced after the journal header was written:
+            # a save finished but the crash came before the journal was
+            # compacted, so only the edits after the last save marker apply.
+            markers = [i for i, record in enumerate(records) if record[0] == 's']
+            if not markers:
+                return None
+            records = records[markers[-1] + 1:]
+
+        edits = [record for record in records if record[0] != 's']
+        if not edits:
+            return None
+        return filepath, edits
+
+    @staticmethod
+    def recover(path: str) -> Optional[Tuple[Optional[str], str, List[list]]]:
+        pending = EditJournal.pending_edits(path)
+        if pending is None:
+            return None
+
+        filepath, edits = pending
+        if filepath:
+            if FileOperations.get_file_extension(filepath) == '.docx':
+                base = FileOperations.open_docx(filepath)
+            else:
+                base = FileOperations.open_txt(filepath)
+        else:
+            base = ""
+        return filepath, apply_records(base, edits), edits
+
+    @staticmethod
+    def resume(journal_dir: str, path: str, filepath: Optional[str], edits: List[list]) -> 'EditJournal':
+        journal = EditJournal(journal_dir, filepath)
+        journal.entries = [json.dumps(record, ensure_ascii=False) for record in edits]
+        journal.start()
+        if os.path.abspath(path) != os.path.abspath(journal.path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return journal
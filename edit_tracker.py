@@ -0,0 +1,123 @@
+import logging
+from typing import Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TextEdit:
+    __slots__ = ('kind', 'start', 'end', 'text')
+
+    def __init__(self, kind: str, start: Tuple[int, int], end: Tuple[int, int], text: str):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.text = text
+
+    @property
+    def line_delta(self) -> int:
+        lines = self.end[0] - self.start[0]
+        return lines if self.kind == 'insert' else -lines
+
+    def __repr__(self):
+        return f"TextEdit({self.kind!r}, {self.start}, {self.end}, {self.text!r})"
+
+
+def parse_index(index: str) -> Tuple[int, int]:
+    line, col = index.split('.')
+    return int(line), int(col)
+
+
+def end_of_insert(start: Tuple[int, int], text: str) -> Tuple[int, int]:
+    newlines = text.count('\n')
+    if not newlines:
+        return start[0], start[1] + len(text)
+    return start[0] + newlines, len(text) - text.rfind('\n') - 1
+
+
+class EditTracker:
+    def __init__(self, widget):
+        self.widget = widget
+        self.tk = widget.tk
+        self.listeners: List[Callable[[TextEdit], None]] = []
+        self.widget_name = str(widget)
+        self.original_name = self.widget_name + "_orig"
+        # The Tcl command of the text widget is renamed and replaced by a
+        # proxy, so every insert/delete - typing, paste, undo, programmatic
+        # edits - passes through _dispatch before reaching the widget.
+        self.tk.call("rename", self.widget_name, self.original_name)
+        self.tk.createcommand(self.widget_name, self._dispatch)
+
+    def add_listener(self, listener: Callable[[TextEdit], None]):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[TextEdit], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def close(self):
+        try:
+            self.tk.deletecommand(self.widget_name)
+            self.tk.call("rename", self.original_name, self.widget_name)
+        except Exception:
+            pass
+
+    def _call(self, *args):
+        return self.tk.call((self.original_name,) + args)
+
+    def _index(self, index) -> str:
+        return str(self._call("index", index))
+
+    def _compare(self, index1, op: str, index2) -> bool:
+        return self.tk.getboolean(self._call("compare", index1, op, index2))
+
+    def _dispatch(self, operation, *args):
+        if operation in ("insert", "delete", "replace") and str(self._call("cget", "-state")) != "disabled":
+            if operation == "insert":
+                return self._insert(*args)
+            if operation == "delete":
+                return self._delete(*args)
+            return self._replace(*args)
+        return self._call(operation, *args)
+
+    def _insert(self, index, *args):
+        start = self._index(index)
+        if self._compare(start, "==", "end"):
+            start = self._index("end-1c")
+        text = "".join(str(chunk) for chunk in args[0::2])
+        result = self._call("insert", start, *args)
+        if text:
+            start_pos = parse_index(start)
+            self._notify(TextEdit('insert', start_pos, end_of_insert(start_pos, text), text))
+        return result
+
+    def _delete(self, index1, index2=None, *ranges):
+        if ranges:
+            pairs = [(index1, index2)] + list(zip(ranges[0::2], ranges[1::2]))
+            pairs = [(self._index(a), self._index(b)) for a, b in pairs]
+            pairs.sort(key=lambda pair: parse_index(pair[0]), reverse=True)
+            for first, last in pairs:
+                self._delete(first, last)
+            return ""
+
+        start = self._index(index1)
+        end = self._index(index2) if index2 is not None else self._index(f"{start}+1c")
+        if self._compare(end, ">", "end-1c"):
+            end = self._index("end-1c")
+        if not self._compare(start, "<", end):
+            return self._call("delete", index1, *(() if index2 is None else (index2,)))
+        text = str(self._call("get", start, end))
+        result = self._call("delete", start, end)
+        self._notify(TextEdit('delete', parse_index(start), parse_index(end), text))
+        return result
+
+    def _replace(self, index1, index2, *args):
+        start = self._index(index1)
+        self._delete(start, index2)
+        return self._insert(start, *args)
+
+    def _notify(self, edit: TextEdit):
+        for listener in list(self.listeners):
+            try:
+                listener(edit)
+            except Exception as e:
+                logger.error(f"Edit listener failed: {e}", exc_info=True)
@@ -3,15 +3,38 @@ from tkinter import filedialog, messagebox, colorchooser
 import tkinter.font as tkfont
 from ai_assistant import AIAssistant
 from file_operations import FileOperations
+from document_loader import ChunkedLoader
+from large_file_viewer import MappedDocument, LargeFileViewer
+from save_worker import SaveWorker
+from edit_tracker import EditTracker, TextEdit, parse_index
+from edit_journal import EditJournal
+from undo_history import UndoHistory
+from rich_text import SpanStore, StyleTags, PLAIN, style_get, style_with
+from spell_checker import SpellChecker, DirtyLines, SPELLING_TAG, GRAMMAR_TAG
+from word_counter import WordCounter
+from outline_index import OutlineIndex, heading_title
+from document_model import DocumentModel
+from search_engine import BlockSearch, TextSearch, build_pattern
+from idle_scheduler import IdleScheduler, FRAME_BUDGET
+from document_cache import DocumentCache
+from response_cache import ResponseCache
+from session_store import SessionStore, SessionRestorer, Session, file_signature, RESTORE_CHUNK_SIZE
+from document_tabs import TabStore, DocumentTab, SYNC_RESTORE_SIZE
+from virtual_editor import VirtualEditor, ModelLoader, DocumentText
 from ui_components import (AIPanel, FormattingToolbar, StatusBar, TemplateDialog,
                            StyleDialog, SettingsDialog, KeyboardShortcutsDialog,
-                           WelcomeDialog, ProgressDialog)
+                           WelcomeDialog, ProgressDialog, FindReplaceDialog, TabBar, OutlinePanel)
 import configparser
 import os
+import re
 import logging
 import time
 import threading
 import json
+from typing import Callable, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from parallel_pdf import PdfExportJob
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,23 +52,38 @@ class TextEditor(ctk.CTk):
         
         self.current_file = None
         self.is_modified = False
-        self.undo_stack = []
-        self.redo_stack = []
-        self.autosave_timer = None
         self.recent_files = []
         self.zoom_level = 1.0
         self.base_font_size = 12
         self.progress_dialog = None
         self.is_fullscreen = False
+        self.loader = None
+        self.viewer = None
+        self.virtual = None
+        self.session_loader = None
+        self.tab_loader = None
+        self.save_worker = SaveWorker()
+        self.edit_generation = 0
+        self.journal = None
+        self.journal_dir = os.path.join(os.path.dirname(__file__), '.journal')
+        self.pdf_export = None
+        self.find_dialog = None
+        self.session_store = SessionStore(os.path.join(os.path.dirname(__file__), '.session'))
+        self.ai_cache = None
         
         self.load_config()
+        self.scheduler = IdleScheduler(self, self.get_frame_budget())
+        self.history = UndoHistory(self.get_undo_memory())
+        self.document_cache = self.create_document_cache()
+        self.tabs = self.create_tab_store()
         self.load_recent_files()
         self.setup_ai()
         self.setup_ui()
         self.setup_bindings()
         self.start_autosave()
         
-        self.after(500, self.show_welcome_if_needed)
+        self.after(1, self.restore_session)
+        self.scheduler.schedule('welcome', self.show_welcome_if_needed, delay=0.5)
         
         logger.info("Text Editor initialized")
     
@@ -73,6 +111,9 @@ class TextEditor(ctk.CTk):
                 'show_ai_panel': 'True',
                 'show_statusbar': 'True'
             }
+            self.config['ADVANCED'] = {
+                'max_file_size': '50'
+            }
             self.save_config()
         
         updated = False
@@ -142,6 +183,15 @@ class TextEditor(ctk.CTk):
                 self.config['INTERFACE']['show_statusbar'] = 'True'
                 updated = True
         
+        if 'ADVANCED' not in self.config:
+            self.config['ADVANCED'] = {
+                'max_file_size': '50'
+            }
+            updated = True
+        elif 'max_file_size' not in self.config['ADVANCED']:
+            self.config['ADVANCED']['max_file_size'] = '50'
+            updated = True
+        
         if updated:
             self.save_config()
         
@@ -160,9 +210,43 @@ class TextEditor(ctk.CTk):
         except (ValueError, TypeError):
             max_tokens = 2048
         
-        self.ai_assistant = AIAssistant(api_key, model, temperature, max_tokens)
-        
-        if not self.ai_assistant.is_ready():
+        if self.ai_cache:
+            self.ai_cache.close()
+        self.ai_cache = self.create_ai_cache()
+        self.ai_assistant = AIAssistant(
+            api_key, model, temperature, max_tokens, defer_init=True, cache=self.ai_cache,
+            force_cache=self.config.getboolean('ADVANCED', 'cache_creative_ai_responses', fallback=False)
+        )
+        self.after(100, self.check_ai_initialized, self.ai_assistant)
+    
+    def create_ai_cache(self) -> Optional[ResponseCache]:
+        if not self.config.getboolean('ADVANCED', 'cache_ai_responses', fallback=True):
+            return None
+        try:
+            size_mb = float(self.config.get('ADVANCED', 'ai_cache_size', fallback='20'))
+        except (ValueError, TypeError):
+            size_mb = 20.0
+        try:
+            ttl_hours = float(self.config.get('ADVANCED', 'ai_cache_ttl', fallback='168'))
+        except (ValueError, TypeError):
+            ttl_hours = 168.0
+        if ttl_hours <= 0:
+            return None
+        return ResponseCache(
+            os.path.join(os.path.dirname(__file__), '.cache'),
+            max_bytes=int(size_mb * 1024 * 1024),
+            ttl=ttl_hours * 3600
+        )
+    
+    def check_ai_initialized(self, assistant: AIAssistant):
+        if assistant is not self.ai_assistant:
+            return
+        if assistant.is_initializing():
+            self.statusbar.set_ai_status("🤖 AI загружается...")
+            self.after(100, self.check_ai_initialized, assistant)
+            return
+        self.statusbar.set_ai_status("")
+        if not assistant.is_ready():
             logger.warning("AI Assistant not configured properly")
     
     def setup_ui(self):
@@ -172,6 +256,7 @@ class TextEditor(ctk.CTk):
         self.setup_menu()
         self.setup_toolbar()
         self.setup_editor()
+        self.setup_outline_panel()
         self.setup_ai_panel()
         self.setup_statusbar()
         self.apply_interface_visibility()
@@ -233,17 +318,46 @@ class TextEditor(ctk.CTk):
     def setup_editor(self):
         editor_frame = ctk.CTkFrame(self)
         editor_frame.grid(row=2, column=1, sticky="nsew", padx=5, pady=5)
-        editor_frame.grid_rowconfigure(0, weight=1)
+        editor_frame.grid_rowconfigure(1, weight=1)
         editor_frame.grid_columnconfigure(0, weight=1)
         
+        self.tab_bar = TabBar(editor_frame, self.activate_tab, self.close_tab, self.new_file)
+        self.tab_bar.grid(row=0, column=0, columnspan=2, sticky="ew")
+        
         self.text_editor = ctk.CTkTextbox(
             editor_frame,
             wrap="word",
             font=ctk.CTkFont(size=12)
         )
-        self.text_editor.grid(row=0, column=0, sticky="nsew")
-        self.text_editor.bind('<KeyRelease>', self.on_text_change)
+        self.text_editor.grid(row=1, column=0, sticky="nsew")
         self.text_editor.bind('<Button-3>', self.show_context_menu)
+        
+        self.edit_tracker = EditTracker(self.text_editor._textbox)
+        self.edit_tracker.add_listener(self.on_edit)
+        self.document = DocumentModel()
+        self.word_counter = WordCounter(self.document.text_lines)
+        self.outline = OutlineIndex(self.document.text_lines)
+        self.outline_shown = None
+        self.text_search = TextSearch(self.text_editor._textbox)
+        self.styles = SpanStore()
+        self.style_tags = StyleTags(self.text_editor._textbox, self.get_base_font)
+        self.spell_checker = self.create_spell_checker()
+        self.spell_lines = DirtyLines()
+        self.text_editor._textbox.tag_config(SPELLING_TAG, underline=True, underlinefg="#E53935")
+        self.text_editor._textbox.tag_config(GRAMMAR_TAG, underline=True, underlinefg="#1E88E5")
+        
+        self.viewer_scrollbar = ctk.CTkScrollbar(editor_frame, orientation="vertical")
+        self.viewer_scrollbar.grid(row=1, column=1, sticky="ns")
+        self.viewer_scrollbar.grid_remove()
+        
+        self.tabs.add(DocumentTab())
+        self.tabs.activate(self.tabs.tabs[0])
+        self.update_tabs()
+    
+    def setup_outline_panel(self):
+        self.outline_panel = OutlinePanel(self, self.jump_to_line)
+        self.outline_panel.grid(row=2, column=0, sticky="nsew", padx=(5, 0), pady=5)
+        self.outline_panel.grid_remove()
     
     def setup_ai_panel(self):
         self.ai_panel = AIPanel(self, self.handle_ai_action)
@@ -267,10 +381,17 @@ class TextEditor(ctk.CTk):
         self.bind('<Control-S>', lambda e: self.save_file_as())
         self.bind('<Control-o>', lambda e: self.open_file())
         self.bind('<Control-n>', lambda e: self.new_file())
+        self.bind('<Control-w>', lambda e: self.close_tab())
+        self.bind('<Control-Tab>', lambda e: self.next_tab(1))
+        self.bind('<Control-Shift-Tab>', lambda e: self.next_tab(-1))
+        self.bind('<Control-ISO_Left_Tab>', lambda e: self.next_tab(-1))
         self.bind('<Control-z>', lambda e: self.undo())
         self.bind('<Control-y>', lambda e: self.redo())
         self.bind('<Control-f>', lambda e: self.find_replace())
+        self.bind('<F3>', lambda e: self.find_next())
+        self.bind('<Shift-F3>', lambda e: self.find_next(backwards=True))
         self.bind('<Control-Shift-A>', lambda e: self.show_ai_menu())
+        self.bind('<Control-Shift-O>', lambda e: self.toggle_outline_panel())
         self.bind('<Control-i>', lambda e: self.ai_action("improve"))
         self.bind('<Control-r>', lambda e: self.show_rewrite_dialog())
         self.bind('<Control-plus>', lambda e: self.zoom_in())
@@ -279,16 +400,18 @@ class TextEditor(ctk.CTk):
         self.bind('<Control-0>', lambda e: self.reset_zoom())
         self.bind('<F11>', lambda e: self.toggle_fullscreen())
         self.bind('<F1>', lambda e: KeyboardShortcutsDialog(self))
+        self.bind('<Escape>', lambda e: self.cancel_loading())
     
     def show_file_menu(self):
         menu = ctk.CTkToplevel(self)
         menu.title("Файл")
-        menu.geometry("250x350")
+        menu.geometry("250x390")
         menu.transient(self)
         
         options = [
             ("📄 Новый", self.new_file),
             ("📁 Открыть", self.open_file),
+            ("✕ Закрыть вкладку", self.close_tab),
             ("💾 Сохранить", self.save_file),
             ("💾 Сохранить как", self.save_file_as),
             ("📤 Экспорт в PDF", self.export_pdf),
@@ -359,7 +482,17 @@ class TextEditor(ctk.CTk):
             )
             btn.pack(padx=10, pady=5, fill="x")
     
+    def ai_still_loading(self) -> bool:
+        # The Gemini SDK is imported on a thread at startup; the UI thread
+        # never waits for it.
+        if not self.ai_assistant.is_initializing():
+            return False
+        self.statusbar.set_ai_status("🤖 AI загружается...")
+        return True
+    
     def show_ai_menu(self):
+        if self.ai_still_loading():
+            return
         if not self.ai_assistant.is_ready():
             messagebox.showwarning(
                 "AI не настроен",
@@ -383,6 +516,9 @@ class TextEditor(ctk.CTk):
             ("📋 Резюмировать", lambda: self.ai_action("summarize")),
             ("📄 Создать документ", lambda: self.show_template_dialog())
         ]
+        if self.ai_cache:
+            options.append(("🗑 Очистить кэш AI", self.clear_ai_cache))
+            menu.geometry("250x345")
         
         for text, command in options:
             btn = ctk.CTkButton(
@@ -392,10 +528,17 @@ class TextEditor(ctk.CTk):
             )
             btn.pack(padx=10, pady=5, fill="x")
     
+    def clear_ai_cache(self):
+        # Cached answers are returned until they expire; this is how the
+        # user asks for fresh ones.
+        self.ai_cache.clear()
+        self.statusbar.set_save_status("🗑 Кэш AI очищен")
+        self.clear_save_status_later(2.0)
+    
     def show_view_menu(self):
         menu = ctk.CTkToplevel(self)
         menu.title("Вид")
-        menu.geometry("250x250")
+        menu.geometry("250x290")
         menu.transient(self)
         
         options = [
@@ -404,6 +547,7 @@ class TextEditor(ctk.CTk):
             ("🔄 Сбросить масштаб (Ctrl+0)", self.reset_zoom),
             ("⬛ Полный экран (F11)", self.toggle_fullscreen),
             ("📋 Панель AI", self.toggle_ai_panel),
+            ("📑 Структура (Ctrl+Shift+O)", self.toggle_outline_panel),
         ]
         
         for text, command in options:
@@ -455,7 +599,7 @@ class TextEditor(ctk.CTk):
         messagebox.showinfo("О программе", about_text)
     
     def show_context_menu(self, event):
-        if not self.ai_assistant.is_ready():
+        if self.ai_still_loading() or not self.ai_assistant.is_ready():
             return
         
         try:
@@ -484,14 +628,8 @@ class TextEditor(ctk.CTk):
             pass
     
     def new_file(self):
-        if self.is_modified:
-            if messagebox.askyesno("Сохранить?", "Сохранить изменения перед созданием нового файла?"):
-                self.save_file()
-        
-        self.text_editor.delete("1.0", "end")
-        self.current_file = None
-        self.is_modified = False
-        self.title("AI Text Editor - Gemini")
+        if not self.is_blank_tab():
+            self.add_tab(DocumentTab())
     
     def open_file(self):
         filepath = filedialog.askopenfilename(
@@ -503,33 +641,574 @@ class TextEditor(ctk.CTk):
         )
         
         if filepath:
+            self.open_document(filepath)
+    
+    def open_document(self, filepath: str):
+        # Every file gets a tab of its own; one already open is just shown.
+        self.update_tabs()
+        tab = self.tabs.find(filepath)
+        if tab is not None:
+            self.activate_tab(tab)
+            return
+        if self.is_blank_tab():
+            self.load_document(filepath)
+            return
+        previous = self.tabs.active
+        tab = DocumentTab()
+        if self.add_tab(tab) and not self.load_document(filepath):
+            # Nothing was opened: the new tab goes away again.
+            self.activate_tab(previous)
+            self.close_tab(tab)
+    
+    def create_tab_store(self) -> TabStore:
+        try:
+            idle_timeout = float(self.config.get('ADVANCED', 'tab_idle_timeout', fallback='300'))
+        except (ValueError, TypeError):
+            idle_timeout = 300.0
+        try:
+            memory_mb = float(self.config.get('ADVANCED', 'tab_memory', fallback='64'))
+        except (ValueError, TypeError):
+            memory_mb = 64.0
+        tabs = TabStore(
+            self,
+            os.path.join(os.path.dirname(__file__), '.tabs'),
+            idle_timeout=idle_timeout,
+            memory_limit=int(memory_mb * 1024 * 1024)
+        )
+        tabs.purge()
+        if idle_timeout > 0:
+            self.scheduler.repeat('tabs', self.offload_tabs, min(30.0, idle_timeout))
+        return tabs
+    
+    def offload_tabs(self):
+        for tab in self.tabs.idle_tabs():
+            self.tabs.pack(tab)
+    
+    def is_blank_tab(self) -> bool:
+        return (not self.is_loading() and not self.viewer and not self.virtual and self.current_file is None
+                and not self.is_modified and self.document.char_count == 0)
+    
+    def update_tabs(self):
+        active = self.tabs.active
+        if not self.is_loading():
+            active.filepath = self.viewer.document.filepath if self.viewer else self.current_file
+            active.is_modified = self.is_modified
+        self.tab_bar.set_tabs(
+            [(tab, f"● {tab.name}" if tab.is_modified else tab.name) for tab in self.tabs.tabs],
+            active
+        )
+    
+    def add_tab(self, tab: DocumentTab) -> bool:
+        if self.is_loading():
+            self.statusbar.set_save_status("⏳ Дождитесь окончания загрузки")
+            return False
+        self.stash_tab()
+        self.tabs.add(tab, self.tabs.index(self.tabs.active) + 1)
+        self.tabs.activate(tab)
+        self.show_tab(tab)
+        return True
+    
+    def activate_tab(self, tab: DocumentTab):
+        if tab is self.tabs.active or tab not in self.tabs.tabs:
+            return
+        if self.is_loading():
+            self.statusbar.set_save_status("⏳ Дождитесь окончания загрузки")
+            return
+        self.stash_tab()
+        self.tabs.activate(tab)
+        self.show_tab(tab)
+    
+    def next_tab(self, step: int):
+        index = self.tabs.index(self.tabs.active) + step
+        self.activate_tab(self.tabs.tabs[index % len(self.tabs)])
+    
+    def close_tab(self, tab: Optional[DocumentTab] = None):
+        tab = tab or self.tabs.active
+        is_active = tab is self.tabs.active
+        if is_active and self.is_loading():
+            if self.loader is self.tab_loader:
+                self.statusbar.set_save_status("⏳ Дождитесь окончания загрузки")
+                return
+            self.cancel_loading()
+        
+        self.update_tabs()
+        answer = False
+        if tab.is_modified:
+            answer = messagebox.askyesnocancel("Сохранить?", f"Сохранить изменения в «{tab.name}» перед закрытием?")
+            if answer is None:
+                return
+        if is_active:
+            self.stash_tab()
+        if answer and not self.save_tab_and_wait(tab):
+            # The tab and its journal stay until the file is on disk.
+            if is_active:
+                self.show_tab(tab)
+            else:
+                self.update_tabs()
+            return
+        
+        if tab.journal:
+            tab.journal.discard()
+        replacement = self.tabs.remove(tab)
+        if not is_active:
+            self.update_tabs()
+            return
+        if replacement is None:
+            replacement = DocumentTab()
+            self.tabs.add(replacement)
+        self.tabs.activate(replacement)
+        self.show_tab(replacement)
+    
+    def save_tab(self, tab: DocumentTab, on_saved: Optional[Callable[[Optional[str]], None]] = None) -> bool:
+        # Saves a tab that is not shown, e.g. one being closed. on_saved is
+        # called on the save thread with the error, if any, once the write
+        # has finished.
+        filepath = tab.filepath or filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[
+                ("Text Files", "*.txt"),
+                ("Word Documents", "*.docx"),
+                ("All Files", "*.*")
+            ]
+        )
+        if not filepath:
+            return False
+        try:
+            content = tab.document.snapshot() if tab.document is not None else self.tabs.text(tab)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {e}")
+            return False
+        styles = None
+        if tab.styles is not None and tab.styles.is_active and FileOperations.get_file_extension(filepath) == '.docx':
+            styles = tab.styles.snapshot()
+        tab.filepath = filepath
+        self.statusbar.set_save_status("💾 Сохранение...")
+        
+        def done(error: Optional[str]):
+            if on_saved:
+                on_saved(error)
+            self.after(0, self.on_file_saved, filepath, None, None, error)
+        
+        self.save_worker.submit(filepath, content, done, styles=styles)
+        return True
+    
+    def save_tab_and_wait(self, tab: DocumentTab) -> bool:
+        # For callers about to drop the tab's state: True only once the file
+        # has been written. Input is not processed while waiting, so the tab
+        # cannot change under the save.
+        finished = threading.Event()
+        errors = []
+        
+        def on_saved(error: Optional[str]):
+            errors.append(error)
+            finished.set()
+        
+        if not self.save_tab(tab, on_saved):
+            return False
+        while not finished.wait(0.05):
+            self.update_idletasks()
+        return errors[0] is None
+    
+    def stash_tab(self):
+        # Moves the active document's state from the editor into its tab
+        # and leaves the editor with an empty document.
+        tab = self.tabs.active
+        self.update_tabs()
+        tab.viewer = self.viewer is not None
+        if self.viewer:
+            self.close_viewer()
+            return
+        if self.virtual:
+            tab.cursor = self.virtual.to_document("insert")
+            tab.top = self.virtual.to_document("@0,0")[0]
+            self.virtual.close()
+            self.virtual = None
+            tab.virtual = True
+        else:
+            tab.cursor = parse_index(self.text_editor.index("insert"))
+            tab.top = parse_index(self.text_editor.index("@0,0"))[0]
+            tab.virtual = False
+        tab.edit_generation = self.edit_generation
+        tab.document = self.document
+        tab.word_counter = self.word_counter
+        tab.outline = self.outline
+        tab.history = self.history
+        tab.styles = self.styles
+        tab.journal = self.journal
+        if self.journal:
             try:
-                ext = FileOperations.get_file_extension(filepath)
-                
-                if ext == '.txt':
-                    content = FileOperations.open_txt(filepath)
-                elif ext == '.docx':
-                    content = FileOperations.open_docx(filepath)
-                else:
-                    content = FileOperations.open_txt(filepath)
-                
-                self.text_editor.delete("1.0", "end")
-                self.text_editor.insert("1.0", content)
-                self.current_file = filepath
-                self.is_modified = False
-                self.title(f"AI Text Editor - {os.path.basename(filepath)}")
-                self.statusbar.set_save_status("✓ Файл загружен")
-                self.add_recent_file(filepath)
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось открыть файл: {e}")
+                self.journal.flush()
+            except OSError as e:
+                logger.error(f"Failed to write edit journal: {e}")
+        
+        self.journal = None
+        self.document = DocumentModel()
+        self.word_counter = WordCounter(self.document.text_lines)
+        self.outline = OutlineIndex(self.document.text_lines)
+        self.history = UndoHistory(self.get_undo_memory())
+        self.styles = SpanStore()
+        self.replace_text("")
+        self.current_file = None
+        self.is_modified = False
+    
+    def replace_text(self, text: str):
+        # Swaps the widget content without reporting it as edits; the caller
+        # installs the document state that goes with it.
+        self.edit_tracker.remove_listener(self.on_edit)
+        try:
+            self.text_editor.delete("1.0", "end")
+            if text:
+                self.text_editor.insert("1.0", text)
+        finally:
+            self.edit_tracker.add_listener(self.on_edit)
+    
+    def show_tab(self, tab: DocumentTab):
+        # Shows the active tab: a pending tab is read from its file now, an
+        # offloaded one is unpacked; anything over SYNC_RESTORE_SIZE is
+        # refilled in chunks like a file being opened.
+        self.current_file = None
+        self.is_modified = False
+        self.edit_generation = tab.edit_generation
+        if tab.state == 'pending' or tab.viewer:
+            tab.state = 'resident'
+            self.title("AI Text Editor - Gemini")
+            if tab.viewer:
+                self.open_viewer(tab.filepath)
+            else:
+                self.start_journal(None)
+                self.load_document(tab.filepath)
+            self.update_tabs()
+            return
+        
+        self.current_file = tab.filepath
+        self.is_modified = tab.is_modified
+        if tab.virtual and tab.document is not None:
+            self.document = tab.document
+            self.word_counter = tab.word_counter
+            self.outline = tab.outline
+            self.virtual = VirtualEditor(self.text_editor, tab.document, on_position=self.on_virtual_position)
+            self.virtual.open(*tab.cursor)
+            self.on_tab_loaded(tab)
+            return
+        
+        try:
+            text = self.tabs.text(tab)
+        except OSError as e:
+            logger.error(f"Failed to restore tab {tab.name}: {e}")
+            messagebox.showerror("Ошибка", f"Не удалось восстановить вкладку: {e}")
+            text = ""
+            tab.virtual = False
+            self.is_modified = True
+        if tab.virtual:
+            self.statusbar.show_progress(0.0)
+            self.open_virtual([(text, len(text))], len(text), lambda error, cancelled: self.on_tab_loaded(tab),
+                              position=tab.cursor)
+            self.tab_loader = self.loader
+        elif len(text) <= SYNC_RESTORE_SIZE:
+            self.replace_text(text)
+            self.on_tab_loaded(tab)
+        else:
+            self.statusbar.show_progress(0.0)
+            self.loader = ChunkedLoader(
+                self.text_editor,
+                ((text[i:i + RESTORE_CHUNK_SIZE], i + RESTORE_CHUNK_SIZE)
+                 for i in range(0, len(text), RESTORE_CHUNK_SIZE)),
+                len(text),
+                on_progress=lambda fraction: self.statusbar.show_progress(fraction),
+                on_complete=lambda error, cancelled: self.on_tab_loaded(tab)
+            )
+            self.tab_loader = self.loader
+            self.loader.start()
+    
+    def on_tab_loaded(self, tab: DocumentTab):
+        self.loader = None
+        self.tab_loader = None
+        self.statusbar.hide_progress()
+        if not self.virtual:
+            if tab.document is not None:
+                self.document = tab.document
+                self.word_counter = tab.word_counter
+            else:
+                text = self.text_editor.get("1.0", "end-1c")
+                self.document.reset(text)
+                self.word_counter.reset(text)
+            if tab.outline is not None:
+                self.outline = tab.outline
+            else:
+                self.outline.reset(self.document.get_text())
+            self.text_editor.mark_set("insert", "{}.{}".format(*tab.cursor))
+            self.text_editor.yview(f"{tab.top}.0")
+        self.history = tab.history or UndoHistory(self.get_undo_memory())
+        self.styles = tab.styles or SpanStore()
+        if self.styles.is_active:
+            self.style_tags.retag("1.0", 0, [(start, end, PLAIN, style)
+                                             for start, end, style in self.styles.runs() if style != PLAIN])
+        journal = tab.journal
+        self.tabs.release(tab)
+        if journal:
+            self.journal = journal
+        else:
+            self.start_journal(self.current_file)
+        
+        self.statusbar.set_counts(self.word_counter.words, self.word_counter.chars)
+        if self.spell_checker:
+            self.spell_lines.reset(self.document.line_count)
+            self.scheduler.schedule('spell', self.check_spelling, delay=1.0)
+        if self.find_dialog and self.find_dialog.winfo_exists():
+            self.on_search_changed()
+        self.scheduler.schedule('outline', self.refresh_outline)
+        self.title(f"AI Text Editor - {tab.name}" if self.current_file else "AI Text Editor - Gemini")
+        self.update_tabs()
+    
+    def get_max_file_size(self) -> float:
+        try:
+            return float(self.config.get('ADVANCED', 'max_file_size', fallback='50'))
+        except (ValueError, TypeError):
+            return 50.0
+    
+    def get_virtual_edit_size(self) -> float:
+        try:
+            return float(self.config.get('ADVANCED', 'virtual_edit_size', fallback='20'))
+        except (ValueError, TypeError):
+            return 20.0
+    
+    def create_document_cache(self) -> Optional[DocumentCache]:
+        try:
+            size_mb = float(self.config.get('ADVANCED', 'document_cache_size', fallback='200'))
+        except (ValueError, TypeError):
+            size_mb = 200.0
+        if size_mb <= 0:
+            return None
+        return DocumentCache(
+            os.path.join(os.path.dirname(__file__), '.cache'),
+            max_bytes=int(size_mb * 1024 * 1024),
+            verify_content=self.config.getboolean('ADVANCED', 'document_cache_verify', fallback=False)
+        )
+    
+    def is_loading(self) -> bool:
+        return self.loader is not None and self.loader.is_running
+    
+    def load_document(self, filepath: str) -> bool:
+        # False if the file was not opened at all, neither for editing nor
+        # in the viewer.
+        try:
+            size_mb = FileOperations.get_file_size_mb(filepath)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось открыть файл: {e}")
+            return False
+        
+        ext = FileOperations.get_file_extension(filepath)
+        max_size = self.get_max_file_size()
+        if max_size > 0 and size_mb > max_size:
+            message = (f"Файл слишком большой для редактирования ({size_mb:.1f} MB).\n"
+                       f"Максимальный размер: {max_size:g} MB (параметр max_file_size в config.ini).")
+            if ext == '.docx':
+                # The viewer shows the file's bytes, which for DOCX is a zip archive.
+                messagebox.showwarning("Большой файл", message)
+                return False
+            if messagebox.askyesno("Большой файл", f"{message}\n\nОткрыть его в режиме просмотра (только чтение)?"):
+                return self.open_viewer(filepath)
+            return False
+        
+        self.cancel_loading()
+        self.close_viewer()
+        
+        total_bytes = os.path.getsize(filepath)
+        if ext == '.docx':
+            if self.document_cache:
+                chunks = self.document_cache.load(filepath, lambda: FileOperations.iter_docx_chunks(filepath))
+            else:
+                chunks = FileOperations.iter_docx_chunks(filepath)
+        else:
+            chunks = FileOperations.iter_txt_chunks(filepath)
+        
+        self.stop_journal()
+        self.close_virtual()
+        self.text_editor.delete("1.0", "end")
+        self.current_file = None
+        self.is_modified = False
+        self.title(f"AI Text Editor - {os.path.basename(filepath)} (загрузка...)")
+        self.statusbar.set_save_status("⏳ Загрузка...")
+        self.statusbar.show_progress(0.0, self.cancel_loading)
+        
+        virtual_size = self.get_virtual_edit_size()
+        if 0 < virtual_size < size_mb:
+            self.open_virtual(
+                chunks,
+                total_bytes,
+                lambda error, cancelled: self.on_document_loaded(filepath, error, cancelled)
+            )
+            return True
+        
+        self.loader = ChunkedLoader(
+            self.text_editor,
+            chunks,
+            total_bytes,
+            on_progress=lambda fraction: self.statusbar.show_progress(fraction),
+            on_complete=lambda error, cancelled: self.on_document_loaded(filepath, error, cancelled)
+        )
+        self.loader.start()
+        return True
+    
+    def cancel_loading(self):
+        # A tab being refilled is not cancelled: its state is already in memory.
+        if self.is_loading() and self.loader is not self.tab_loader:
+            self.loader.cancel()
+    
+    def open_viewer(self, filepath: str) -> bool:
+        self.cancel_loading()
+        self.close_viewer()
+        self.stop_journal()
+        self.close_virtual()
+        
+        try:
+            document = MappedDocument(filepath)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось открыть файл: {e}")
+            return False
+        
+        self.current_file = None
+        self.is_modified = False
+        self.viewer = LargeFileViewer(
+            self.text_editor,
+            self.viewer_scrollbar,
+            document,
+            on_position=self.on_viewer_position
+        )
+        self.viewer.open()
+        self.title(f"AI Text Editor - {os.path.basename(filepath)} (только чтение)")
+        self.statusbar.show_progress(0.0, lambda: self.stop_viewer_indexing(document))
+        
+        def build_index():
+            document.build_index(lambda fraction: self.after(0, self.on_viewer_index_progress, document, fraction))
+            self.after(0, self.on_viewer_index_progress, document, 1.0)
+        
+        threading.Thread(target=build_index, daemon=True).start()
+        self.add_recent_file(filepath)
+        return True
+    
+    def stop_viewer_indexing(self, document: MappedDocument):
+        document.cancel_event.set()
+        self.statusbar.hide_progress()
+    
+    def on_viewer_index_progress(self, document: MappedDocument, fraction: float):
+        if not self.viewer or self.viewer.document is not document:
+            return
+        if document.is_indexed or document.cancel_event.is_set():
+            self.statusbar.hide_progress()
+        else:
+            self.statusbar.show_progress(fraction)
+        self.viewer.render()
+    
+    def on_viewer_position(self, first: int, last: int, total: int):
+        suffix = "" if self.viewer and self.viewer.document.is_indexed else "+"
+        self.statusbar.set_save_status(f"👁 Просмотр: строки {first}–{last} из {total}{suffix}")
+    
+    def close_viewer(self):
+        if self.viewer:
+            self.viewer.close()
+            self.viewer = None
+            self.sync_document()
+            self.statusbar.hide_progress()
+            self.statusbar.set_save_status("")
+            self.title("AI Text Editor - Gemini")
+    
+    def open_virtual(self, chunks, total_bytes: int, on_loaded: Callable[[Optional[str], bool], None],
+                     position: Tuple[int, int] = (1, 0)):
+        # The document is read into a DocumentModel off the Tk thread; the
+        # widget then shows a window of it (see VirtualEditor).
+        self.loader = ModelLoader(
+            self.text_editor,
+            chunks,
+            total_bytes,
+            on_progress=lambda fraction: self.statusbar.show_progress(fraction),
+            on_complete=lambda model, counter, outline, error, cancelled: self.on_model_loaded(
+                model, counter, outline, error, cancelled, on_loaded, position)
+        )
+        self.loader.start()
+    
+    def on_model_loaded(self, model: Optional[DocumentModel], counter: Optional[WordCounter],
+                        outline: Optional[OutlineIndex], error: Optional[str], cancelled: bool,
+                        on_loaded: Callable[[Optional[str], bool], None], position: Tuple[int, int]):
+        if cancelled:
+            # Nothing of a partially read model is shown.
+            self.loader = None
+            self.statusbar.hide_progress()
+            self.title("AI Text Editor - Gemini")
+            self.statusbar.set_save_status("⚠ Загрузка отменена")
+            self.start_journal(None)
+            return
+        if model is not None:
+            self.document = model
+            self.word_counter = counter
+            self.outline = outline
+            self.virtual = VirtualEditor(self.text_editor, model, on_position=self.on_virtual_position)
+            self.virtual.open(*position)
+            self.statusbar.set_counts(counter.words, counter.chars)
+        on_loaded(error, False)
+    
+    def on_virtual_position(self, first: int, last: int, total: int):
+        self.statusbar.set_save_status(f"📄 Строки {first}–{last} из {total}")
+    
+    def close_virtual(self):
+        if self.virtual:
+            self.virtual.close()
+            self.virtual = None
+            self.document = DocumentModel()
+            self.word_counter = WordCounter(self.document.text_lines)
+            self.outline = OutlineIndex(self.document.text_lines)
+            self.sync_document()
+    
+    def on_document_loaded(self, filepath: str, error: Optional[str], cancelled: bool):
+        self.loader = None
+        self.statusbar.hide_progress()
+        if self.document_cache and FileOperations.get_file_extension(filepath) == '.docx':
+            self.statusbar.set_cache_stats(self.document_cache.hits, self.document_cache.misses)
+        if not self.virtual:
+            self.text_editor.mark_set("insert", "1.0")
+            self.text_editor.see("1.0")
+        self.sync_document()
+        
+        if error:
+            self.title("AI Text Editor - Gemini")
+            self.statusbar.set_save_status("")
+            self.start_journal(None)
+            self.update_tabs()
+            messagebox.showerror("Ошибка", f"Не удалось открыть файл: {error}")
+            return
+        
+        if cancelled:
+            self.is_modified = True
+            self.title(f"AI Text Editor - {os.path.basename(filepath)} (загружен частично)")
+            self.statusbar.set_save_status("⚠ Загрузка отменена")
+            self.start_journal(None)
+            self.update_tabs()
+            return
+        
+        self.current_file = filepath
+        self.is_modified = False
+        self.start_journal(filepath)
+        self.title(f"AI Text Editor - {os.path.basename(filepath)}")
+        self.statusbar.set_save_status("✓ Файл загружен")
+        self.add_recent_file(filepath)
+        self.update_tabs()
     
     def save_file(self):
+        if self.is_loading():
+            self.statusbar.set_save_status("⏳ Дождитесь окончания загрузки")
+            return
+        if self.viewer:
+            self.statusbar.set_save_status("👁 Режим просмотра: сохранение недоступно")
+            return
         if self.current_file:
             self.save_to_file(self.current_file)
         else:
             self.save_file_as()
     
     def save_file_as(self):
+        if self.viewer:
+            self.statusbar.set_save_status("👁 Режим просмотра: сохранение недоступно")
+            return
         filepath = filedialog.asksaveasfilename(
             defaultextension=".txt",
             filetypes=[
@@ -543,85 +1222,383 @@ class TextEditor(ctk.CTk):
             self.save_to_file(filepath)
             self.current_file = filepath
             self.title(f"AI Text Editor - {os.path.basename(filepath)}")
+            self.update_tabs()
     
     def save_to_file(self, filepath: str):
-        try:
-            content = self.text_editor.get("1.0", "end-1c")
-            ext = FileOperations.get_file_extension(filepath)
-            
-            if ext == '.docx':
-                FileOperations.save_docx(filepath, content)
-            else:
-                FileOperations.save_txt(filepath, content)
-            
-            self.is_modified = False
+        content = self.document.snapshot()
+        styles = None
+        if self.styles.is_active and FileOperations.get_file_extension(filepath) == '.docx':
+            styles = self.styles.snapshot()
+        generation = self.edit_generation
+        journal_mark = self.journal.mark() if self.journal else None
+        self.statusbar.set_save_status("💾 Сохранение...")
+        self.save_worker.submit(
+            filepath,
+            content,
+            lambda error: self.after(0, self.on_file_saved, filepath, generation, journal_mark, error),
+            styles=styles
+        )
+    
+    def on_file_saved(self, filepath: str, generation: int, journal_mark: Optional[int], error: Optional[str]):
+        if error:
+            self.statusbar.set_save_status("⚠ Ошибка сохранения")
+            messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {error}")
+            return
+        
+        if filepath == self.current_file:
+            if generation == self.edit_generation:
+                self.is_modified = False
+                self.update_tabs()
+            if self.journal and journal_mark is not None:
+                try:
+                    self.journal.compact(journal_mark, filepath)
+                except OSError as e:
+                    logger.error(f"Failed to compact edit journal: {e}")
+        if not self.save_worker.is_busy():
             self.statusbar.set_save_status("✓ Сохранено")
-            self.after(2000, lambda: self.statusbar.set_save_status(""))
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось сохранить файл: {e}")
+            self.clear_save_status_later(2.0)
     
     def export_pdf(self):
+        if self.pdf_export:
+            messagebox.showinfo("Экспорт", "Экспорт в PDF уже выполняется")
+            return
+        
         filepath = filedialog.asksaveasfilename(
             defaultextension=".pdf",
             filetypes=[("PDF Files", "*.pdf")]
         )
         
         if filepath:
-            try:
-                content = self.text_editor.get("1.0", "end-1c")
-                FileOperations.export_pdf(filepath, content)
-                messagebox.showinfo("Успех", "PDF экспортирован успешно")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось экспортировать PDF: {e}")
+            from parallel_pdf import PdfExportJob
+            
+            content = self.document.snapshot()
+            formatting = {'pdf_font': self.config.get('EDITOR', 'pdf_font', fallback='') or None}
+            job = PdfExportJob(filepath, content, formatting, jobs=self.get_export_jobs())
+            self.pdf_export = job
+            self.show_progress("📤 Экспорт в PDF...", job.cancel)
+            
+            def run():
+                completed = False
+                error = None
+                try:
+                    completed = job.run(
+                        lambda fraction, status: self.after(0, self.on_pdf_export_progress, job, fraction, status)
+                    )
+                except Exception as e:
+                    logger.error(f"Error exporting PDF: {e}")
+                    error = str(e)
+                self.after(0, self.on_pdf_exported, job, completed, error)
+            
+            threading.Thread(target=run, daemon=True).start()
     
-    def on_text_change(self, event=None):
+    def get_export_jobs(self) -> int:
+        try:
+            return int(self.config.get('ADVANCED', 'export_jobs', fallback='0'))
+        except (ValueError, TypeError):
+            return 0
+    
+    def on_pdf_export_progress(self, job: 'PdfExportJob', fraction: float, status: str):
+        if self.pdf_export is job and self.progress_dialog:
+            self.progress_dialog.set_progress(fraction, status)
+    
+    def on_pdf_exported(self, job: 'PdfExportJob', completed: bool, error: Optional[str]):
+        if self.pdf_export is not job:
+            return
+        self.pdf_export = None
+        self.hide_progress()
+        if error:
+            messagebox.showerror("Ошибка", f"Не удалось экспортировать PDF: {error}")
+        elif completed:
+            messagebox.showinfo("Успех", f"PDF экспортирован успешно ({job.page_count} стр.)")
+        else:
+            self.statusbar.set_save_status("Экспорт в PDF отменен")
+    
+    def on_edit(self, edit: TextEdit):
+        if self.is_loading() and isinstance(self.loader, SessionRestorer):
+            self.loader.record(edit)
+            return
+        if self.is_loading() or self.viewer:
+            return
+        if self.virtual:
+            if self.virtual.is_swapping:
+                return
+            edit = self.virtual.translate(edit)
+        self.apply_to_document(edit)
+    
+    def apply_to_document(self, edit: TextEdit):
+        # edit is in document coordinates and already made in the widget,
+        # or, in virtual mode, outside the window.
         self.is_modified = True
-        content = self.text_editor.get("1.0", "end-1c")
-        self.statusbar.update_counts(content)
+        self.edit_generation += 1
+        self.document.apply(edit)
+        self.word_counter.apply(edit)
+        self.outline.apply(edit)
+        if self.styles.is_active:
+            offset = self.document.offset(edit.start)
+            if edit.kind == 'insert':
+                self.styles.insert(offset, len(edit.text))
+            else:
+                self.styles.delete(offset, len(edit.text))
+        if self.journal:
+            self.journal.record(edit)
+        self.history.record(edit)
+        if self.spell_checker:
+            self.spell_lines.apply(edit)
+            self.scheduler.schedule('spell', self.check_spelling, delay=1.0)
+        self.scheduler.schedule('counts', self.on_text_change)
+        if self.outline_panel.is_visible and self.outline_shown != (self.outline, self.outline.version):
+            self.scheduler.schedule('outline', self.refresh_outline, delay=0.3)
+    
+    def on_text_change(self, event=None):
+        self.statusbar.set_counts(self.word_counter.words, self.word_counter.chars)
+        if self.tabs.active.is_modified != self.is_modified:
+            self.update_tabs()
+    
+    def sync_document(self, text: Optional[str] = None):
+        # Edits made while loading or viewing are not tracked, so the model
+        # is rebuilt from the widget (or from text, when the caller knows
+        # better) once they are over. In virtual mode the model holds the
+        # document and the widget only a window of it.
+        self.history.clear()
+        self.styles.clear()
+        if not self.virtual:
+            if text is None:
+                text = self.text_editor.get("1.0", "end-1c")
+            self.document.reset(text)
+            self.word_counter.reset(text)
+            self.outline.reset(text)
+        self.statusbar.set_counts(self.word_counter.words, self.word_counter.chars)
+        self.scheduler.schedule('outline', self.refresh_outline)
+        if self.spell_checker:
+            self.spell_lines.reset(self.document.line_count)
+            self.scheduler.schedule('spell', self.check_spelling, delay=1.0)
+    
+    def create_spell_checker(self) -> Optional[SpellChecker]:
+        if not self.config.getboolean('SPELL_CHECK', 'enabled', fallback=False):
+            return None
+        return SpellChecker(self.config.get('SPELL_CHECK', 'language', fallback='en-US'))
+    
+    def check_spelling(self):
+        # Run by the scheduler a line per step: changed lines whose results
+        # are cached are retagged, up to 50 others go to the checker, and
+        # its answer starts the next pass. Visible lines come first.
+        if not self.spell_checker or self.virtual or self.viewer or self.is_loading():
+            return
+        version = self.document.version
+        widget = self.text_editor._textbox
+        top = int(str(widget.index("@0,0")).split('.')[0])
+        missing = []
+        for line in self.spell_lines.iter_from(top):
+            if self.document.version != version:
+                # An edit came in between steps and has scheduled a new pass.
+                return
+            text = self.document.line(line)
+            issues = self.spell_checker.cached(text)
+            if issues is None:
+                missing.append(text)
+                if len(missing) >= 50:
+                    break
+                continue
+            widget.tag_remove(SPELLING_TAG, f"{line}.0", f"{line}.end")
+            widget.tag_remove(GRAMMAR_TAG, f"{line}.0", f"{line}.end")
+            for issue in issues:
+                widget.tag_add(SPELLING_TAG if issue.is_spelling else GRAMMAR_TAG,
+                               f"{line}.{issue.start}", f"{line}.{issue.end}")
+            self.spell_lines.mark_clean(line)
+            yield
+        if missing:
+            self.spell_checker.submit(missing, lambda error: self.after(0, self.on_spelling_checked, error))
+    
+    def on_spelling_checked(self, error: Optional[str]):
+        if not self.spell_checker:
+            return
+        if error:
+            self.spell_checker.close()
+            self.spell_checker = None
+            self.statusbar.set_save_status("⚠ Проверка орфографии недоступна")
+            self.clear_save_status_later(3.0)
+            return
+        self.scheduler.schedule('spell', self.check_spelling)
     
     def undo(self):
-        try:
-            self.text_editor.edit_undo()
-        except:
-            pass
+        if self.is_loading() or self.viewer:
+            return
+        step = self.history.undo(self.apply_history_edit)
+        if step is not None:
+            first = step.edits[0]
+            self.show_history_position(first.end if first.kind == 'delete' else first.start)
     
     def redo(self):
-        try:
-            self.text_editor.edit_redo()
-        except:
-            pass
+        if self.is_loading() or self.viewer:
+            return
+        step = self.history.redo(self.apply_history_edit)
+        if step is not None:
+            last = step.edits[-1]
+            self.show_history_position(last.end if last.kind == 'insert' else last.start)
+    
+    def apply_history_edit(self, edit: TextEdit):
+        end = edit.end if edit.kind == 'delete' else edit.start
+        if self.virtual:
+            self.virtual.reveal(*edit.start)
+            if not self.virtual.contains(*end):
+                # The range reaches past the window: the model is changed
+                # directly and the window rebuilt from it.
+                self.apply_to_document(edit)
+                self.virtual.show(edit.start[0], *edit.start)
+                return
+            to_widget = self.virtual.to_widget
+        else:
+            to_widget = "{}.{}".format
+        if edit.kind == 'insert':
+            self.text_editor.insert(to_widget(*edit.start), edit.text)
+        else:
+            self.text_editor.delete(to_widget(*edit.start), to_widget(*edit.end))
+    
+    def show_history_position(self, position):
+        if self.virtual:
+            self.virtual.goto(*position)
+            return
+        index = "{}.{}".format(*position)
+        self.text_editor.mark_set("insert", index)
+        self.text_editor.see(index)
     
     def find_replace(self):
-        dialog = ctk.CTkToplevel(self)
-        dialog.title("Найти и заменить")
-        dialog.geometry("400x200")
-        dialog.transient(self)
-        
-        ctk.CTkLabel(dialog, text="Найти:").pack(padx=10, pady=(10, 0))
-        find_entry = ctk.CTkEntry(dialog, width=350)
-        find_entry.pack(padx=10, pady=5)
-        
-        ctk.CTkLabel(dialog, text="Заменить на:").pack(padx=10, pady=(10, 0))
-        replace_entry = ctk.CTkEntry(dialog, width=350)
-        replace_entry.pack(padx=10, pady=5)
-        
-        def do_replace():
-            find_text = find_entry.get()
-            replace_text = replace_entry.get()
-            content = self.text_editor.get("1.0", "end-1c")
-            new_content = content.replace(find_text, replace_text)
-            self.text_editor.delete("1.0", "end")
-            self.text_editor.insert("1.0", new_content)
-            dialog.destroy()
-        
-        ctk.CTkButton(dialog, text="Заменить все", command=do_replace).pack(pady=10)
+        if self.find_dialog and self.find_dialog.winfo_exists():
+            self.find_dialog.focus()
+            return
+        self.find_dialog = FindReplaceDialog(
+            self,
+            on_find=lambda backwards: self.find_next(backwards),
+            on_replace=self.replace_current,
+            on_replace_all=self.replace_all,
+            on_change=self.on_search_changed,
+            on_close=self.close_search
+        )
+        selection = self.text_editor.tag_ranges("sel")
+        if selection:
+            self.find_dialog.find_entry.insert(0, self.text_editor.get(selection[0], selection[1]).split('\n')[0])
+            self.on_search_changed()
+    
+    def get_search_pattern(self):
+        if self.is_loading() or self.viewer:
+            self.find_dialog.set_status("Поиск недоступен во время загрузки и в режиме просмотра")
+            return None
+        query = self.find_dialog.get_query()
+        if not query:
+            self.find_dialog.set_status("")
+            return None
+        try:
+            return build_pattern(query, **self.find_dialog.get_options())
+        except re.error as e:
+            self.find_dialog.set_status(f"Ошибка в выражении: {e}")
+            return None
+    
+    def get_replacement(self, match) -> Optional[str]:
+        replacement = self.find_dialog.get_replacement()
+        if not self.find_dialog.get_options()['regex']:
+            return replacement
+        try:
+            return match.expand(replacement)
+        except (re.error, IndexError) as e:
+            self.find_dialog.set_status(f"Ошибка в замене: {e}")
+            return None
+    
+    def on_search_changed(self):
+        pattern = self.get_search_pattern()
+        if pattern is None or self.virtual:
+            self.scheduler.cancel('search_highlight')
+            self.text_search.clear_highlight()
+            return
+        self.scheduler.schedule(
+            'search_highlight',
+            lambda: self.text_search.highlight_all(pattern, self.on_search_highlighted),
+            delay=0.15
+        )
+    
+    def on_search_highlighted(self, count: int):
+        if self.find_dialog:
+            self.find_dialog.set_status(f"Найдено: {count}" if count else "Не найдено")
+    
+    def find_next(self, backwards: bool = False) -> bool:
+        if not self.find_dialog or not self.find_dialog.winfo_exists():
+            self.find_replace()
+            return False
+        pattern = self.get_search_pattern()
+        if pattern is None:
+            return False
+        if self.virtual:
+            found = self.find_in_document(pattern, backwards)
+        else:
+            found = self.text_search.find(pattern, "insert", backwards)
+        if found is None:
+            self.text_search.clear_current()
+            self.find_dialog.set_status("Не найдено")
+            return False
+        start, end = found
+        self.text_search.set_current(start, end)
+        self.text_editor.mark_set("insert", start if backwards else end)
+        self.text_editor.see(start)
+        return True
+    
+    def find_in_document(self, pattern, backwards: bool) -> Optional[Tuple[str, str]]:
+        # Searches the whole model rather than the window and brings the
+        # match into the window; returns its widget indices.
+        line, col = self.virtual.to_document("insert")
+        found = BlockSearch(DocumentText(self.document)).find(pattern, f"{line}.{col}", backwards)
+        if found is None:
+            return None
+        (start_line, start_col), (end_line, end_col) = (
+            (int(part) for part in index.split('.')) for index in found)
+        start = self.virtual.reveal(start_line, start_col)
+        return start, self.virtual.to_widget(end_line, end_col)
+    
+    def replace_current(self):
+        pattern = self.get_search_pattern()
+        if pattern is None:
+            return
+        current = self.text_search.current_match(pattern)
+        if current is None:
+            self.find_next()
+            return
+        start, end, match = current
+        replacement = self.get_replacement(match)
+        if replacement is None:
+            return
+        with self.history.group():
+            self.text_search.replace_range(start, end, replacement)
+        self.text_editor.mark_set("insert", f"{start}+{len(replacement)}c")
+        self.find_next()
+        self.on_search_changed()
+    
+    def replace_all(self):
+        pattern = self.get_search_pattern()
+        if pattern is None:
+            return
+        if self.virtual:
+            self.find_dialog.set_status("Заменить все недоступно для больших файлов")
+            return
+        replacement = self.find_dialog.get_replacement()
+        regex = self.find_dialog.get_options()['regex']
+        self.scheduler.cancel('search_highlight')
+        try:
+            with self.history.group():
+                count = self.text_search.replace_all(pattern, replacement, expand=regex)
+        except (re.error, IndexError) as e:
+            self.find_dialog.set_status(f"Ошибка в замене: {e}")
+            return
+        self.find_dialog.set_status(f"Заменено: {count}" if count else "Не найдено")
+    
+    def close_search(self):
+        self.scheduler.cancel('search_highlight')
+        self.text_search.clear_highlight()
+        self.find_dialog = None
     
     def show_statistics(self):
-        content = self.text_editor.get("1.0", "end-1c")
-        words = len(content.split())
-        chars = len(content)
-        chars_no_spaces = len(content.replace(" ", "").replace("\n", ""))
-        lines = content.count("\n") + 1
+        snapshot = self.document.snapshot()
+        words = self.word_counter.words
+        chars = snapshot.char_count
+        chars_no_spaces = sum(len(line.replace(" ", "")) for line in snapshot.lines())
+        lines = snapshot.line_count
         reading_time = max(1, words // 200)
         
         stats = f"""
@@ -636,16 +1613,48 @@ class TextEditor(ctk.CTk):
         
         messagebox.showinfo("Статистика", stats)
     
+    def get_base_font(self):
+        family = tkfont.Font(font=self.text_editor._textbox.cget("font")).actual('family')
+        return family, int(self.base_font_size * self.zoom_level), self.zoom_level
+    
+    def apply_style(self, attribute: str, value=None, toggle: bool = False, paragraph: bool = False):
+        # Styles the selection (or, for paragraph attributes, the whole
+        # paragraphs it touches) in the span store and retags the widget.
+        # Style changes are not undo steps and are not written to the edit
+        # journal; they reach the disk with the next save.
+        if self.is_loading() or self.viewer or self.virtual:
+            self.statusbar.set_save_status("Форматирование недоступно в этом режиме")
+            self.clear_save_status_later(2.0)
+            return
+        selection = self.text_editor.tag_ranges("sel")
+        if not selection:
+            self.statusbar.set_save_status("Выделите текст для форматирования")
+            self.clear_save_status_later(2.0)
+            return
+        first, last = str(selection[0]), str(selection[1])
+        if paragraph:
+            first = self.text_editor.index(f"{first} linestart")
+            last = self.text_editor.index(f"{last} lineend +1c")
+            if self.text_editor.compare(last, ">", "end-1c"):
+                last = self.text_editor.index("end-1c")
+        start, end = (self.document.offset(tuple(int(part) for part in index.split('.'))) for index in (first, last))
+        self.styles.activate(self.document.char_count)
+        if toggle:
+            value = not all(style_get(style, attribute) for _, _, style in self.styles.runs(start, end))
+        changes = self.styles.apply(start, end, lambda style: style_with(style, attribute, value))
+        self.style_tags.retag(first, start, changes)
+        if changes:
+            self.is_modified = True
+            self.edit_generation += 1
+    
     def change_font(self, font_name: str):
-        try:
-            if self.text_editor.tag_ranges("sel"):
-                current_font = self.text_editor.cget("font")
-                size = 12
-                self.text_editor.configure(font=(font_name, size))
-        except:
-            pass
+        self.apply_style('font', font_name)
     
     def change_size(self, size: str):
+        if self.text_editor.tag_ranges("sel"):
+            if size.isdigit():
+                self.apply_style('size', int(size))
+            return
         try:
             font_size = int(size)
             current_font = self.text_editor.cget("font")
@@ -658,30 +1667,37 @@ class TextEditor(ctk.CTk):
             pass
     
     def toggle_bold(self):
-        pass
+        self.apply_style('bold', toggle=True)
     
     def toggle_italic(self):
-        pass
+        self.apply_style('italic', toggle=True)
     
     def toggle_underline(self):
-        pass
+        self.apply_style('underline', toggle=True)
     
     def toggle_strikethrough(self):
-        pass
+        self.apply_style('strike', toggle=True)
     
     def change_alignment(self, align: str):
-        pass
+        self.apply_style('align', None if align == 'left' else align, paragraph=True)
     
     def change_color(self):
+        if not self.text_editor.tag_ranges("sel"):
+            self.apply_style('color')
+            return
         color = colorchooser.askcolor(title="Выберите цвет текста")
         if color[1]:
-            try:
-                self.text_editor.configure(fg_color=color[1])
-            except:
-                pass
+            self.apply_style('color', color[1])
     
     def adjust_spacing(self):
-        pass
+        # Cycles the line spacing of the selected paragraphs: 1 → 1.5 → 2.
+        current = 1.0
+        selection = self.text_editor.tag_ranges("sel")
+        if selection and self.styles.is_active and not self.virtual:
+            line = int(str(self.text_editor.index(selection[0])).split('.')[0])
+            current = style_get(self.styles.style_at(self.document.offset((line, 0))), 'spacing', 1.0)
+        spacing = {1.0: 1.5, 1.5: 2.0}.get(current)
+        self.apply_style('spacing', spacing, paragraph=True)
     
     def change_case(self):
         try:
@@ -701,7 +1717,52 @@ class TextEditor(ctk.CTk):
             self.ai_toggle_btn.configure(text="◀")
         self.ai_panel.is_visible = not self.ai_panel.is_visible
     
+    def toggle_outline_panel(self):
+        self.set_outline_visibility(not self.outline_panel.is_visible)
+    
+    def set_outline_visibility(self, visible: bool):
+        if visible:
+            self.outline_panel.grid()
+            self.outline_shown = None
+            self.refresh_outline()
+        else:
+            self.outline_panel.grid_remove()
+        self.outline_panel.is_visible = visible
+    
+    def refresh_outline(self):
+        # Titles are read only for the heading lines the index points at.
+        if not self.outline_panel.is_visible or self.is_loading():
+            return
+        if self.viewer:
+            self.outline_shown = None
+            self.outline_panel.set_headings([])
+            return
+        shown = (self.outline, self.outline.version)
+        if shown == self.outline_shown:
+            return
+        self.outline_shown = shown
+        self.outline_panel.set_headings([
+            (line, level, heading_title(self.document.line(line)))
+            for line, level in self.outline.headings()
+        ])
+    
+    def jump_to_line(self, line: int):
+        if self.viewer or self.is_loading():
+            return
+        line = min(line, self.document.line_count)
+        if self.virtual:
+            self.virtual.goto(line, 0)
+        else:
+            index = f"{line}.0"
+            self.text_editor.mark_set("insert", index)
+            self.text_editor.yview(index)
+        self.text_editor.focus_set()
+    
     def handle_ai_action(self, action: str, data):
+        if self.ai_still_loading():
+            # Sent from the AI panel: carried out as soon as the SDK is in.
+            self.after(200, self.handle_ai_action, action, data)
+            return
         if not self.ai_assistant.is_ready():
             self.ai_panel.add_message("AI не настроен. Добавьте API ключ в config.ini", "system")
             return
@@ -713,6 +1774,8 @@ class TextEditor(ctk.CTk):
             self.ai_action(action)
     
     def ai_action(self, action: str):
+        if self.ai_still_loading():
+            return
         if not self.ai_assistant.is_ready():
             messagebox.showwarning(
                 "AI не настроен",
@@ -726,7 +1789,7 @@ class TextEditor(ctk.CTk):
             if action in ["improve", "rewrite", "grammar", "shorten", "expand"]:
                 messagebox.showinfo("Выделите текст", "Пожалуйста, выделите текст для обработки")
                 return
-            selected_text = self.text_editor.get("1.0", "end-1c")
+            selected_text = self.document.get_text()
         
         if not selected_text.strip():
             messagebox.showinfo("Пустой текст", "Нет текста для обработки")
@@ -797,13 +1860,15 @@ class TextEditor(ctk.CTk):
             messagebox.showerror("AI Ошибка", error)
             self.ai_panel.add_message(f"Ошибка: {error}", "system")
         else:
-            try:
-                start_idx = self.text_editor.index("sel.first")
-                end_idx = self.text_editor.index("sel.last")
-                self.text_editor.delete(start_idx, end_idx)
-                self.text_editor.insert(start_idx, response)
-            except:
-                self.text_editor.insert("end", "\n\n" + response)
+            # The AI result replaces the selection as one undo step.
+            with self.history.group():
+                try:
+                    start_idx = self.text_editor.index("sel.first")
+                    end_idx = self.text_editor.index("sel.last")
+                    self.text_editor.delete(start_idx, end_idx)
+                    self.text_editor.insert(start_idx, response)
+                except:
+                    self.text_editor.insert("end", "\n\n" + response)
             
             self.ai_panel.add_message("Текст обработан успешно", "ai")
     
@@ -814,23 +1879,300 @@ class TextEditor(ctk.CTk):
         if error:
             messagebox.showerror("AI Ошибка", error)
         else:
-            self.text_editor.delete("1.0", "end")
-            self.text_editor.insert("1.0", response)
+            self.close_virtual()
+            with self.history.group():
+                self.text_editor.delete("1.0", "end")
+                self.text_editor.insert("1.0", response)
             self.ai_panel.add_message("Документ создан", "ai")
     
     def start_autosave(self):
-        interval = int(self.config.get('EDITOR', 'autosave_interval', fallback='60'))
+        try:
+            interval = int(self.config.get('EDITOR', 'autosave_interval', fallback='60'))
+        except (ValueError, TypeError):
+            interval = 60
+        try:
+            compact_size = int(self.config.get('EDITOR', 'journal_compact_size', fallback='256')) * 1024
+        except (ValueError, TypeError):
+            compact_size = 256 * 1024
         
-        def autosave():
-            if self.is_modified and self.current_file:
+        def flush_journal():
+            if self.journal:
                 try:
+                    self.journal.flush()
+                except OSError as e:
+                    logger.error(f"Failed to write edit journal: {e}")
+        
+        def autosave():
+            if self.is_modified and self.current_file and not self.save_worker.is_busy():
+                if self.journal is None or self.journal.size >= compact_size:
                     self.save_to_file(self.current_file)
-                    logger.info("Autosaved")
-                except:
+                    logger.info("Autosave queued")
+        
+        self.scheduler.repeat('journal', flush_journal, 1.0)
+        if interval > 0:
+            self.scheduler.repeat('autosave', autosave, interval)
+    
+    def get_frame_budget(self) -> float:
+        try:
+            return float(self.config.get('ADVANCED', 'frame_budget', fallback='16')) / 1000
+        except (ValueError, TypeError):
+            return FRAME_BUDGET
+    
+    def get_undo_memory(self) -> int:
+        try:
+            size_mb = float(self.config.get('EDITOR', 'undo_memory', fallback='16'))
+        except (ValueError, TypeError):
+            size_mb = 16.0
+        return int(size_mb * 1024 * 1024)
+    
+    def clear_save_status_later(self, delay: float):
+        self.scheduler.schedule('save_status', lambda: self.statusbar.set_save_status(""), delay=delay)
+    
+    def start_journal(self, filepath: Optional[str]):
+        self.stop_journal()
+        journal = EditJournal(self.journal_dir, filepath)
+        try:
+            journal.start()
+            self.journal = journal
+        except OSError as e:
+            logger.error(f"Failed to start edit journal: {e}")
+    
+    def stop_journal(self):
+        if self.journal:
+            self.journal.discard()
+            self.journal = None
+    
+    def recover_journals(self):
+        owned = {os.path.abspath(tab.journal.path) for tab in self.tabs.tabs if tab.journal}
+        if self.journal:
+            owned.add(os.path.abspath(self.journal.path))
+        for path in EditJournal.find_journals(self.journal_dir):
+            if os.path.abspath(path) in owned:
+                continue
+            try:
+                header, _ = EditJournal.read(path)
+                if EditJournal.is_owned_by_running_process(header):
+                    continue
+                recovered = EditJournal.recover(path)
+            except Exception as e:
+                logger.error(f"Failed to read edit journal {path}: {e}")
+                continue
+            
+            if recovered is None:
+                try:
+                    os.remove(path)
+                except OSError:
                     pass
-            self.autosave_timer = self.after(interval * 1000, autosave)
+                continue
+            
+            filepath, content, edits = recovered
+            name = os.path.basename(filepath) if filepath else "Без названия"
+            if messagebox.askyesno(
+                "Восстановление",
+                f"Найдены несохраненные изменения документа «{name}» ({len(edits)} правок).\n"
+                f"Восстановить их?"
+            ):
+                # Each recovered document gets a tab of its own.
+                if not self.is_blank_tab() and not self.add_tab(DocumentTab()):
+                    continue
+                self.stop_journal()
+                self.close_virtual()
+                self.text_editor.delete("1.0", "end")
+                self.text_editor.insert("1.0", content)
+                self.history.clear()
+                self.current_file = filepath
+                self.is_modified = True
+                self.title(f"AI Text Editor - {name} (восстановлен)")
+                self.statusbar.set_save_status("♻ Изменения восстановлены")
+                try:
+                    self.journal = EditJournal.resume(self.journal_dir, path, filepath, edits)
+                except OSError as e:
+                    logger.error(f"Failed to resume edit journal: {e}")
+                self.update_tabs()
+                continue
+            
+            try:
+                os.remove(path)
+            except OSError:
+                pass
         
-        self.autosave_timer = self.after(interval * 1000, autosave)
+        if self.journal is None:
+            self.start_journal(self.current_file)
+    
+    def is_session_restore_enabled(self) -> bool:
+        return self.config.getboolean('EDITOR', 'restore_session', fallback=True)
+    
+    def restore_session(self):
+        session = self.session_store.load() if self.is_session_restore_enabled() else None
+        if session is None:
+            self.session_store.clear()
+            self.recover_journals()
+            return
+        
+        self.zoom_level = session.meta.get('zoom', 1.0)
+        self.text_editor.configure(font=ctk.CTkFont(size=int(self.base_font_size * self.zoom_level)))
+        if 'ai_panel' in session.meta:
+            self.set_ai_panel_visibility(session.meta['ai_panel'])
+        if session.meta.get('outline'):
+            self.set_outline_visibility(True)
+        for message, sender in session.meta.get('chat', []):
+            self.ai_panel.add_message(message, sender)
+        self.restore_tabs(session.meta)
+        
+        viewer_path = session.meta.get('viewer')
+        if viewer_path or (session.filepath and not session.is_modified and session.is_stale()):
+            # Nothing to restore from the snapshot itself: the viewer reads
+            # the file directly, and an unmodified file changed on disk is
+            # simply opened again.
+            self.session_store.clear()
+            self.recover_journals()
+            filepath = viewer_path or session.filepath
+            if self.current_file is None and not self.is_modified and os.path.exists(filepath):
+                if viewer_path:
+                    self.open_viewer(filepath)
+                else:
+                    self.load_document(filepath)
+            return
+        
+        name = os.path.basename(session.filepath) if session.filepath else "Без названия"
+        self.title(f"AI Text Editor - {name} (восстановление...)")
+        self.statusbar.show_progress(0.0, self.cancel_loading)
+        if session.meta.get('virtual'):
+            line, col = (int(part) for part in session.meta['cursor'].split('.'))
+            self.open_virtual(
+                [(session.text, len(session.text))],
+                len(session.text),
+                lambda error, cancelled: self.on_session_restored(session, error, cancelled),
+                position=(line, col)
+            )
+        else:
+            restorer = SessionRestorer(
+                self.text_editor,
+                session,
+                on_progress=lambda fraction: self.statusbar.show_progress(fraction),
+                on_complete=lambda error, cancelled: self.on_session_restored(session, error, cancelled,
+                                                                              restorer.edits)
+            )
+            self.loader = restorer
+            restorer.start()
+        self.session_loader = self.loader
+    
+    def restore_tabs(self, meta: dict):
+        # The other tabs of the last session come back pending: only their
+        # paths are known until each is first shown.
+        active = meta.get('tab', 0)
+        for position, entry in enumerate(meta.get('tabs') or []):
+            if position == active or not entry or not os.path.exists(entry[0]) or self.tabs.find(entry[0]):
+                continue
+            tab = DocumentTab(entry[0], pending=True, viewer=bool(entry[1]))
+            self.tabs.add(tab, self.tabs.index(self.tabs.active) if position < active else None)
+        self.update_tabs()
+    
+    def on_session_restored(self, session: Session, error: Optional[str], cancelled: bool,
+                            edits: Optional[List[TextEdit]] = None):
+        # edits were made by the user while the snapshot was still filling
+        # in; after a complete restore they are replayed on the snapshot so
+        # they reach the journal and the undo history like any other edit.
+        self.loader = None
+        self.statusbar.hide_progress()
+        replay = bool(edits) and not (error or cancelled)
+        self.sync_document(session.text if replay else None)
+        
+        if error or cancelled:
+            # The snapshot stays on disk, so the next start tries again.
+            self.current_file = None
+            self.is_modified = False
+            self.title("AI Text Editor - Gemini (загружен частично)" if cancelled else "AI Text Editor - Gemini")
+            self.statusbar.set_save_status("⚠ Восстановление сеанса прервано")
+            self.start_journal(None)
+            self.update_tabs()
+            return
+        
+        self.session_store.clear()
+        stale = session.is_stale()
+        self.current_file = session.filepath
+        self.is_modified = session.is_modified or stale
+        self.resume_session_journal(session, stale)
+        if replay:
+            for edit in edits:
+                self.apply_to_document(edit)
+        if self.current_file:
+            self.title(f"AI Text Editor - {os.path.basename(self.current_file)}")
+        if stale:
+            self.statusbar.set_save_status("⚠ Файл изменён на диске после закрытия")
+        else:
+            self.statusbar.set_save_status("♻ Сеанс восстановлен")
+        self.update_tabs()
+        self.recover_journals()
+    
+    def resume_session_journal(self, session: Session, stale: bool):
+        path = session.meta.get('journal')
+        pending = None
+        if path and session.is_modified and not stale:
+            try:
+                pending = EditJournal.pending_edits(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read edit journal {path}: {e}")
+        
+        if pending is not None and pending[0] == session.filepath:
+            try:
+                self.journal = EditJournal.resume(self.journal_dir, path, self.current_file, pending[1])
+                return
+            except OSError as e:
+                logger.error(f"Failed to resume edit journal: {e}")
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.start_journal(self.current_file)
+    
+    def save_session(self, viewer_path: Optional[str] = None) -> bool:
+        if not self.is_session_restore_enabled():
+            self.session_store.clear()
+            return False
+        
+        # Unsaved edits stay in the journal, so a crash after the next
+        # start still finds them once the snapshot has been consumed.
+        keep_journal = self.is_modified and self.journal is not None
+        filepath = os.path.abspath(self.current_file) if self.current_file else None
+        if self.virtual:
+            cursor = "{}.{}".format(*self.virtual.to_document("insert"))
+            top = "{}.{}".format(*self.virtual.to_document("@0,0"))
+        else:
+            cursor = self.text_editor.index("insert")
+            top = self.text_editor.index("@0,0")
+        meta = {
+            'path': filepath,
+            'signature': file_signature(filepath),
+            'modified': self.is_modified,
+            'cursor': cursor,
+            'top': top,
+            'virtual': self.virtual is not None,
+            'zoom': self.zoom_level,
+            'ai_panel': self.ai_panel.is_visible,
+            'outline': self.outline_panel.is_visible,
+            'chat': self.ai_panel.messages[-200:],
+            'viewer': viewer_path,
+            'journal': self.journal.path if keep_journal else None
+        }
+        # Tabs with unsaved changes are left out: their journals are kept
+        # and offered for recovery on the next start instead.
+        tabs = []
+        for tab in self.tabs.tabs:
+            if tab is self.tabs.active:
+                meta['tab'] = len(tabs)
+                tabs.append(None)
+            elif tab.filepath and not tab.is_modified:
+                tabs.append([os.path.abspath(tab.filepath), tab.viewer])
+        meta['tabs'] = tabs
+        text = "" if viewer_path else self.document.get_text()
+        try:
+            self.session_store.save(text, meta)
+        except OSError as e:
+            logger.error(f"Failed to save session: {e}")
+            return False
+        return keep_journal
     
     def load_recent_files(self):
         recent_file_path = os.path.join(os.path.dirname(__file__), 'recent_files.json')
@@ -857,23 +2199,7 @@ class TextEditor(ctk.CTk):
     
     def open_recent_file(self, filepath: str):
         if os.path.exists(filepath):
-            try:
-                ext = FileOperations.get_file_extension(filepath)
-                if ext == '.txt':
-                    content = FileOperations.open_txt(filepath)
-                elif ext == '.docx':
-                    content = FileOperations.open_docx(filepath)
-                else:
-                    content = FileOperations.open_txt(filepath)
-                
-                self.text_editor.delete("1.0", "end")
-                self.text_editor.insert("1.0", content)
-                self.current_file = filepath
-                self.is_modified = False
-                self.title(f"AI Text Editor - {os.path.basename(filepath)}")
-                self.statusbar.set_save_status("✓ Файл загружен")
-            except Exception as e:
-                messagebox.showerror("Ошибка", f"Не удалось открыть файл: {e}")
+            self.open_document(filepath)
         else:
             messagebox.showerror("Ошибка", "Файл не найден")
             self.recent_files.remove(filepath)
@@ -886,9 +2212,7 @@ class TextEditor(ctk.CTk):
         )
         if filepath:
             try:
-                content = self.text_editor.get("1.0", "end-1c")
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                FileOperations.export_paragraphs(self.document.snapshot().lines(), [(filepath, 'md')])
                 messagebox.showinfo("Успех", "Markdown файл сохранен")
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось экспортировать: {e}")
@@ -900,22 +2224,7 @@ class TextEditor(ctk.CTk):
         )
         if filepath:
             try:
-                content = self.text_editor.get("1.0", "end-1c")
-                html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Document</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; padding: 20px; line-height: 1.6; }}
-    </style>
-</head>
-<body>
-    <pre>{content}</pre>
-</body>
-</html>"""
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
+                FileOperations.export_paragraphs(self.document.snapshot().lines(), [(filepath, 'html')])
                 messagebox.showinfo("Успех", "HTML файл сохранен")
             except Exception as e:
                 messagebox.showerror("Ошибка", f"Не удалось экспортировать: {e}")
@@ -935,8 +2244,9 @@ class TextEditor(ctk.CTk):
     def apply_zoom(self):
         new_size = int(self.base_font_size * self.zoom_level)
         self.text_editor.configure(font=ctk.CTkFont(size=new_size))
+        self.style_tags.refresh()
         self.statusbar.set_save_status(f"Масштаб: {int(self.zoom_level * 100)}%")
-        self.after(1000, lambda: self.statusbar.set_save_status(""))
+        self.clear_save_status_later(1.0)
     
     def toggle_fullscreen(self):
         self.is_fullscreen = not self.is_fullscreen
@@ -1024,10 +2334,10 @@ class TextEditor(ctk.CTk):
         except:
             messagebox.showinfo("Выделите текст", "Пожалуйста, выделите текст для переписывания")
     
-    def show_progress(self, message: str):
+    def show_progress(self, message: str, cancel_callback=None):
         if self.progress_dialog:
             self.progress_dialog.close()
-        self.progress_dialog = ProgressDialog(self, message)
+        self.progress_dialog = ProgressDialog(self, message, cancel_callback)
     
     def hide_progress(self):
         if self.progress_dialog:
@@ -1045,12 +2355,65 @@ class TextEditor(ctk.CTk):
                 pass
     
     def quit(self):
+        while self.is_loading() and self.loader is self.tab_loader:
+            self.update()
+            time.sleep(0.01)
+        restoring = self.is_loading() and self.loader is self.session_loader
+        viewer_path = self.viewer.document.filepath if self.viewer else None
+        self.cancel_loading()
+        if self.pdf_export:
+            self.pdf_export.cancel()
+        self.close_viewer()
+        
+        save_requested = False
         if self.is_modified:
             if messagebox.askyesno("Сохранить?", "Сохранить изменения перед выходом?"):
                 self.save_file()
-        
-        if self.autosave_timer:
-            self.after_cancel(self.autosave_timer)
+                save_requested = True
+        # A tab counts as saved only once its write has succeeded; until then
+        # it stays modified and its journal is kept.
+        saving = []
+        save_errors = {}
+        for tab in self.tabs.tabs:
+            if tab is not self.tabs.active and tab.is_modified and messagebox.askyesno(
+                "Сохранить?", f"Сохранить изменения в «{tab.name}» перед выходом?"
+            ) and self.save_tab(tab, lambda error, tab=tab: save_errors.__setitem__(tab, error)):
+                saving.append(tab)
+        
+        self.scheduler.stop()
+        if self.spell_checker:
+            self.spell_checker.close()
+        
+        deadline = time.time() + 30
+        while (self.save_worker.is_busy() or len(save_errors) < len(saving)) and time.time() < deadline:
+            self.update()
+            self.save_worker.flush(timeout=0.05)
+        if self.save_worker.is_busy():
+            logger.warning("Pending saves did not finish before exit")
+        for tab in saving:
+            if tab in save_errors and save_errors[tab] is None:
+                tab.is_modified = False
+        keep_journal = self.save_worker.is_busy() or (save_requested and self.is_modified)
+        if not restoring and not self.save_worker.is_busy():
+            keep_journal = self.save_session(viewer_path) or keep_journal
+        if keep_journal:
+            if self.journal:
+                self.journal.close()
+        else:
+            self.stop_journal()
+        for tab in self.tabs.tabs:
+            if tab is self.tabs.active or not tab.journal:
+                continue
+            if tab.is_modified and (tab in saving or self.is_session_restore_enabled()):
+                tab.journal.close()
+            else:
+                tab.journal.discard()
+        self.tabs.close()
+        if self.document_cache:
+            self.document_cache.flush()
+        if self.ai_cache:
+            self.ai_cache.close()
+        self.save_worker.stop()
         
         self.destroy()
 
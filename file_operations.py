@@ -1,16 +1,283 @@
 import os
-from docx import Document
-from docx.shared import Pt, RGBColor, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape as xml_escape
+from html.parser import HTMLParser
+import html
 import logging
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from rich_text import Style, styled_paragraphs
 
 logger = logging.getLogger(__name__)
 
+# python-docx and reportlab are imported where they are used: together they
+# take a large share of the editor's startup time.
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY = WORD_NAMESPACE + 'body'
+_W_P = WORD_NAMESPACE + 'p'
+_W_R = WORD_NAMESPACE + 'r'
+_W_T = WORD_NAMESPACE + 't'
+_W_BR = WORD_NAMESPACE + 'br'
+_W_HYPERLINK = WORD_NAMESPACE + 'hyperlink'
+_W_BR_TYPE = WORD_NAMESPACE + 'type'
+# Same text equivalents python-docx uses for run inner content.
+_RUN_TEXT = {
+    WORD_NAMESPACE + 'tab': '\t',
+    WORD_NAMESPACE + 'ptab': '\t',
+    WORD_NAMESPACE + 'cr': '\n',
+    WORD_NAMESPACE + 'noBreakHyphen': '-',
+}
+
+# Characters XML 1.0 cannot represent; python-docx rejects them outright.
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+_RUN_BREAKS = re.compile('([\t\r\n])')
+DOCX_ALIGNMENT = {'left': 'left', 'center': 'center', 'right': 'right', 'justify': 'both'}
+
+
+class _HTMLTextExtractor(HTMLParser):
+    BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'blockquote'}
+    SKIP_TAGS = {'script', 'style', 'head', 'title'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == 'br':
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.BLOCK_TAGS and self.parts and not self.parts[-1].endswith('\n'):
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        # Whitespace-only runs with a newline are markup indentation.
+        if not self.skip_depth and not (data.isspace() and '\n' in data):
+            self.parts.append(data)
+
+    def get_text(self) -> str:
+        return ''.join(self.parts).strip('\n')
+
+
+class AtomicFile:
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.directory = os.path.dirname(os.path.abspath(filepath))
+        fd, self.tmp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(filepath)}.",
+            suffix=".tmp",
+            dir=self.directory
+        )
+        self.file = os.fdopen(fd, 'wb')
+    
+    def commit(self):
+        try:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            if os.path.exists(self.filepath):
+                os.chmod(self.tmp_path, os.stat(self.filepath).st_mode & 0o7777)
+            else:
+                os.chmod(self.tmp_path, self._default_mode())
+            os.replace(self.tmp_path, self.filepath)
+        except BaseException:
+            self.discard()
+            raise
+        
+        if hasattr(os, 'O_DIRECTORY'):
+            try:
+                dir_fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            except OSError:
+                pass
+    
+    def _default_mode(self) -> int:
+        # The mode a plain open() would give a new file here. Found by
+        # creating one rather than by reading the umask, which can only be
+        # done by changing it for the whole process.
+        probe = self.tmp_path + '.mode'
+        fd = os.open(probe, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            return os.fstat(fd).st_mode & 0o777
+        finally:
+            os.close(fd)
+            os.remove(probe)
+    
+    def discard(self):
+        if not self.file.closed:
+            self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+EXPORTERS: Dict[str, type] = {}
+
+
+def register_exporter(*formats: str):
+    def decorator(cls):
+        for fmt in formats:
+            EXPORTERS[fmt] = cls
+        return cls
+    return decorator
+
+
+class Exporter:
+    """Writes a document paragraph by paragraph into an atomically replaced file"""
+    
+    def __init__(self, filepath: str, formatting: Optional[dict] = None):
+        self.filepath = filepath
+        self.formatting = formatting or {}
+        self.output = None
+    
+    def begin(self):
+        self.output = AtomicFile(self.filepath)
+    
+    def write_paragraph(self, text: str):
+        raise NotImplementedError
+    
+    def finish(self):
+        self.output.commit()
+    
+    def abort(self):
+        if self.output is not None:
+            self.output.discard()
+
+
+@register_exporter('txt', 'md')
+class TextExporter(Exporter):
+    def begin(self):
+        super().begin()
+        self.separator = b''
+    
+    def write_paragraph(self, text: str):
+        self.output.file.write(self.separator + text.replace('\n', os.linesep).encode('utf-8'))
+        self.separator = os.linesep.encode('ascii')
+
+
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; padding: 20px; line-height: 1.6; }}
+        p {{ margin: 0; white-space: pre-wrap; }}
+    </style>
+</head>
+<body>
+"""
+HTML_FOOTER = """</body>
+</html>
+"""
+
+
+@register_exporter('html', 'htm')
+class HtmlExporter(Exporter):
+    def begin(self):
+        super().begin()
+        title = os.path.splitext(os.path.basename(self.filepath))[0] or "Document"
+        self.output.file.write(HTML_HEADER.format(title=html.escape(title)).encode('utf-8'))
+    
+    def write_paragraph(self, text: str):
+        body = html.escape(text, quote=False) if text else '<br>'
+        self.output.file.write(f"<p>{body}</p>\n".encode('utf-8'))
+    
+    def finish(self):
+        self.output.file.write(HTML_FOOTER.encode('utf-8'))
+        super().finish()
+
+
+@register_exporter('docx')
+class DocxExporter(Exporter):
+    def begin(self):
+        self.parts = []
+    
+    def write_paragraph(self, text: str):
+        # Paragraphs from styled_paragraphs carry their style runs.
+        self.parts.append(FileOperations._docx_paragraph_xml(
+            text, getattr(text, 'runs', None), getattr(text, 'paragraph_style', ())))
+    
+    def finish(self):
+        from docx import Document
+        from docx.shared import Pt
+        from docx.oxml import parse_xml
+        from docx.oxml.ns import nsdecls
+        
+        doc = Document()
+        formatting = self.formatting
+        
+        # Formatting lives once in the Normal style instead of on every run.
+        font = doc.styles['Normal'].font
+        if 'font_name' in formatting:
+            font.name = formatting['font_name']
+        if 'font_size' in formatting:
+            font.size = Pt(formatting['font_size'])
+        if 'bold' in formatting:
+            font.bold = formatting['bold']
+        if 'italic' in formatting:
+            font.italic = formatting['italic']
+        if 'underline' in formatting:
+            font.underline = formatting['underline']
+        
+        body_xml = ''.join(self.parts)
+        self.parts = []
+        paragraphs = parse_xml(f'<w:body {nsdecls("w")}>{body_xml}</w:body>')
+        body = doc.element.body
+        position = body.index(body.sectPr) if body.sectPr is not None else len(body)
+        body[position:position] = list(paragraphs)
+        
+        FileOperations.atomic_write(self.filepath, doc.save)
+    
+    def abort(self):
+        self.parts = []
+
+
+@register_exporter('pdf')
+class PdfExporter(Exporter):
+    def begin(self):
+        from reportlab.pdfgen import canvas
+        from pdf_layout import PdfLayout, Paginator, register_font
+        
+        self.layout = PdfLayout(
+            font_name=register_font(self.formatting.get('pdf_font')),
+            font_size=self.formatting.get('font_size', 12)
+        )
+        self.paginator = Paginator(self.layout)
+        super().begin()
+        self.canvas = canvas.Canvas(self.output.file, pagesize=self.layout.pagesize)
+        self.page_count = 0
+    
+    def write_paragraph(self, text: str):
+        for line in text.split('\n'):
+            for page in self.paginator.feed(line):
+                self._render(page)
+    
+    def _render(self, lines: List[str]):
+        if self.page_count:
+            self.canvas.showPage()
+        self.layout.render_page(self.canvas, lines)
+        self.page_count += 1
+    
+    def finish(self):
+        self._render(self.paginator.close())
+        self.canvas.save()
+        super().finish()
+
 
 class FileOperations:
     @staticmethod
@@ -26,113 +293,355 @@ class FileOperations:
             logger.error(f"Error opening TXT file: {e}")
             raise
     
+    @staticmethod
+    def iter_txt_chunks(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                while True:
+                    text = f.read(chunk_size)
+                    if not text:
+                        break
+                    yield text, f.buffer.tell()
+        except Exception as e:
+            logger.error(f"Error reading TXT file: {e}")
+            raise
+    
+    @staticmethod
+    def iter_docx_chunks(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        total = os.path.getsize(filepath)
+        buffer = []
+        buffered = 0
+        separator = ""
+        fraction = 0.0
+        for text, fraction in FileOperations._iter_docx_paragraphs_with_progress(filepath):
+            buffer.append(text)
+            buffered += len(text) + 1
+            if buffered >= chunk_size:
+                yield separator + '\n'.join(buffer), int(total * fraction)
+                separator = "\n"
+                buffer = []
+                buffered = 0
+        if buffer:
+            yield separator + '\n'.join(buffer), total
+    
     @staticmethod
     def open_docx(filepath: str) -> str:
         try:
-            doc = Document(filepath)
-            text_content = []
-            for para in doc.paragraphs:
-                text_content.append(para.text)
-            return '\n'.join(text_content)
+            return '\n'.join(FileOperations.iter_docx_paragraphs(filepath))
         except Exception as e:
             logger.error(f"Error opening DOCX file: {e}")
             raise
     
     @staticmethod
-    def save_txt(filepath: str, content: str):
+    def open_html(filepath: str) -> str:
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            logger.info(f"File saved: {filepath}")
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                parser = _HTMLTextExtractor()
+                parser.feed(f.read())
+                parser.close()
+            return parser.get_text()
         except Exception as e:
-            logger.error(f"Error saving TXT file: {e}")
+            logger.error(f"Error opening HTML file: {e}")
             raise
     
     @staticmethod
-    def save_docx(filepath: str, content: str, formatting: dict = None):
+    def open_pdf(filepath: str) -> str:
         try:
-            doc = Document()
-            
-            if formatting is None:
-                formatting = {}
+            from pypdf import PdfReader
+            reader = PdfReader(filepath)
+            return '\n'.join(page.extract_text() or '' for page in reader.pages)
+        except Exception as e:
+            logger.error(f"Error opening PDF file: {e}")
+            raise
+    
+    @staticmethod
+    def iter_docx_paragraphs(filepath: str):
+        for text, _ in FileOperations._iter_docx_paragraphs_with_progress(filepath):
+            yield text
+    
+    @staticmethod
+    def iter_docx_paragraphs_dom(filepath: str):
+        from docx import Document
+        doc = Document(filepath)
+        for para in doc.paragraphs:
+            yield para.text
+    
+    @staticmethod
+    def _iter_docx_paragraphs_with_progress(filepath: str):
+        yielded = 0
+        try:
+            for item in FileOperations._stream_docx_paragraphs(filepath):
+                yield item
+                yielded += 1
+        except (KeyError, ValueError, zipfile.BadZipFile, ET.ParseError) as e:
+            logger.warning(f"Streaming DOCX reader failed ({e}), falling back to python-docx")
+            for index, text in enumerate(FileOperations.iter_docx_paragraphs_dom(filepath)):
+                if index >= yielded:
+                    yield text, 1.0
+    
+    @staticmethod
+    def _docx_main_part(archive: zipfile.ZipFile) -> str:
+        try:
+            relationships = ET.fromstring(archive.read('_rels/.rels'))
+            for relationship in relationships:
+                if relationship.get('Type', '').endswith('/officeDocument'):
+                    return relationship.get('Target', '').lstrip('/')
+        except (KeyError, ET.ParseError):
+            pass
+        return 'word/document.xml'
+    
+    @staticmethod
+    def _stream_docx_paragraphs(filepath: str, block_size: int = DEFAULT_CHUNK_SIZE):
+        with zipfile.ZipFile(filepath) as archive:
+            info = archive.getinfo(FileOperations._docx_main_part(archive))
+            total = max(1, info.file_size)
+            parser = ET.XMLPullParser(events=('start', 'end'))
+            stack = []
+            body = None
+            parts = []
+            consumed = 0
             
-            paragraphs = content.split('\n')
-            for para_text in paragraphs:
-                if para_text.strip():
-                    para = doc.add_paragraph(para_text)
+            with archive.open(info) as stream:
+                while True:
+                    data = stream.read(block_size)
+                    if data:
+                        parser.feed(data)
+                        consumed += len(data)
+                    else:
+                        parser.close()
+                    fraction = min(1.0, consumed / total)
                     
-                    if 'font_name' in formatting:
-                        para.runs[0].font.name = formatting['font_name']
-                    if 'font_size' in formatting:
-                        para.runs[0].font.size = Pt(formatting['font_size'])
-                    if 'bold' in formatting:
-                        para.runs[0].font.bold = formatting['bold']
-                    if 'italic' in formatting:
-                        para.runs[0].font.italic = formatting['italic']
-                    if 'underline' in formatting:
-                        para.runs[0].font.underline = formatting['underline']
-                else:
-                    doc.add_paragraph('')
+                    for event, elem in parser.read_events():
+                        if event == 'start':
+                            if len(stack) == 1 and elem.tag == _W_BODY:
+                                body = elem
+                            stack.append(elem.tag)
+                            continue
+                        
+                        stack.pop()
+                        depth = len(stack)
+                        if depth == 2 and body is not None and stack[1] == _W_BODY:
+                            if elem.tag == _W_P:
+                                yield ''.join(parts), fraction
+                            parts = []
+                            # Body-level blocks are done with; dropping them keeps
+                            # memory flat no matter how long the document is.
+                            body.clear()
+                        elif (depth == 4 or depth == 5) and stack[2] == _W_P and stack[-1] == _W_R \
+                                and body is not None and (depth == 4 or stack[3] == _W_HYPERLINK):
+                            tag = elem.tag
+                            if tag == _W_T:
+                                parts.append(elem.text or '')
+                            elif tag == _W_BR:
+                                if elem.get(_W_BR_TYPE, 'textWrapping') == 'textWrapping':
+                                    parts.append('\n')
+                            elif tag in _RUN_TEXT:
+                                parts.append(_RUN_TEXT[tag])
+                    
+                    if not data:
+                        break
             
-            doc.save(filepath)
+            if body is None:
+                raise ValueError("document body not found")
+    
+    @staticmethod
+    def atomic_write(filepath: str, write):
+        output = AtomicFile(filepath)
+        try:
+            write(output.file)
+        except BaseException:
+            output.discard()
+            raise
+        output.commit()
+    
+    @staticmethod
+    def split_paragraphs(content) -> Iterable[str]:
+        # Plain text, or a document snapshot exposing lines().
+        return content.split('\n') if isinstance(content, str) else content.lines()
+    
+    @staticmethod
+    def save_txt(filepath: str, content: str):
+        try:
+            FileOperations.export_paragraphs(FileOperations.split_paragraphs(content), [(filepath, 'txt')])
+            logger.info(f"File saved: {filepath}")
+        except Exception as e:
+            logger.error(f"Error saving TXT file: {e}")
+            raise
+    
+    @staticmethod
+    def save_docx(filepath: str, content: str, formatting: dict = None,
+                  styles: Optional[List[Tuple[int, Style]]] = None):
+        # styles: the (length, style) runs of the same document snapshot.
+        paragraphs = FileOperations.split_paragraphs(content)
+        if styles:
+            paragraphs = styled_paragraphs(paragraphs, styles)
+        try:
+            FileOperations.export_paragraphs(paragraphs, [(filepath, 'docx')], formatting)
             logger.info(f"DOCX file saved: {filepath}")
         except Exception as e:
             logger.error(f"Error saving DOCX file: {e}")
             raise
     
+    @staticmethod
+    def _docx_paragraph_xml(text: str, runs: Optional[List[Tuple[str, Style]]] = None,
+                            paragraph_style: Style = ()) -> str:
+        properties = FileOperations._docx_paragraph_properties(paragraph_style) if paragraph_style else ''
+        if runs is None or all(not style for _, style in runs):
+            if not text.strip():
+                return '<w:p>' + properties + '</w:p>' if properties else '<w:p/>'
+            return '<w:p>' + properties + '<w:r>' + FileOperations._docx_run_content(text) + '</w:r></w:p>'
+        return '<w:p>' + properties + ''.join(
+            '<w:r>' + FileOperations._docx_run_properties(style) + FileOperations._docx_run_content(piece) + '</w:r>'
+            for piece, style in runs
+        ) + '</w:p>'
+    
+    @staticmethod
+    def _docx_run_content(text: str) -> str:
+        text = _XML_INVALID_CHARS.sub('', text)
+        if '\t' not in text and '\r' not in text and '\n' not in text:
+            return FileOperations._docx_text_xml(text) if text else ''
+        parts = []
+        for piece in _RUN_BREAKS.split(text):
+            if piece == '\t':
+                parts.append('<w:tab/>')
+            elif piece == '\r' or piece == '\n':
+                parts.append('<w:br/>')
+            elif piece:
+                parts.append(FileOperations._docx_text_xml(piece))
+        return ''.join(parts)
+    
+    @staticmethod
+    def _docx_run_properties(style: Style) -> str:
+        # Child elements in the order the WordprocessingML schema requires.
+        attributes = dict(style)
+        parts = []
+        if 'font' in attributes:
+            name = xml_escape(attributes['font'], {'"': '&quot;'})
+            parts.append(f'<w:rFonts w:ascii="{name}" w:hAnsi="{name}" w:cs="{name}"/>')
+        if attributes.get('bold'):
+            parts.append('<w:b/>')
+        if attributes.get('italic'):
+            parts.append('<w:i/>')
+        if attributes.get('strike'):
+            parts.append('<w:strike/>')
+        if 'color' in attributes:
+            parts.append(f'<w:color w:val="{attributes["color"].lstrip("#").upper()}"/>')
+        if 'size' in attributes:
+            parts.append(f'<w:sz w:val="{int(attributes["size"] * 2)}"/>')
+        if attributes.get('underline'):
+            parts.append('<w:u w:val="single"/>')
+        return '<w:rPr>' + ''.join(parts) + '</w:rPr>' if parts else ''
+    
+    @staticmethod
+    def _docx_paragraph_properties(style: Style) -> str:
+        attributes = dict(style)
+        parts = []
+        if 'spacing' in attributes:
+            parts.append(f'<w:spacing w:line="{int(240 * attributes["spacing"])}" w:lineRule="auto"/>')
+        if 'align' in attributes:
+            parts.append(f'<w:jc w:val="{DOCX_ALIGNMENT.get(attributes["align"], "left")}"/>')
+        return '<w:pPr>' + ''.join(parts) + '</w:pPr>' if parts else ''
+    
+    @staticmethod
+    def _docx_text_xml(text: str) -> str:
+        if text[0].isspace() or text[-1].isspace():
+            return '<w:t xml:space="preserve">' + xml_escape(text) + '</w:t>'
+        return '<w:t>' + xml_escape(text) + '</w:t>'
+    
     @staticmethod
     def export_pdf(filepath: str, content: str, formatting: dict = None):
         try:
-            c = canvas.Canvas(filepath, pagesize=letter)
-            width, height = letter
-            
-            if formatting is None:
-                formatting = {}
-            
-            font_size = formatting.get('font_size', 12)
-            
-            y_position = height - 1 * inch
-            line_height = font_size + 4
-            
-            lines = content.split('\n')
-            for line in lines:
-                if y_position < 1 * inch:
-                    c.showPage()
-                    y_position = height - 1 * inch
-                
-                c.setFont("Helvetica", font_size)
-                
-                max_width = width - 2 * inch
-                words = line.split()
-                current_line = ""
-                
-                for word in words:
-                    test_line = current_line + " " + word if current_line else word
-                    if c.stringWidth(test_line, "Helvetica", font_size) <= max_width:
-                        current_line = test_line
-                    else:
-                        if current_line:
-                            c.drawString(1 * inch, y_position, current_line)
-                            y_position -= line_height
-                            if y_position < 1 * inch:
-                                c.showPage()
-                                y_position = height - 1 * inch
-                        current_line = word
-                
-                if current_line:
-                    c.drawString(1 * inch, y_position, current_line)
-                    y_position -= line_height
-            
-            c.save()
+            FileOperations.export_paragraphs(content.split('\n'), [(filepath, 'pdf')], formatting)
             logger.info(f"PDF file exported: {filepath}")
         except Exception as e:
             logger.error(f"Error exporting PDF: {e}")
             raise
     
+    @staticmethod
+    def export_html(filepath: str, content: str):
+        try:
+            FileOperations.export_paragraphs(content.split('\n'), [(filepath, 'html')])
+            logger.info(f"HTML file exported: {filepath}")
+        except Exception as e:
+            logger.error(f"Error exporting HTML: {e}")
+            raise
+    
+    @staticmethod
+    def export_markdown(filepath: str, content: str):
+        try:
+            FileOperations.export_paragraphs(content.split('\n'), [(filepath, 'md')])
+            logger.info(f"Markdown file exported: {filepath}")
+        except Exception as e:
+            logger.error(f"Error exporting Markdown: {e}")
+            raise
+    
+    @staticmethod
+    def get_export_format(filepath: str) -> str:
+        return FileOperations.get_file_extension(filepath).lstrip('.')
+    
+    @staticmethod
+    def create_exporter(filepath: str, fmt: Optional[str] = None, formatting: Optional[dict] = None) -> Exporter:
+        fmt = fmt or FileOperations.get_export_format(filepath)
+        if fmt not in EXPORTERS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        return EXPORTERS[fmt](filepath, formatting)
+    
+    @staticmethod
+    def export_paragraphs(paragraphs: Iterable[str], targets: List[Union[str, Tuple[str, str]]],
+                          formatting: Optional[dict] = None) -> int:
+        # Every target consumes the same pass over `paragraphs`, so a
+        # document is read once no matter how many formats are written.
+        exporters = [
+            FileOperations.create_exporter(target, None, formatting) if isinstance(target, str)
+            else FileOperations.create_exporter(target[0], target[1], formatting)
+            for target in targets
+        ]
+        started = []
+        count = 0
+        try:
+            for exporter in exporters:
+                exporter.begin()
+                started.append(exporter)
+            for text in paragraphs:
+                for exporter in exporters:
+                    exporter.write_paragraph(text)
+                count += 1
+            for exporter in exporters:
+                exporter.finish()
+        except BaseException:
+            for exporter in started:
+                exporter.abort()
+            raise
+        return count
+    
+    @staticmethod
+    def iter_paragraphs(filepath: str):
+        ext = FileOperations.get_file_extension(filepath)
+        if ext == '.docx':
+            return FileOperations.iter_docx_paragraphs(filepath)
+        if ext in ('.html', '.htm'):
+            return iter(FileOperations.open_html(filepath).split('\n'))
+        if ext == '.pdf':
+            return iter(FileOperations.open_pdf(filepath).split('\n'))
+        return FileOperations.iter_txt_paragraphs(filepath)
+    
+    @staticmethod
+    def iter_txt_paragraphs(filepath: str):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            line = ''
+            for line in f:
+                yield line[:-1] if line.endswith('\n') else line
+            if not line or line.endswith('\n'):
+                yield ''
+    
     @staticmethod
     def get_file_extension(filepath: str) -> str:
         return os.path.splitext(filepath)[1].lower()
     
+    @staticmethod
+    def get_file_size_mb(filepath: str) -> float:
+        return os.path.getsize(filepath) / (1024 * 1024)
+    
     @staticmethod
     def is_valid_path(filepath: str) -> bool:
         directory = os.path.dirname(filepath)
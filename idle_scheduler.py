@@ -0,0 +1,113 @@
+import time
+import logging
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+FRAME_BUDGET = 0.016
+
+
+class IdleTask:
+    __slots__ = ('key', 'callback', 'due', 'interval', 'steps')
+
+    def __init__(self, key: str, callback: Callable, due: float, interval: Optional[float] = None):
+        self.key = key
+        self.callback = callback
+        self.due = due
+        self.interval = interval
+        self.steps: Optional[Iterator] = None
+
+
+class IdleScheduler:
+    # Background work of the editor runs from Tk idle callbacks, i.e. only
+    # once pending input and redraw events have been handled, and never for
+    # more than frame_budget per slice. A task that returns a generator is
+    # resumed slice by slice until it is exhausted. Scheduling a key that is
+    # already pending replaces that task and restarts its delay, which both
+    # coalesces bursts of requests and debounces them.
+    def __init__(self, widget, frame_budget: float = FRAME_BUDGET):
+        self.widget = widget
+        self.frame_budget = frame_budget
+        self.tasks: Dict[str, IdleTask] = {}
+        self.timer = None
+        self.timer_due = None
+        self.idle_pending = False
+        self.overruns = 0
+
+    def schedule(self, key: str, callback: Callable, delay: float = 0.0):
+        self.tasks[key] = IdleTask(key, callback, time.monotonic() + delay)
+        self._wake()
+
+    def repeat(self, key: str, callback: Callable, interval: float):
+        self.tasks[key] = IdleTask(key, callback, time.monotonic() + interval, interval)
+        self._wake()
+
+    def cancel(self, key: str):
+        self.tasks.pop(key, None)
+
+    def is_scheduled(self, key: str) -> bool:
+        return key in self.tasks
+
+    def stop(self):
+        self.tasks.clear()
+        if self.timer is not None:
+            self.widget.after_cancel(self.timer)
+            self.timer = None
+
+    def _wake(self):
+        if not self.tasks or self.idle_pending:
+            return
+        due = min(task.due for task in self.tasks.values())
+        if self.timer is not None:
+            if self.timer_due <= due:
+                return
+            self.widget.after_cancel(self.timer)
+        self.timer_due = due
+        self.timer = self.widget.after(max(0, int((due - time.monotonic()) * 1000 + 0.999)), self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        self.idle_pending = True
+        self.widget.after_idle(self._run)
+
+    def _run(self):
+        self.idle_pending = False
+        start = time.perf_counter()
+        deadline = start + self.frame_budget
+        now = time.monotonic()
+        for task in sorted((task for task in self.tasks.values() if task.due <= now), key=lambda task: task.due):
+            if time.perf_counter() >= deadline:
+                break
+            if self.tasks.get(task.key) is task:
+                self._step(task, deadline)
+
+        elapsed = time.perf_counter() - start
+        if elapsed > self.frame_budget:
+            self.overruns += 1
+            logger.debug(f"Idle slice took {elapsed * 1000:.1f} ms")
+        self._wake()
+
+    def _step(self, task: IdleTask, deadline: float):
+        try:
+            if task.steps is None:
+                result = task.callback()
+                if not hasattr(result, '__next__'):
+                    self._done(task)
+                    return
+                task.steps = result
+            while time.perf_counter() < deadline:
+                next(task.steps)
+        except StopIteration:
+            self._done(task)
+        except Exception as e:
+            logger.error(f"Idle task {task.key} failed: {e}", exc_info=True)
+            self._done(task)
+
+    def _done(self, task: IdleTask):
+        task.steps = None
+        if self.tasks.get(task.key) is not task:
+            return
+        if task.interval is None:
+            del self.tasks[task.key]
+        else:
+            task.due = time.monotonic() + task.interval
@@ -0,0 +1,189 @@
+import mmap
+import os
+import threading
+import logging
+import operator
+import tkinter.font as tkfont
+from array import array
+from itertools import accumulate, islice, repeat
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+INDEX_STRIDE = 64
+INDEX_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+class MappedDocument:
+    def __init__(self, filepath: str, encoding: str = 'utf-8'):
+        self.filepath = filepath
+        self.encoding = encoding
+        self.file = open(filepath, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        # Only every INDEX_STRIDE-th line start is kept, so the index stays
+        # a few bytes per thousand lines even for multi-gigabyte files.
+        self.checkpoints = array('Q', [0])
+        self.line_count = 1 if self.size else 0
+        self.is_indexed = self.size == 0
+        self.cancel_event = threading.Event()
+
+    def build_index(self, on_progress: Optional[Callable[[float], None]] = None):
+        if self.mm is None:
+            return
+        start = 0
+        newlines = 0
+        while start < self.size and not self.cancel_event.is_set():
+            end = min(start + INDEX_BLOCK_SIZE, self.size)
+            try:
+                data = self.mm[start:end]
+            except (ValueError, TypeError):
+                return
+            if end < self.size:
+                cut = data.rfind(b'\n')
+                if cut == -1:
+                    start = end
+                    continue
+                data = data[:cut + 1]
+            parts = data.split(b'\n')
+            parts.pop()
+            if parts:
+                line_starts = accumulate(map(operator.add, map(len, parts), repeat(1)), initial=start)
+                next(line_starts)
+                first = -(newlines + 1) % INDEX_STRIDE
+                self.checkpoints.extend(islice(line_starts, first, None, INDEX_STRIDE))
+                newlines += len(parts)
+            start += len(data)
+            self.line_count = newlines + 1
+            if on_progress:
+                on_progress(start / self.size)
+        if not self.cancel_event.is_set():
+            if self.mm[self.size - 1:self.size] == b'\n':
+                self.line_count = newlines
+            self.is_indexed = True
+            logger.info(f"Indexed {self.line_count} lines in {self.filepath}")
+
+    def line_offset(self, line: int) -> int:
+        checkpoint = min(line // INDEX_STRIDE, len(self.checkpoints) - 1)
+        offset = self.checkpoints[checkpoint]
+        for _ in range(line - checkpoint * INDEX_STRIDE):
+            pos = self.mm.find(b'\n', offset)
+            if pos == -1:
+                return self.size
+            offset = pos + 1
+        return offset
+
+    def get_lines(self, start: int, count: int) -> str:
+        if self.mm is None or count <= 0:
+            return ""
+        begin = self.line_offset(start)
+        end = begin
+        for _ in range(count):
+            pos = self.mm.find(b'\n', end)
+            if pos == -1:
+                end = self.size
+                break
+            end = pos + 1
+        text = self.mm[begin:end].decode(self.encoding, errors='replace')
+        return text.replace('\r\n', '\n').rstrip('\n')
+
+    def close(self):
+        self.cancel_event.set()
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.file.close()
+
+
+class LargeFileViewer:
+    KEY_BINDINGS = ('<Up>', '<Down>', '<Prior>', '<Next>', '<Control-Home>', '<Control-End>')
+    WHEEL_BINDINGS = ('<MouseWheel>', '<Button-4>', '<Button-5>')
+
+    def __init__(self, widget, scrollbar, document: MappedDocument,
+                 on_position: Optional[Callable[[int, int, int], None]] = None):
+        self.widget = widget
+        self.scrollbar = scrollbar
+        self.document = document
+        self.on_position = on_position
+        self.top_line = 0
+        self.visible_lines = 50
+
+    def open(self):
+        self.widget.configure(state="normal", wrap="none")
+        self.widget.delete("1.0", "end")
+        self.widget.configure(state="disabled")
+        for sequence in self.KEY_BINDINGS:
+            self.widget.bind(sequence, self._on_key)
+        for sequence in self.WHEEL_BINDINGS:
+            self.widget.bind(sequence, self._on_wheel)
+        self.scrollbar.configure(command=self._on_scrollbar)
+        self.scrollbar.grid()
+        self.render()
+
+    def close(self):
+        for sequence in self.KEY_BINDINGS + self.WHEEL_BINDINGS:
+            self.widget.unbind(sequence)
+        self.scrollbar.grid_remove()
+        self.widget.configure(state="normal", wrap="word")
+        self.widget.delete("1.0", "end")
+        self.document.close()
+
+    def total_lines(self) -> int:
+        return max(1, self.document.line_count)
+
+    def scroll_to(self, line: int):
+        max_top = max(0, self.total_lines() - self.visible_lines)
+        line = max(0, min(int(line), max_top))
+        if line != self.top_line:
+            self.top_line = line
+            self.render()
+
+    def render(self):
+        self.visible_lines = self._measure_visible_lines()
+        text = self.document.get_lines(self.top_line, self.visible_lines)
+        self.widget.configure(state="normal")
+        self.widget.delete("1.0", "end")
+        self.widget.insert("1.0", text)
+        self.widget.configure(state="disabled")
+
+        total = self.total_lines()
+        last = min(total, self.top_line + self.visible_lines)
+        self.scrollbar.set(self.top_line / total, last / total)
+        if self.on_position:
+            self.on_position(self.top_line + 1, last, total)
+
+    def _measure_visible_lines(self) -> int:
+        try:
+            font = tkfont.Font(font=self.widget._textbox.cget("font"))
+            linespace = max(1, font.metrics("linespace"))
+            return max(1, self.widget._textbox.winfo_height() // linespace)
+        except Exception:
+            return self.visible_lines
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self.top_line - 3)
+        else:
+            self.scroll_to(self.top_line + 3)
+        return "break"
+
+    def _on_key(self, event):
+        delta = {
+            'Up': -1,
+            'Down': 1,
+            'Prior': -self.visible_lines,
+            'Next': self.visible_lines,
+            'Home': -self.total_lines(),
+            'End': self.total_lines()
+        }.get(event.keysym, 0)
+        self.scroll_to(self.top_line + delta)
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * self.total_lines())
+        elif args[0] == 'scroll':
+            step = self.visible_lines if args[2] == 'pages' else 1
+            self.scroll_to(self.top_line + int(args[1]) * step)
@@ -7,9 +7,14 @@ AI Text Editor - Gemini
 Версия: 1.0.0
 """
 
+import time
+
+STARTED_AT = time.perf_counter()
+
 import sys
+import argparse
 import logging
-from editor import TextEditor
+import batch_convert
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,9 +23,91 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Heavy modules that must stay off the startup path; --startup-profile
+# reports any of them that got imported before the window appeared.
+DEFERRED_MODULES = ('docx', 'reportlab.pdfgen.canvas', 'pypdf', 'google.generativeai', 'language_tool_python')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI Text Editor - Gemini")
+    parser.add_argument(
+        '--startup-profile',
+        action='store_true',
+        help="измерить время запуска до появления окна и стоимость импортов, затем выйти"
+    )
+    
+    commands = parser.add_subparsers(dest='command')
+    convert = commands.add_parser(
+        'convert',
+        help="пакетная конвертация папки документов без графического интерфейса",
+        description="Конвертирует txt/md/docx/html/pdf из in_dir в out_dir. "
+                    "Файлы, результат которых новее исходника, и файлы "
+                    "уже в целевом формате пропускаются."
+    )
+    batch_convert.add_arguments(convert)
+    return parser.parse_args(argv)
+
+
+def startup_profile():
+    import importlib
+
+    import_start = time.perf_counter()
+    from editor import TextEditor
+    import_end = time.perf_counter()
+
+    app = TextEditor()
+    app.update_idletasks()
+    app.update()
+    window_shown = time.perf_counter()
+    loaded_at_startup = [name for name in DEFERRED_MODULES if name in sys.modules]
+
+    ai_ready = app.ai_assistant.wait_ready()
+    ai_done = time.perf_counter()
+
+    print("\n" + "=" * 50)
+    print("ПРОФИЛЬ ЗАПУСКА")
+    print("=" * 50)
+    print(f"Импорт модулей main.py:      {(import_start - STARTED_AT) * 1000:8.1f} ms")
+    print(f"Импорт editor:               {(import_end - import_start) * 1000:8.1f} ms")
+    print(f"Создание окна:               {(window_shown - import_end) * 1000:8.1f} ms")
+    print(f"Время до появления окна:     {(window_shown - STARTED_AT) * 1000:8.1f} ms")
+    if app.ai_assistant.init_thread is not None:
+        status = "готов" if ai_ready else "ошибка"
+        print(f"Инициализация AI (в фоне):   {(ai_done - window_shown) * 1000:8.1f} ms ({status})")
+    else:
+        print("Инициализация AI:            не настроен API ключ")
+
+    print("\nОтложенные импорты:")
+    for name in DEFERRED_MODULES:
+        if name in loaded_at_startup:
+            print(f"  {name:<28} загружен до появления окна")
+        elif name in sys.modules:
+            print(f"  {name:<28} загружен в фоне")
+        else:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                print(f"  {name:<28} не установлен")
+                continue
+            print(f"  {name:<28} {(time.perf_counter() - start) * 1000:8.1f} ms при первом использовании")
+
+    app.destroy()
+
 
 def main():
+    args = parse_args()
+
+    if args.command:
+        logging.getLogger().setLevel(logging.INFO if args.verbose else logging.CRITICAL)
+        sys.exit(args.handler(args))
+
+    if args.startup_profile:
+        startup_profile()
+        return
+
     try:
+        from editor import TextEditor
         logger.info("Starting AI Text Editor")
         app = TextEditor()
         app.mainloop()
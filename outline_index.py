@@ -0,0 +1,77 @@
+import re
+import logging
+from typing import Callable, Iterable, List, Optional, Tuple
+from edit_tracker import TextEdit
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADING_LENGTH = 120
+MARKDOWN_HEADING = re.compile(r'(#{1,6})\s+(\S.*)')
+# "1. Введение", "2.3 Область", "2.3.1. Термины"; at most three digits per
+# part, so years and amounts at the start of a sentence do not qualify.
+NUMBERED_HEADING = re.compile(r'(\d{1,3}\.(?:\d{1,3}\.?)*)\s+([^\W\d_].*)')
+HEADING_LEVEL = re.compile(rb'[^\x00]')
+
+
+def heading_level(line: str) -> int:
+    # 0 for body text, otherwise 1 (top) to 6.
+    text = line.strip()
+    if not text or len(text) > MAX_HEADING_LENGTH:
+        return 0
+    if text[0] == '#':
+        match = MARKDOWN_HEADING.match(text)
+        return len(match.group(1)) if match else 0
+    if text[0].isdigit():
+        match = NUMBERED_HEADING.match(text)
+        if match is None or text[-1] in '.,;:':
+            return 0
+        return min(6, len(match.group(1).rstrip('.').split('.')))
+    if text.isupper() and sum(1 for char in text if char.isalpha()) >= 3:
+        return 1
+    return 0
+
+
+def heading_title(line: str) -> str:
+    text = line.strip()
+    match = MARKDOWN_HEADING.match(text)
+    return match.group(2).strip() if match else text
+
+
+class OutlineIndex:
+    # Heading level of every line (0 for body text), kept in step with the
+    # edits like WordCounter: an edit reclassifies only the lines it touched.
+    # Headings are listed by a regex scan over the level bytes, so neither
+    # listing nor jumping to them reads the document. version changes
+    # whenever a heading may have moved or changed its text.
+    def __init__(self, get_lines: Callable[[int, Optional[int]], str]):
+        self.get_lines = get_lines
+        self.levels = bytearray(1)
+        self.version = 0
+
+    def reset(self, text: str):
+        self.reset_lines(text.split('\n'))
+
+    def reset_lines(self, lines: Iterable[str]):
+        self.levels = bytearray(heading_level(line) for line in lines)
+        self.version += 1
+
+    def apply(self, edit: TextEdit):
+        first = edit.start[0]
+        if edit.kind == 'insert':
+            old_last, new_last = first, edit.end[0]
+        else:
+            old_last, new_last = edit.end[0], first
+        if old_last > len(self.levels):
+            logger.warning("Outline index is out of sync with the buffer, rebuilding")
+            self.reset(self.get_lines(1, None))
+            return
+
+        levels = bytes(heading_level(line) for line in self.get_lines(first, new_last).split('\n'))
+        touched = any(levels) or any(self.levels[first - 1:old_last])
+        self.levels[first - 1:old_last] = levels
+        if touched or (old_last != new_last and HEADING_LEVEL.search(self.levels, new_last)):
+            self.version += 1
+
+    def headings(self) -> List[Tuple[int, int]]:
+        # (line, level) of every heading, in document order.
+        return [(match.start() + 1, self.levels[match.start()]) for match in HEADING_LEVEL.finditer(self.levels)]
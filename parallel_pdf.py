@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, List, Optional, Tuple
+from reportlab.pdfgen import canvas
+from pdf_layout import PdfLayout, register_font
+from file_operations import FileOperations
+
+try:
+    from pypdf import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+MIN_SHARD_PAGES = 50
+SHARDS_PER_JOB = 4
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def render_shard(shard_path: str, font: Optional[str], font_size: float, pages: List[List[str]]) -> int:
+    layout = PdfLayout(font_name=register_font(font), font_size=font_size)
+    c = canvas.Canvas(shard_path, pagesize=layout.pagesize)
+    layout.render(c, pages)
+    c.save()
+    return len(pages)
+
+
+def split_pages(page_count: int, jobs: int) -> List[Tuple[int, int]]:
+    size = max(MIN_SHARD_PAGES, -(-page_count // (jobs * SHARDS_PER_JOB)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+class PdfExportJob:
+    def __init__(self, filepath: str, content, formatting: dict = None, jobs: int = 0):
+        self.filepath = filepath
+        self.content = content
+        self.formatting = formatting or {}
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.cancel_event = threading.Event()
+        self.page_count = 0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def run(self, on_progress: Optional[Callable[[float, str], None]] = None) -> bool:
+        def report(fraction: float, status: str):
+            if on_progress:
+                on_progress(fraction, status)
+
+        report(0.0, "Разбивка на страницы...")
+        layout = PdfLayout(
+            font_name=register_font(self.formatting.get('pdf_font')),
+            font_size=self.formatting.get('font_size', 12)
+        )
+        pages = layout.paginate_lines(FileOperations.split_paragraphs(self.content))
+        self.page_count = len(pages)
+        self.content = None
+        if self.is_cancelled:
+            return False
+
+        ranges = split_pages(len(pages), self.jobs)
+        if self.jobs == 1 or len(ranges) == 1 or PdfWriter is None:
+            if PdfWriter is None and len(ranges) > 1:
+                logger.info("pypdf is not installed, exporting PDF in a single process")
+            return self._run_serial(layout, pages, report)
+        return self._run_parallel(layout, pages, ranges, report)
+
+    def _run_serial(self, layout: PdfLayout, pages: List[List[str]], report) -> bool:
+        def render(f):
+            c = canvas.Canvas(f, pagesize=layout.pagesize)
+            for start, end in split_pages(len(pages), 1):
+                if self.is_cancelled:
+                    raise _Cancelled()
+                if start:
+                    c.showPage()
+                layout.render(c, pages[start:end])
+                report(end / len(pages) * 0.95, f"Страница {end} из {len(pages)}")
+            c.save()
+
+        try:
+            FileOperations.atomic_write(self.filepath, render)
+        except _Cancelled:
+            return False
+        report(1.0, "Готово")
+        logger.info(f"PDF file exported: {self.filepath} ({len(pages)} pages)")
+        return True
+
+    def _run_parallel(self, layout: PdfLayout, pages: List[List[str]],
+                      ranges: List[Tuple[int, int]], report) -> bool:
+        shard_dir = tempfile.mkdtemp(prefix=".pdf-export-", dir=os.path.dirname(os.path.abspath(self.filepath)))
+        # Workers are spawned rather than forked: the caller is a thread of
+        # a Tk process, and forking it is not safe.
+        context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(max_workers=min(self.jobs, len(ranges)), mp_context=context)
+        try:
+            futures = {}
+            for index, (start, end) in enumerate(ranges):
+                shard_path = os.path.join(shard_dir, f"{index:05d}.pdf")
+                future = executor.submit(render_shard, shard_path, self.formatting.get('pdf_font'),
+                                         layout.font_size, pages[start:end])
+                futures[future] = shard_path
+            shard_paths = list(futures.values())
+            del pages
+
+            rendered = 0
+            remaining = set(futures)
+            while remaining:
+                done, remaining = wait(remaining, timeout=0.2, return_when=FIRST_COMPLETED)
+                if self.is_cancelled:
+                    return False
+                for future in done:
+                    rendered += future.result()
+                if done:
+                    report(rendered / self.page_count * 0.9, f"Страница {rendered} из {self.page_count}")
+
+            report(0.9, "Сборка файла...")
+            writer = PdfWriter()
+            for shard_path in shard_paths:
+                if self.is_cancelled:
+                    return False
+                writer.append(shard_path)
+            FileOperations.atomic_write(self.filepath, writer.write)
+            writer.close()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            shutil.rmtree(shard_dir, ignore_errors=True)
+
+        report(1.0, "Готово")
+        logger.info(f"PDF file exported: {self.filepath} ({self.page_count} pages, {len(ranges)} shards)")
+        return True
@@ -0,0 +1,217 @@
+import os
+import sys
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.rl_accel import unicode2T1
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+logger = logging.getLogger(__name__)
+
+WORD_CACHE_SIZE = 50000
+
+FALLBACK_FONT = "Helvetica"
+# Fonts with Cyrillic coverage tried in order when no font is configured.
+DEFAULT_FONTS = ('arial', 'DejaVuSans', 'LiberationSans-Regular', 'NotoSans-Regular', 'FreeSans')
+if sys.platform == 'win32':
+    FONT_DIRS = [os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts')]
+elif sys.platform == 'darwin':
+    FONT_DIRS = ['/System/Library/Fonts/Supplemental', '/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+else:
+    FONT_DIRS = ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.local/share/fonts'),
+                 os.path.expanduser('~/.fonts')]
+
+_registered_fonts: Dict[str, str] = {}
+_font_files: Optional[Dict[str, str]] = None
+
+
+def _find_font_file(name: str) -> Optional[str]:
+    global _font_files
+    if _font_files is None:
+        _font_files = {}
+        for font_dir in FONT_DIRS:
+            for root, _, files in os.walk(font_dir):
+                for filename in files:
+                    stem, ext = os.path.splitext(filename)
+                    if ext.lower() == '.ttf':
+                        _font_files.setdefault(stem.lower(), os.path.join(root, filename))
+    return _font_files.get(name.lower())
+
+
+def register_font(font: Optional[str] = None) -> str:
+    # `font` is a .ttf path, a font file name looked up in FONT_DIRS or a
+    # standard PDF font; without it the first of DEFAULT_FONTS is used.
+    if font and font in pdfmetrics.standardFonts:
+        return font
+    if font in _registered_fonts:
+        return _registered_fonts[font]
+
+    if font:
+        path = font if os.path.isfile(font) else _find_font_file(font)
+        if path is None:
+            logger.warning(f"Font {font} not found, falling back to the default font")
+            name = register_font()
+            _registered_fonts[font] = name
+            return name
+    else:
+        path = next(filter(None, map(_find_font_file, DEFAULT_FONTS)), None)
+        if path is None:
+            logger.warning(f"No TrueType font found, PDF export uses {FALLBACK_FONT} without Cyrillic")
+            _registered_fonts[font] = FALLBACK_FONT
+            return FALLBACK_FONT
+
+    path = os.path.abspath(path)
+    name = _registered_fonts.get(path)
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in pdfmetrics.getRegisteredFontNames():
+            name = f"{name}-{len(_registered_fonts)}"
+        # TrueType fonts are embedded as subsets holding only the glyphs used.
+        pdfmetrics.registerFont(TTFont(name, path))
+        _registered_fonts[path] = name
+        logger.info(f"Registered PDF font {name} from {path}")
+    _registered_fonts[font] = name
+    return name
+
+
+class GlyphWidths(dict):
+    """Advance widths in font units (1/1000 em), measured once per character"""
+
+    def __init__(self, font_name: str):
+        super().__init__()
+        self.font_name = font_name
+        self.font = pdfmetrics.getFont(font_name)
+        self.is_truetype = hasattr(self.font.face, 'charWidths')
+        self.words: Dict[str, float] = {}
+
+    def __missing__(self, char: str) -> float:
+        if self.is_truetype:
+            face = self.font.face
+            width = face.charWidths.get(ord(char), face.defaultWidth)
+        else:
+            fonts = [self.font] + self.font.substitutionFonts
+            width = sum(sum(map(font.widths.__getitem__, encoded)) for font, encoded in unicode2T1(char, fonts))
+        self[char] = width
+        return width
+
+    def measure(self, word: str) -> float:
+        units = self.words.get(word)
+        if units is None:
+            units = sum(map(self.__getitem__, word))
+            if len(self.words) >= WORD_CACHE_SIZE:
+                self.words.clear()
+            self.words[word] = units
+        return units
+
+    def to_points(self, units: float, font_size: float) -> float:
+        # Same operation order as reportlab's stringWidth, so wrapping
+        # decisions match it exactly.
+        if self.is_truetype:
+            return 0.001 * font_size * units
+        return units * 0.001 * font_size
+
+
+_glyph_widths: Dict[str, GlyphWidths] = {}
+
+
+def get_glyph_widths(font_name: str) -> GlyphWidths:
+    widths = _glyph_widths.get(font_name)
+    if widths is None:
+        widths = _glyph_widths[font_name] = GlyphWidths(font_name)
+    return widths
+
+
+class PdfLayout:
+    def __init__(self, font_name: str = "Helvetica", font_size: float = 12,
+                 pagesize: Tuple[float, float] = letter, margin: float = 1 * inch):
+        self.font_name = font_name
+        self.font_size = font_size
+        self.pagesize = pagesize
+        self.margin = margin
+        self.line_height = font_size + 4
+        self.max_width = pagesize[0] - 2 * margin
+        self.top = pagesize[1] - margin
+        self.widths = get_glyph_widths(font_name)
+
+    def wrap(self, line: str) -> List[str]:
+        measure = self.widths.measure
+        to_points = self.widths.to_points
+        font_size = self.font_size
+        max_width = self.max_width
+        space = self.widths[' ']
+        wrapped = []
+        current = []
+        current_units = 0
+        for word in line.split():
+            units = measure(word)
+            if current:
+                test_units = current_units + space + units
+                if to_points(test_units, font_size) <= max_width:
+                    current.append(word)
+                    current_units = test_units
+                    continue
+                wrapped.append(' '.join(current))
+            current = [word]
+            current_units = units
+        if current:
+            wrapped.append(' '.join(current))
+        return wrapped
+
+    def paginate(self, content: str) -> List[List[str]]:
+        return self.paginate_lines(content.split('\n'))
+
+    def paginate_lines(self, lines: Iterable[str]) -> List[List[str]]:
+        paginator = Paginator(self)
+        pages = []
+        for line in lines:
+            pages.extend(paginator.feed(line))
+        pages.append(paginator.close())
+        return pages
+
+    def render_page(self, c, lines: List[str]):
+        c.setFont(self.font_name, self.font_size)
+        y = self.top
+        for text in lines:
+            c.drawString(self.margin, y, text)
+            y -= self.line_height
+
+    def render(self, c, pages: List[List[str]]):
+        for number, lines in enumerate(pages):
+            if number:
+                c.showPage()
+            self.render_page(c, lines)
+
+
+class Paginator:
+    """Incremental pagination: source lines in, finished pages out"""
+
+    def __init__(self, layout: PdfLayout):
+        self.layout = layout
+        self.page: List[str] = []
+        self.y = layout.top
+
+    def feed(self, line: str) -> List[List[str]]:
+        layout = self.layout
+        finished = []
+        if self.y < layout.margin:
+            finished.append(self.page)
+            self.page = []
+            self.y = layout.top
+        wrapped = layout.wrap(line)
+        last = len(wrapped) - 1
+        for i, text in enumerate(wrapped):
+            self.page.append(text)
+            self.y -= layout.line_height
+            if self.y < layout.margin and i < last:
+                finished.append(self.page)
+                self.page = []
+                self.y = layout.top
+        return finished
+
+    def close(self) -> List[str]:
+        page = self.page
+        self.page = []
+        self.y = self.layout.top
+        return page
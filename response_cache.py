@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MEMORY_ENTRIES = 256
+MAX_BYTES = 20 * 1024 * 1024
+TTL = 7 * 24 * 3600.0
+DB_NAME = 'ai_responses.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+class ResponseCache:
+    # AI responses in two tiers: a small LRU in memory for the current
+    # session and a SQLite table on disk shared between sessions. Entries
+    # older than ttl are never returned; once the table holds more than
+    # max_bytes of responses the ones used longest ago are dropped. Used
+    # from the assistant's worker threads, so every access takes the lock;
+    # the database is opened on first use, not at startup.
+    def __init__(self, cache_dir: str, max_bytes: int = MAX_BYTES, ttl: float = TTL,
+                 memory_entries: int = MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.disabled = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(model_name: str, generation_config: dict, prompt: str) -> str:
+        # generation_config carries the temperature along with any other
+        # sampling settings sent with the prompt.
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        material = json.dumps([model_name, generation_config, prompt_hash], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                response, created = entry
+                if now - created <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self.memory[key]
+
+            row = None
+            connection = self._connect()
+            if connection is not None:
+                try:
+                    row = connection.execute(
+                        "SELECT response, created FROM responses WHERE key = ? AND created >= ?",
+                        (key, now - self.ttl)
+                    ).fetchone()
+                    if row is not None:
+                        connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                        connection.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"AI response cache lookup failed: {e}")
+                    row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self.lock:
+            self._remember(key, response, now)
+            if size > self.max_bytes:
+                return
+            connection = self._connect()
+            if connection is None:
+                return
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, bytes, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, now, now)
+                )
+                self._evict(connection, now)
+                connection.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not cache AI response: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            connection = self._connect()
+            if connection is None:
+                return
+            try:
+                connection.execute("DELETE FROM responses")
+                connection.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not clear AI response cache: {e}")
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def _remember(self, key: str, response: str, created: float):
+        self.memory[key] = (response, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        connection.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = connection.execute("SELECT COALESCE(SUM(bytes), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = connection.execute("SELECT key, bytes FROM responses ORDER BY last_used").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        # A cache that cannot be opened degrades to memory only.
+        if self.connection is not None or self.disabled or self.max_bytes <= 0:
+            return self.connection
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.connection = sqlite3.connect(os.path.join(self.cache_dir, DB_NAME), check_same_thread=False)
+            self.connection.execute(SCHEMA)
+            self.connection.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"AI response cache unavailable, keeping responses in memory only: {e}")
+            self.connection = None
+            self.disabled = True
+        return self.connection
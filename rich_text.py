@@ -0,0 +1,364 @@
+import random
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A style is a sorted tuple of (attribute, value) pairs, so equal styles
+# compare and hash equal; () is plain text. Character attributes: bold,
+# italic, underline, strike, font, size, color. Paragraph attributes (taken
+# from the first character of a paragraph, as Tk does for justify): align,
+# spacing.
+Style = Tuple[Tuple[str, object], ...]
+PLAIN: Style = ()
+PARAGRAPH_ATTRIBUTES = ('align', 'spacing')
+
+
+def style_get(style: Style, attribute: str, default=None):
+    for key, value in style:
+        if key == attribute:
+            return value
+    return default
+
+
+def style_with(style: Style, attribute: str, value) -> Style:
+    # value None (or False) removes the attribute.
+    items = dict(style)
+    if value is None or value is False:
+        items.pop(attribute, None)
+    else:
+        items[attribute] = value
+    return tuple(sorted(items.items()))
+
+
+class SpanNode:
+    __slots__ = ('length', 'style', 'priority', 'left', 'right', 'total')
+
+    def __init__(self, length: int, style: Style):
+        self.length = length
+        self.style = style
+        self.priority = random.random()
+        self.left: Optional['SpanNode'] = None
+        self.right: Optional['SpanNode'] = None
+        self.total = length
+
+
+def _total(node: Optional[SpanNode]) -> int:
+    return node.total if node else 0
+
+
+def _update(node: SpanNode):
+    node.total = node.length + _total(node.left) + _total(node.right)
+
+
+def _merge(left: Optional[SpanNode], right: Optional[SpanNode]) -> Optional[SpanNode]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _split(node: Optional[SpanNode], offset: int) -> Tuple[Optional[SpanNode], Optional[SpanNode]]:
+    # The first `offset` characters go left; a run straddling the offset is
+    # cut in two.
+    if node is None:
+        return None, None
+    left_total = _total(node.left)
+    if offset <= left_total:
+        left, node.left = _split(node.left, offset)
+        _update(node)
+        return left, node
+    if offset >= left_total + node.length:
+        node.right, right = _split(node.right, offset - left_total - node.length)
+        _update(node)
+        return node, right
+    cut = offset - left_total
+    head, tail = SpanNode(cut, node.style), SpanNode(node.length - cut, node.style)
+    return _merge(node.left, head), _merge(tail, node.right)
+
+
+def _take_first(node: Optional[SpanNode]) -> Tuple[Optional[SpanNode], Optional[SpanNode]]:
+    if node is None:
+        return None, None
+    if node.left is None:
+        rest, node.right = node.right, None
+        _update(node)
+        return node, rest
+    first, node.left = _take_first(node.left)
+    _update(node)
+    return first, node
+
+
+def _take_last(node: Optional[SpanNode]) -> Tuple[Optional[SpanNode], Optional[SpanNode]]:
+    if node is None:
+        return None, None
+    if node.right is None:
+        rest, node.left = node.left, None
+        _update(node)
+        return rest, node
+    node.right, last = _take_last(node.right)
+    _update(node)
+    return node, last
+
+
+def _iter_nodes(node: Optional[SpanNode]) -> Iterator[SpanNode]:
+    stack = []
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node
+        node = node.right
+
+
+def _iter_from(node: Optional[SpanNode], offset: int) -> Iterator[Tuple[int, SpanNode]]:
+    # (start, node) in order from the run containing offset: the descent
+    # keeps the ancestors still to come on the stack, as _iter_nodes would.
+    stack = []
+    base = 0
+    while node:
+        left_total = _total(node.left)
+        if offset < base + left_total:
+            stack.append((base + left_total, node))
+            node = node.left
+        elif offset >= base + left_total + node.length:
+            base += left_total + node.length
+            node = node.right
+        else:
+            stack.append((base + left_total, node))
+            break
+    while stack:
+        start, node = stack.pop()
+        yield start, node
+        base, child = start + node.length, node.right
+        while child:
+            stack.append((base + _total(child.left), child))
+            child = child.left
+
+
+def _build(runs: List[Tuple[int, Style]]) -> Optional[SpanNode]:
+    root = None
+    for length, style in runs:
+        root = _merge(root, SpanNode(length, style))
+    return root
+
+
+def _coalesce(runs: Iterable[Tuple[int, Style]]) -> List[Tuple[int, Style]]:
+    result: List[Tuple[int, Style]] = []
+    for length, style in runs:
+        if length <= 0:
+            continue
+        if result and result[-1][1] == style:
+            result[-1] = (result[-1][0] + length, style)
+        else:
+            result.append((length, style))
+    return result
+
+
+class SpanStore:
+    # Style runs covering the document back to back, held in a treap keyed
+    # implicitly by run length: each node knows the length of its subtree,
+    # so locating, splitting and joining runs at a character offset take
+    # O(log n) in the number of runs, and an edit never touches the runs
+    # after it. Neighbouring runs of the same style are always merged.
+    # Until a style is first applied the store is inactive and ignores edits.
+    def __init__(self):
+        self.root: Optional[SpanNode] = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.root is not None
+
+    @property
+    def length(self) -> int:
+        return _total(self.root)
+
+    def clear(self):
+        self.root = None
+
+    def activate(self, length: int):
+        if self.root is None:
+            self.root = SpanNode(length, PLAIN)
+
+    def runs(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, Style]]:
+        # (start, end, style) of the runs overlapping [start, end), clipped.
+        end = self.length if end is None else end
+        for position, node in _iter_from(self.root, start):
+            if position >= end:
+                return
+            yield max(start, position), min(end, position + node.length), node.style
+
+    def snapshot(self) -> List[Tuple[int, Style]]:
+        return [(node.length, node.style) for node in _iter_nodes(self.root)]
+
+    def style_at(self, offset: int) -> Style:
+        for _, _, style in self.runs(offset, offset + 1):
+            return style
+        return PLAIN
+
+    def insert(self, offset: int, length: int):
+        # Tk gives inserted text the tags present on both sides of it, i.e.
+        # the style of the run it lands inside and plain text at a boundary
+        # between runs; the store follows the same rule.
+        if self.root is None or length <= 0:
+            return
+        left, right = _split(self.root, offset)
+        left, before = _take_last(left)
+        after, right = _take_first(right)
+        inside = before is not None and after is not None and before.style == after.style
+        middle = [] if before is None else [(before.length, before.style)]
+        middle.append((length, before.style if inside else PLAIN))
+        if after is not None:
+            middle.append((after.length, after.style))
+        self.root = _merge(_merge(left, _build(_coalesce(middle))), right)
+
+    def delete(self, offset: int, length: int):
+        if self.root is None or length <= 0:
+            return
+        left, rest = _split(self.root, offset)
+        _, right = _split(rest, length)
+        self.root = _merge(left, right)
+        self._join(offset)
+
+    def apply(self, start: int, end: int,
+              change: Callable[[Style], Style]) -> List[Tuple[int, int, Style, Style]]:
+        # Restyles [start, end) and returns (start, end, old, new) for every
+        # piece whose style changed, for the widget to retag.
+        if self.root is None or start >= end:
+            return []
+        left, rest = _split(self.root, start)
+        middle, right = _split(rest, end - start)
+        changes = []
+        runs = []
+        position = start
+        for node in _iter_nodes(middle):
+            style = change(node.style)
+            if style != node.style:
+                changes.append((position, position + node.length, node.style, style))
+            runs.append((node.length, style))
+            position += node.length
+        self.root = _merge(_merge(left, _build(_coalesce(runs))), right)
+        self._join(start)
+        self._join(end)
+        return changes
+
+    def _join(self, offset: int):
+        # Merges the runs meeting at offset if they have the same style.
+        if offset <= 0 or offset >= self.length:
+            return
+        left, right = _split(self.root, offset)
+        left, before = _take_last(left)
+        after, right = _take_first(right)
+        if before.style == after.style:
+            before.length += after.length
+            _update(before)
+            self.root = _merge(_merge(left, before), right)
+        else:
+            self.root = _merge(_merge(left, before), _merge(after, right))
+
+
+class StyleTags:
+    # One Tk tag per distinct style in use, shared by every span of that
+    # style, so the widget carries as many tags as there are styles rather
+    # than one per span. Tags sit below the selection and search tags.
+    def __init__(self, widget, get_base_font: Callable[[], Tuple[str, int, float]]):
+        self.widget = widget
+        self.get_base_font = get_base_font
+        self.tags: Dict[Style, str] = {}
+
+    def tag(self, style: Style) -> Optional[str]:
+        if style == PLAIN:
+            return None
+        name = self.tags.get(style)
+        if name is None:
+            name = f"style_{len(self.tags)}"
+            self.tags[style] = name
+            self.widget.tag_configure(name, **self.options(style))
+            self.widget.tag_lower(name)
+        return name
+
+    def refresh(self):
+        # After a zoom or a change of the base font.
+        for style, name in self.tags.items():
+            self.widget.tag_configure(name, **self.options(style))
+
+    def options(self, style: Style) -> dict:
+        # get_base_font: the widget's font family and size and the zoom factor
+        # that the point sizes of styles are scaled by.
+        family, size, zoom = self.get_base_font()
+        attributes = dict(style)
+        options = {
+            'underline': bool(attributes.get('underline')),
+            'overstrike': bool(attributes.get('strike')),
+        }
+        if any(key in attributes for key in ('bold', 'italic', 'font', 'size')):
+            options['font'] = (
+                attributes.get('font', family),
+                max(1, round(attributes['size'] * zoom)) if 'size' in attributes else size,
+                'bold' if attributes.get('bold') else 'normal',
+                'italic' if attributes.get('italic') else 'roman'
+            )
+        if 'color' in attributes:
+            options['foreground'] = attributes['color']
+        if 'align' in attributes:
+            options['justify'] = attributes['align']
+        if 'spacing' in attributes:
+            extra = round(size * (attributes['spacing'] - 1))
+            options['spacing2'] = extra
+            options['spacing3'] = extra
+        return options
+
+    def retag(self, base: str, base_offset: int, changes: List[Tuple[int, int, Style, Style]]):
+        # Offsets in changes are document offsets; base is the widget index
+        # of base_offset.
+        for start, end, old, new in changes:
+            first, last = f"{base}+{start - base_offset}c", f"{base}+{end - base_offset}c"
+            if old != PLAIN:
+                self.widget.tag_remove(self.tags[old], first, last)
+            if new != PLAIN:
+                self.widget.tag_add(self.tag(new), first, last)
+
+
+class StyledParagraph(str):
+    # Paragraph text that also carries its (text, style) runs and paragraph
+    # style; exporters that know nothing of styles see a plain str.
+    runs: List[Tuple[str, Style]]
+    paragraph_style: Style
+
+
+def styled_paragraphs(lines: Iterable[str], runs: List[Tuple[int, Style]]) -> Iterator[str]:
+    # Walks the document lines and the style runs of the same snapshot side
+    # by side; the newline after each line belongs to the runs as well.
+    pending = iter(runs)
+    length, style = next(pending, (0, PLAIN))
+    for line in lines:
+        paragraph = StyledParagraph(line)
+        paragraph.runs = []
+        position = 0
+        first_style = None
+        while True:
+            while length == 0:
+                length, style = next(pending, (float('inf'), PLAIN))
+            if first_style is None:
+                first_style = style
+            if position == len(line):
+                length -= 1
+                break
+            take = min(length, len(line) - position)
+            character_style = tuple(item for item in style if item[0] not in PARAGRAPH_ATTRIBUTES)
+            if paragraph.runs and paragraph.runs[-1][1] == character_style:
+                paragraph.runs[-1] = (paragraph.runs[-1][0] + line[position:position + take], character_style)
+            else:
+                paragraph.runs.append((line[position:position + take], character_style))
+            position += take
+            length -= take
+        paragraph.paragraph_style = tuple(item for item in first_style if item[0] in PARAGRAPH_ATTRIBUTES)
+        yield paragraph
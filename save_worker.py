@@ -0,0 +1,84 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional
+from file_operations import FileOperations
+
+logger = logging.getLogger(__name__)
+
+
+class SaveRequest:
+    def __init__(self, filepath: str, content: str, callback: Optional[Callable[[Optional[str]], None]] = None,
+                 styles: Optional[list] = None):
+        self.filepath = filepath
+        self.content = content
+        self.callback = callback
+        self.styles = styles
+
+
+class SaveWorker:
+    def __init__(self):
+        self.condition = threading.Condition()
+        # At most one request per path waits behind the one being written;
+        # a newer snapshot of the same file simply replaces the older one.
+        self.pending = OrderedDict()
+        self.in_flight = None
+        self.thread = None
+        self.stopped = False
+
+    def submit(self, filepath: str, content: str, callback: Optional[Callable[[Optional[str]], None]] = None,
+               styles: Optional[list] = None):
+        with self.condition:
+            superseded = self.pending.pop(filepath, None)
+            self.pending[filepath] = SaveRequest(filepath, content, callback, styles)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+        if superseded is not None:
+            logger.debug(f"Coalesced pending save for {filepath}")
+
+    def is_busy(self) -> bool:
+        with self.condition:
+            return self.in_flight is not None or bool(self.pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: self.in_flight is None and not self.pending, timeout)
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or self.stopped)
+                if not self.pending:
+                    return
+                _, request = self.pending.popitem(last=False)
+                self.in_flight = request
+
+            error = None
+            try:
+                self._write(request)
+            except Exception as e:
+                error = str(e)
+
+            with self.condition:
+                self.in_flight = None
+                self.condition.notify_all()
+
+            if request.callback:
+                try:
+                    request.callback(error)
+                except Exception as e:
+                    logger.error(f"Save callback failed: {e}")
+
+    def _write(self, request: SaveRequest):
+        ext = FileOperations.get_file_extension(request.filepath)
+        if ext == '.docx':
+            FileOperations.save_docx(request.filepath, request.content, styles=request.styles)
+        else:
+            FileOperations.save_txt(request.filepath, request.content)
@@ -0,0 +1,155 @@
+import re
+import logging
+from typing import Callable, Iterator, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+BLOCK_LINES = 2000
+MATCH_TAG = 'search_match'
+CURRENT_TAG = 'search_current'
+
+
+def build_pattern(query: str, regex: bool = False, case_sensitive: bool = False,
+                  whole_word: bool = False) -> Pattern:
+    source = query if regex else re.escape(query)
+    if whole_word:
+        source = rf'\b(?:{source})\b'
+    flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+    return re.compile(source, flags)
+
+
+def iter_block_matches(pattern: Pattern, text: str, first_line: int,
+                       pos: int = 0) -> Iterator[Tuple[str, str, 're.Match']]:
+    # Turns match offsets into Tk indices in a single forward pass over the
+    # block; empty matches are skipped, they cannot be highlighted or
+    # stepped through.
+    line = first_line
+    line_start = 0
+    scanned = 0
+
+    def locate(offset: int) -> str:
+        nonlocal line, line_start, scanned
+        newlines = text.count('\n', scanned, offset)
+        if newlines:
+            line += newlines
+            line_start = text.rfind('\n', scanned, offset) + 1
+        scanned = offset
+        return f"{line}.{offset - line_start}"
+
+    for match in pattern.finditer(text, pos):
+        if match.start() == match.end():
+            continue
+        yield locate(match.start()), locate(match.end()), match
+
+
+class BlockSearch:
+    # The buffer is scanned in blocks of whole lines, so a multi-line
+    # regular expression only matches within one block of block_lines.
+    # Only index() and get() of the Tk text API are used here, so anything
+    # providing those two can be searched.
+    def __init__(self, widget, block_lines: int = BLOCK_LINES):
+        self.widget = widget
+        self.block_lines = block_lines
+
+    @property
+    def line_count(self) -> int:
+        return int(str(self.widget.index("end-1c")).split('.')[0])
+
+    def read_block(self, first_line: int) -> str:
+        return self.widget.get(f"{first_line}.0", f"{first_line + self.block_lines - 1}.end")
+
+    def iter_matches(self, pattern: Pattern, first_line: int = 1) -> Iterator[Tuple[str, str, 're.Match']]:
+        for line in range(first_line, self.line_count + 1, self.block_lines):
+            yield from iter_block_matches(pattern, self.read_block(line), line)
+
+    def find(self, pattern: Pattern, index: str = "insert", backwards: bool = False) -> Optional[Tuple[str, str]]:
+        line, col = (int(part) for part in str(self.widget.index(index)).split('.'))
+        total = self.line_count
+        if backwards:
+            starts = list(range(line, 0, -self.block_lines)) + list(range(total, line, -self.block_lines))
+            for first in starts:
+                block_first = max(1, first - self.block_lines + 1)
+                text = self.widget.get(f"{block_first}.0", f"{first}.end")
+                # Only matches ending before the cursor count in its own block.
+                limit = text.rfind('\n') + 1 + col if first == line else len(text)
+                found = None
+                for start, end, match in iter_block_matches(pattern, text, block_first):
+                    if match.end() > limit:
+                        break
+                    found = (start, end)
+                if found:
+                    return found
+            return None
+
+        first_text = self.read_block(line)
+        for start, end, _ in iter_block_matches(pattern, first_text, line, col):
+            return start, end
+        for first in list(range(line + self.block_lines, total + 1, self.block_lines)) + \
+                list(range(1, line + 1, self.block_lines)):
+            text = self.read_block(first)
+            for start, end, _ in iter_block_matches(pattern, text, first):
+                return start, end
+        return None
+
+
+class TextSearch(BlockSearch):
+    def __init__(self, widget, block_lines: int = BLOCK_LINES):
+        super().__init__(widget, block_lines)
+        self.match_count = 0
+        widget.tag_config(MATCH_TAG, background="#FFF59D", foreground="black")
+        widget.tag_config(CURRENT_TAG, background="#FFB74D", foreground="black")
+        widget.tag_raise(CURRENT_TAG)
+
+    def highlight_all(self, pattern: Pattern, on_done: Optional[Callable[[int], None]] = None):
+        # A generator meant for IdleScheduler: one block of lines per step.
+        self.clear_highlight()
+        count = 0
+        for line in range(1, self.line_count + 1, self.block_lines):
+            ranges = []
+            for start, end, _ in iter_block_matches(pattern, self.read_block(line), line):
+                ranges.extend((start, end))
+            if ranges:
+                self.widget.tag_add(MATCH_TAG, *ranges)
+                count += len(ranges) // 2
+            yield
+        self.match_count = count
+        if on_done:
+            on_done(count)
+
+    def clear_highlight(self):
+        self.widget.tag_remove(MATCH_TAG, "1.0", "end")
+        self.clear_current()
+        self.match_count = 0
+
+    def set_current(self, start: str, end: str):
+        self.clear_current()
+        self.widget.tag_add(CURRENT_TAG, start, end)
+
+    def clear_current(self):
+        self.widget.tag_remove(CURRENT_TAG, "1.0", "end")
+
+    def current_match(self, pattern: Pattern) -> Optional[Tuple[str, str, 're.Match']]:
+        ranges = self.widget.tag_ranges(CURRENT_TAG)
+        if not ranges:
+            return None
+        start, end = str(ranges[0]), str(ranges[1])
+        match = pattern.fullmatch(self.widget.get(start, end))
+        return (start, end, match) if match else None
+
+    def replace_all(self, pattern: Pattern, replacement: str, expand: bool = False) -> int:
+        matches: List[Tuple[str, str, str]] = [
+            (start, end, match.expand(replacement) if expand else replacement)
+            for start, end, match in self.iter_matches(pattern)
+        ]
+        if not matches:
+            return 0
+        # Later matches are replaced first so earlier indices stay valid; only
+        # the matched ranges change, so tags, marks and the cursor elsewhere
+        # are untouched.
+        for start, end, text in reversed(matches):
+            self.widget.replace(start, end, text)
+        logger.info(f"Replaced {len(matches)} matches")
+        return len(matches)
+
+    def replace_range(self, start: str, end: str, text: str):
+        self.widget.replace(start, end, text)
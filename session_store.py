@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import zlib
+import struct
+import logging
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+from file_operations import FileOperations
+from edit_tracker import TextEdit
+
+logger = logging.getLogger(__name__)
+
+SESSION_MAGIC = b'WRFS'
+SESSION_VERSION = 1
+# magic, version, flags, metadata length, compressed buffer length
+HEADER = struct.Struct('<4sHHIQ')
+FLAG_COMPRESSED = 1
+VISIBLE_LINES = 200
+RESTORE_CHUNK_SIZE = 64 * 1024
+
+
+def file_signature(filepath: Optional[str]) -> Optional[List[int]]:
+    try:
+        stat = os.stat(filepath)
+    except (OSError, TypeError):
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Session:
+    def __init__(self, text: str = "", meta: Optional[dict] = None):
+        self.text = text
+        self.meta = meta or {}
+
+    @property
+    def filepath(self) -> Optional[str]:
+        return self.meta.get('path')
+
+    @property
+    def is_modified(self) -> bool:
+        return bool(self.meta.get('modified'))
+
+    def is_stale(self) -> bool:
+        # The file on disk changed after the snapshot was taken.
+        return bool(self.filepath) and file_signature(self.filepath) != self.meta.get('signature')
+
+
+class SessionStore:
+    def __init__(self, path: str):
+        self.path = path
+
+    def save(self, text: str, meta: dict):
+        blob = zlib.compress(text.encode('utf-8'), 1)
+        data = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        header = HEADER.pack(SESSION_MAGIC, SESSION_VERSION, FLAG_COMPRESSED, len(data), len(blob))
+        FileOperations.atomic_write(self.path, lambda f: f.write(header + data + blob))
+        logger.info(f"Session saved: {len(text)} characters")
+
+    def load(self) -> Optional[Session]:
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            magic, version, flags, meta_length, length = HEADER.unpack_from(data)
+            if magic != SESSION_MAGIC or version != SESSION_VERSION:
+                return None
+            start = HEADER.size
+            meta = json.loads(data[start:start + meta_length].decode('utf-8'))
+            blob = data[start + meta_length:]
+            if len(blob) != length:
+                return None
+            if flags & FLAG_COMPRESSED:
+                blob = zlib.decompress(blob)
+            return Session(blob.decode('utf-8'), meta)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            logger.warning(f"Session snapshot unusable: {e}")
+            return None
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def split_for_restore(text: str, top_line: int, visible_lines: int = VISIBLE_LINES,
+                      chunk_size: int = RESTORE_CHUNK_SIZE) -> Tuple[str, List[str], List[str]]:
+    start = 0
+    for _ in range(max(0, top_line - 1)):
+        position = text.find('\n', start)
+        if position == -1:
+            break
+        start = position + 1
+    end = start
+    for _ in range(visible_lines):
+        position = text.find('\n', end)
+        if position == -1:
+            end = len(text)
+            break
+        end = position + 1
+
+    before = [text[i:min(i + chunk_size, start)] for i in range(0, start, chunk_size)]
+    after = [text[i:i + chunk_size] for i in range(end, len(text), chunk_size)]
+    return text[start:end], before, after
+
+
+class SessionRestorer:
+    # Puts the region that was on screen into the widget first, then fills
+    # in the text above and below it in frame-sized slices. The widget stays
+    # editable and scrollable meanwhile: whatever line is at the top of the
+    # view is kept there while text is prepended, and edits the user makes
+    # (reported through record) are translated to positions in the whole
+    # snapshot, so the editor can replay them once the fill is over.
+    def __init__(self, widget, session: Session,
+                 on_progress: Optional[Callable[[float], None]] = None,
+                 on_complete: Optional[Callable[[Optional[str], bool], None]] = None,
+                 frame_budget: float = 0.012):
+        self.widget = widget
+        self.session = session
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.frame_budget = frame_budget
+        self.pending: Deque[Tuple[str, str]] = deque()
+        self.total = max(1, len(session.text))
+        self.restored = 0
+        self.error = None
+        self.is_running = False
+        self.is_filling = False
+        self.edits: List[TextEdit] = []
+        self.scrolled = False
+        # Newlines in the text still to be prepended: widget line 1 is line
+        # head_lines + 1 of the snapshot.
+        self.head_lines = 0
+
+    def start(self):
+        top_line = int(str(self.session.meta.get('top', '1.0')).split('.')[0])
+        visible, before, after = split_for_restore(self.session.text, top_line)
+        self.pending = deque([('1.0', chunk) for chunk in reversed(before)] + [('end', chunk) for chunk in after])
+        self.head_lines = sum(chunk.count('\n') for chunk in before)
+
+        self.is_running = True
+        self.is_filling = True
+        try:
+            self.widget.insert('1.0', visible)
+        finally:
+            self.is_filling = False
+        self.widget.mark_set('session_top', '1.0')
+        self.widget.mark_gravity('session_top', 'right')
+        self.widget.yview('session_top')
+        self.restored = len(visible)
+        self.widget.after(1, self._drain)
+
+    def cancel(self):
+        if self.is_running:
+            self._finish(cancelled=True)
+
+    def record(self, edit: TextEdit):
+        # Called for every edit reported by the widget while the fill runs;
+        # the restorer's own inserts are ignored.
+        if self.is_filling or not self.is_running:
+            return
+        self.edits.append(TextEdit(edit.kind, self._to_session(edit.start), self._to_session(edit.end), edit.text))
+
+    def _to_session(self, position: Tuple[int, int]) -> Tuple[int, int]:
+        line, col = position
+        if line == 1:
+            col += self._head_col()
+        return line + self.head_lines, col
+
+    def _head_col(self) -> int:
+        # Length of the part of the snapshot's head_lines + 1-th line that
+        # is still waiting to be prepended.
+        col = 0
+        for index, chunk in self.pending:
+            if index != '1.0':
+                break
+            newline = chunk.rfind('\n')
+            if newline != -1:
+                return col + len(chunk) - newline - 1
+            col += len(chunk)
+        return col
+
+    def _drain(self):
+        if not self.is_running:
+            return
+
+        deadline = time.perf_counter() + self.frame_budget
+        prepended = False
+        if self.widget.compare('@0,0', '!=', 'session_top'):
+            self.scrolled = True
+        self.widget.mark_set('session_top', '@0,0')
+        self.is_filling = True
+        try:
+            while self.pending and time.perf_counter() < deadline:
+                index, text = self.pending.popleft()
+                self.widget.insert(index, text)
+                self.restored += len(text)
+                if index == '1.0':
+                    self.head_lines -= text.count('\n')
+                    prepended = True
+            if prepended:
+                self.widget.yview('session_top')
+        except Exception as e:
+            logger.error(f"Error restoring session: {e}")
+            self.error = str(e)
+            self.pending.clear()
+        finally:
+            self.is_filling = False
+
+        if not self.pending:
+            self._finish(cancelled=False)
+            return
+        if self.on_progress:
+            self.on_progress(min(1.0, self.restored / self.total))
+        self.widget.after(1, self._drain)
+
+    def _finish(self, cancelled: bool):
+        self.is_running = False
+        self.pending.clear()
+        if self.widget.compare('@0,0', '!=', 'session_top'):
+            self.scrolled = True
+        self.widget.mark_unset('session_top')
+        if not cancelled and not self.error and not self.scrolled and not self.edits:
+            self.widget.mark_set('insert', self.session.meta.get('cursor', '1.0'))
+            self.widget.yview(self.session.meta.get('top', '1.0'))
+        if self.on_complete:
+            self.on_complete(self.error, cancelled)
@@ -0,0 +1,146 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Optional
+from edit_tracker import TextEdit
+
+logger = logging.getLogger(__name__)
+
+SPELLING_TAG = 'spell_error'
+GRAMMAR_TAG = 'grammar_error'
+CACHE_SIZE = 20000
+
+
+class SpellIssue:
+    __slots__ = ('start', 'end', 'message', 'replacements', 'is_spelling')
+
+    def __init__(self, start: int, end: int, message: str, replacements: List[str], is_spelling: bool):
+        self.start = start
+        self.end = end
+        self.message = message
+        self.replacements = replacements
+        self.is_spelling = is_spelling
+
+    @classmethod
+    def from_match(cls, match) -> 'SpellIssue':
+        # language_tool_python 3 renamed errorLength/ruleIssueType.
+        length = getattr(match, 'error_length', None)
+        if length is None:
+            length = match.errorLength
+        issue_type = getattr(match, 'rule_issue_type', None) or getattr(match, 'ruleIssueType', '')
+        return cls(match.offset, match.offset + length, match.message,
+                   list(match.replacements[:5]), issue_type == 'misspelling')
+
+
+class DirtyLines:
+    # One flag per document line, set when the line changed since it was
+    # last checked; kept in step with the edits like WordCounter's arrays.
+    def __init__(self):
+        self.flags = bytearray(b'\x01')
+
+    def reset(self, line_count: int):
+        self.flags = bytearray(b'\x01') * line_count
+
+    def apply(self, edit: TextEdit):
+        first = edit.start[0]
+        if edit.kind == 'insert':
+            old_last, new_last = first, edit.end[0]
+        else:
+            old_last, new_last = edit.end[0], first
+        self.flags[first - 1:old_last] = b'\x01' * (new_last - first + 1)
+
+    def mark_clean(self, line: int):
+        self.flags[line - 1] = 0
+
+    def iter_from(self, line: int) -> Iterator[int]:
+        # Dirty lines from `line` to the end, then from the top.
+        start = max(0, min(line - 1, len(self.flags)))
+        for first, last in ((start, len(self.flags)), (0, start)):
+            index = self.flags.find(1, first, last)
+            while index >= 0:
+                yield index + 1
+                index = self.flags.find(1, index + 1, last)
+
+
+class SpellChecker:
+    # A single LanguageTool instance lives on the worker thread for the whole
+    # session: starting it takes seconds. Results are cached per paragraph
+    # text (dict lookups use the hash str caches, so unchanged paragraphs
+    # cost nothing to find) and only paragraphs missing from the cache are
+    # sent to the worker; a newer request replaces one still waiting.
+    def __init__(self, language: str, cache_size: int = CACHE_SIZE):
+        self.language = language
+        self.cache_size = cache_size
+        self.cache: 'OrderedDict[str, List[SpellIssue]]' = OrderedDict()
+        self.condition = threading.Condition()
+        self.pending: Optional[List[str]] = None
+        self.on_done: Optional[Callable[[Optional[str]], None]] = None
+        self.thread = None
+        self.tool = None
+        self.stopped = False
+
+    def cached(self, text: str) -> Optional[List[SpellIssue]]:
+        if not text.strip():
+            return []
+        with self.condition:
+            issues = self.cache.get(text)
+            if issues is not None:
+                self.cache.move_to_end(text)
+            return issues
+
+    def submit(self, paragraphs: List[str], on_done: Callable[[Optional[str]], None]):
+        with self.condition:
+            self.pending = paragraphs
+            self.on_done = on_done
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or self.stopped)
+                if self.stopped:
+                    break
+                paragraphs, self.pending = self.pending, None
+                on_done = self.on_done
+
+            error = None
+            try:
+                self._check(paragraphs)
+            except Exception as e:
+                logger.error(f"Spell check failed: {e}")
+                error = str(e)
+            if on_done and not self.stopped:
+                on_done(error)
+            if error:
+                break
+
+        if self.tool is not None:
+            try:
+                self.tool.close()
+            except Exception:
+                pass
+            self.tool = None
+
+    def _check(self, paragraphs: List[str]):
+        if self.tool is None:
+            import language_tool_python
+            self.tool = language_tool_python.LanguageTool(self.language)
+            logger.info(f"LanguageTool started for {self.language}")
+        for text in paragraphs:
+            if self.stopped:
+                return
+            if self.cached(text) is not None:
+                continue
+            issues = [SpellIssue.from_match(match) for match in self.tool.check(text)]
+            with self.condition:
+                self.cache[text] = issues
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
@@ -140,12 +140,529 @@ def test_file_operations():
             print("✗ get_file_extension возвращает неверное значение")
             return False
         
+        # Тест сохранения и чтения DOCX
+        import tempfile
+        text = "Первый абзац\n\n\tс табуляцией & <символами>\n  пробелы  "
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "test.docx")
+            FileOperations.save_docx(filepath, text, {'font_name': 'Arial', 'font_size': 14})
+            streamed = FileOperations.open_docx(filepath)
+            parsed = '\n'.join(FileOperations.iter_docx_paragraphs_dom(filepath))
+            if streamed != text or parsed != text:
+                print("✗ DOCX читается не так, как был сохранен")
+                return False
+            print("✓ save_docx/open_docx работают")
+            
+            targets = [os.path.join(tmp, name) for name in ("out.html", "out.md", "out.pdf")]
+            FileOperations.export_paragraphs(FileOperations.iter_paragraphs(filepath), targets)
+            with open(targets[0], encoding='utf-8') as f:
+                html_text = f.read()
+            if "<p>\tс табуляцией &amp; &lt;символами&gt;</p>" not in html_text \
+                    or FileOperations.open_html(targets[0]) != text or FileOperations.open_txt(targets[1]) != text:
+                print("✗ Экспорт в несколько форматов работает неверно")
+                return False
+        print("✓ export_paragraphs работает")
+        
         return True
     except Exception as e:
         print(f"✗ Ошибка в FileOperations: {e}")
         return False
 
 
+def test_edit_journal():
+    """Проверка журнала правок и восстановления"""
+    print("\nТестирование журнала правок...")
+    
+    import tempfile
+    from edit_tracker import TextEdit
+    from edit_journal import EditJournal, apply_records
+    
+    try:
+        records = [['i', 1, 6, ' мир\nновая'], ['d', 1, 0, 1, 1]]
+        if apply_records("привет", records) != "ривет мир\nновая":
+            print("✗ apply_records возвращает неверный текст")
+            return False
+        print("✓ apply_records работает")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "doc.txt")
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write("abc")
+            
+            journal = EditJournal(os.path.join(tmp, ".journal"), filepath)
+            journal.start()
+            journal.record(TextEdit('insert', (1, 3), (2, 1), "\nd"))
+            journal.flush()
+            journal.close()
+            
+            recovered = EditJournal.recover(journal.path)
+            if recovered is None or recovered[1] != "abc\nd":
+                print("✗ Восстановление из журнала не работает")
+                return False
+            print("✓ Восстановление из журнала работает")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в журнале правок: {e}")
+        return False
+
+
+def test_session_store():
+    """Проверка снимка сеанса"""
+    print("\nТестирование снимка сеанса...")
+    
+    import tempfile
+    from session_store import SessionStore, split_for_restore
+    
+    try:
+        text = "\n".join(f"строка {i}" for i in range(1, 1001))
+        visible, before, after = split_for_restore(text, 500, visible_lines=10, chunk_size=100)
+        if not visible.startswith("строка 500\n") or "".join(before) + visible + "".join(after) != text:
+            print("✗ Разбиение текста для восстановления неверно")
+            return False
+        print("✓ Видимая область восстанавливается первой")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SessionStore(os.path.join(tmp, ".session"))
+            store.save(text, {'path': None, 'modified': True, 'cursor': '500.3', 'chat': [["привет", "user"]]})
+            session = store.load()
+            if session is None or session.text != text or session.meta['cursor'] != '500.3' or not session.is_modified:
+                print("✗ Снимок сеанса читается неверно")
+                return False
+            store.clear()
+            if store.load() is not None:
+                print("✗ Снимок сеанса не удаляется")
+                return False
+            print("✓ Снимок сеанса сохраняется и читается")
+        
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в снимке сеанса: {e}")
+        return False
+
+
+def test_word_counter():
+    """Проверка инкрементального счетчика слов"""
+    print("\nТестирование счетчика слов...")
+    
+    from edit_tracker import TextEdit
+    from word_counter import WordCounter
+    
+    try:
+        buffer = ["один два\nтри"]
+        
+        def get_lines(first, last):
+            lines = buffer[0].split('\n')
+            return '\n'.join(lines[first - 1:last])
+        
+        counter = WordCounter(get_lines)
+        counter.reset(buffer[0])
+        buffer[0] = "один два четыре\nпять\nтри"
+        counter.apply(TextEdit('insert', (1, 8), (2, 4), " четыре\nпять"))
+        buffer[0] = "одинпять\nтри"
+        counter.apply(TextEdit('delete', (1, 4), (2, 0), " два четыре\n"))
+        if (counter.words, counter.chars) != (len(buffer[0].split()), len(buffer[0])):
+            print("✗ Счетчик слов расходится с текстом")
+            return False
+        print("✓ Счетчик обновляется только по измененным строкам")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в счетчике слов: {e}")
+        return False
+
+
+def test_search():
+    """Проверка поиска"""
+    print("\nТестирование поиска...")
+    
+    from search_engine import build_pattern, iter_block_matches
+    
+    try:
+        text = "Кот и котик\nкот"
+        pattern = build_pattern("кот", whole_word=True)
+        ranges = [(start, end) for start, end, _ in iter_block_matches(pattern, text, 10)]
+        if ranges != [("10.0", "10.3"), ("11.0", "11.3")]:
+            print(f"✗ Неверные позиции совпадений: {ranges}")
+            return False
+        pattern = build_pattern(r"к(о)т\w*", regex=True, case_sensitive=True)
+        if [match.group(0) for _, _, match in iter_block_matches(pattern, text, 1)] != ["котик", "кот"]:
+            print("✗ Регулярные выражения работают неверно")
+            return False
+        print("✓ Поиск с параметрами работает")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в поиске: {e}")
+        return False
+
+
+def test_document_model():
+    """Проверка модели документа"""
+    print("\nТестирование модели документа...")
+    
+    from edit_tracker import TextEdit
+    from document_model import DocumentModel
+    
+    try:
+        model = DocumentModel("\n".join(f"строка {i}" for i in range(1, 11)), block_lines=3)
+        snapshot = model.snapshot()
+        model.apply(TextEdit('insert', (2, 6), (3, 1), "\nX"))
+        model.apply(TextEdit('delete', (5, 0), (9, 0), ""))
+        expected = snapshot.get_text().split("\n")
+        expected[1:2] = ["строка", "X 2"]
+        del expected[4:8]
+        if model.get_text() != "\n".join(expected) or model.line(3) != "X 2" or model.line_count != len(expected):
+            print("✗ Модель документа расходится с текстом")
+            return False
+        if snapshot.line_count != 10 or snapshot.line(2) != "строка 2":
+            print("✗ Снимок изменился вместе с документом")
+            return False
+        print("✓ Правки применяются, снимки неизменны")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в модели документа: {e}")
+        return False
+
+
+def test_virtual_document():
+    """Проверка загрузки модели для больших файлов"""
+    print("\nТестирование загрузки модели по частям...")
+    
+    from document_model import DocumentModel
+    from search_engine import BlockSearch, build_pattern
+    from virtual_editor import DocumentText, VirtualEditor
+    
+    try:
+        text = "\n".join(f"строка {i}" for i in range(1, 101))
+        chunks = [(text[i:i + 7], i + 7) for i in range(0, len(text), 7)]
+        model = DocumentModel(block_lines=8)
+        model.load_chunks(chunks)
+        if model.get_text() != text or model.line_count != 100 or model.char_count != len(text):
+            print("✗ Модель, собранная по частям, расходится с текстом")
+            return False
+        search = BlockSearch(DocumentText(model), block_lines=10)
+        pattern = build_pattern("строка 9", whole_word=True)
+        if search.find(pattern, "50.0") != ("9.0", "9.8") or search.find(pattern, "50.0", backwards=True) != ("9.0", "9.8"):
+            print("✗ Поиск по модели работает неверно")
+            return False
+        print("✓ Модель собирается по частям, поиск идет по всему документу")
+        
+        class FakeText:
+            # Just enough of the Tk text API for VirtualEditor.show
+            def __init__(self):
+                self.content = ""
+            
+            def index(self, index):
+                if index == "end-1c":
+                    lines = self.content.split("\n")
+                    return f"{len(lines)}.{len(lines[-1])}"
+                return "1.0" if index.startswith("@") else index
+            
+            def delete(self, start, end):
+                self.content = ""
+            
+            def insert(self, index, text):
+                self.content = text
+            
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: None
+        
+        class FakeBox:
+            _textbox = FakeText()
+            _y_scrollbar = FakeText()
+        
+        line = "".join(f"{i:07d}," for i in range(100000))
+        model = DocumentModel(line)
+        box = FakeBox()
+        virtual = VirtualEditor(box, model, window_chars=10000)
+        virtual.open(1, 400000)
+        window = box._textbox.content
+        if len(window) > 10000 or virtual.first_col + window.find("0050000,") != 400000:
+            print("✗ Окно документа из одной длинной строки не ограничено по символам")
+            return False
+        if virtual.to_document("1.0") != (1, virtual.first_col) or not virtual.contains(1, 400000):
+            print("✗ Позиции в окне длинной строки пересчитываются неверно")
+            return False
+        print("✓ Окно длинной строки ограничено по символам")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка при загрузке модели: {e}")
+        return False
+
+
+def test_undo_history():
+    """Проверка истории отмены"""
+    print("\nТестирование истории отмены...")
+    
+    from edit_tracker import TextEdit, end_of_insert
+    from document_model import DocumentModel
+    from undo_history import UndoHistory
+    
+    try:
+        model = DocumentModel("")
+        history = UndoHistory()
+        
+        def apply(edit):
+            model.apply(edit)
+            history.record(edit)
+        
+        position = (1, 0)
+        for char in "один два":
+            edit = TextEdit('insert', position, end_of_insert(position, char), char)
+            apply(edit)
+            position = edit.end
+        with history.group():
+            apply(TextEdit('delete', (1, 0), (1, 4), "один"))
+            apply(TextEdit('insert', (1, 0), (1, 3), "три"))
+        if len(history.undo_steps) != 3 or model.get_text() != "три два":
+            print("✗ Набор текста не объединяется в шаги отмены")
+            return False
+        history.undo(apply)
+        history.undo(apply)
+        if model.get_text() != "один ":
+            print("✗ Отмена восстанавливает неверный текст")
+            return False
+        history.redo(apply)
+        if model.get_text() != "один два" or len(history.redo_steps) != 1:
+            print("✗ Повтор работает неверно")
+            return False
+        print("✓ Набор объединяется по словам, замена AI отменяется одним шагом")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в истории отмены: {e}")
+        return False
+
+
+def test_rich_text():
+    """Проверка хранилища форматирования"""
+    print("\nТестирование форматирования текста...")
+    
+    from rich_text import SpanStore, PLAIN, style_with, styled_paragraphs
+    
+    try:
+        text = "жирный текст\nвторой абзац"
+        store = SpanStore()
+        store.activate(len(text))
+        bold = style_with(PLAIN, 'bold', True)
+        changes = store.apply(0, 6, lambda style: style_with(style, 'bold', True))
+        store.insert(3, 2)
+        store.insert(8, 1)
+        store.delete(0, 1)
+        if changes != [(0, 6, PLAIN, bold)] or store.snapshot() != [(7, bold), (len(text) - 5, PLAIN)]:
+            print("✗ Правки сдвигают форматирование неверно")
+            return False
+        store = SpanStore()
+        store.activate(len(text))
+        store.apply(0, 6, lambda style: style_with(style, 'bold', True))
+        store.apply(13, 25, lambda style: style_with(style, 'align', 'center'))
+        paragraphs = list(styled_paragraphs(text.split("\n"), store.snapshot()))
+        if paragraphs[0].runs != [("жирный", bold), (" текст", PLAIN)] or \
+                paragraphs[1].paragraph_style != (('align', 'center'),):
+            print("✗ Абзацы для DOCX собраны неверно")
+            return False
+        print("✓ Стили хранятся отрезками и сохраняются в абзацы DOCX")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в форматировании: {e}")
+        return False
+
+
+def test_spell_checker():
+    """Проверка фоновой проверки орфографии"""
+    print("\nТестирование проверки орфографии...")
+    
+    import threading
+    from edit_tracker import TextEdit
+    from spell_checker import SpellChecker, DirtyLines
+    
+    class FakeMatch:
+        def __init__(self, offset):
+            self.offset = offset
+            self.errorLength = 3
+            self.message = "typo"
+            self.replacements = ["the"]
+            self.ruleIssueType = "misspelling"
+    
+    class FakeTool:
+        def __init__(self):
+            self.checked = []
+        
+        def check(self, text):
+            self.checked.append(text)
+            return [FakeMatch(text.find("teh"))] if "teh" in text else []
+        
+        def close(self):
+            pass
+    
+    try:
+        checker = SpellChecker("ru-RU")
+        # The worker drops checker.tool when it stops, so the fake is kept here.
+        tool = FakeTool()
+        checker.tool = tool
+        done = threading.Event()
+        checker.submit(["teh cat", "ok", "teh cat"], lambda error: done.set())
+        done.wait(5)
+        checker.close()
+        issues = checker.cached("teh cat")
+        if tool.checked != ["teh cat", "ok"] or not issues or (issues[0].start, issues[0].end) != (0, 3):
+            print("✗ Результаты проверки не кэшируются по абзацам")
+            return False
+        lines = DirtyLines()
+        lines.reset(4)
+        for line in (1, 2, 3, 4):
+            lines.mark_clean(line)
+        lines.apply(TextEdit('insert', (2, 1), (3, 0), "\n"))
+        if list(lines.iter_from(1)) != [2, 3] or len(lines.flags) != 5:
+            print("✗ Измененные строки отслеживаются неверно")
+            return False
+        print("✓ Проверяются только измененные абзацы, результаты кэшируются")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в проверке орфографии: {e}")
+        return False
+
+
+def test_document_tabs():
+    """Проверка выгрузки неактивных вкладок"""
+    print("\nТестирование вкладок...")
+    
+    import time
+    import zlib
+    import tempfile
+    from document_model import DocumentModel
+    from document_tabs import TabStore, DocumentTab
+    
+    class FakeWidget:
+        def __init__(self):
+            self.calls = []
+        
+        def after(self, ms, callback, *args):
+            self.calls.append((callback, args))
+    
+    try:
+        widget = FakeWidget()
+        with tempfile.TemporaryDirectory() as spill_dir:
+            texts = [f"документ {i}\n" * 50 * (i + 1) for i in range(3)]
+            # Room for the second tab's packed text only.
+            limit = len(zlib.compress(texts[1].encode('utf-8'), 1))
+            store = TabStore(widget, spill_dir, idle_timeout=0, memory_limit=limit)
+            for text in texts:
+                tab = DocumentTab()
+                tab.document = DocumentModel(text)
+                store.add(tab)
+            store.activate(store.tabs[2])
+            store.tabs[2].document = None
+            
+            for tab in store.idle_tabs():
+                store.pack(tab)
+            deadline = time.time() + 5
+            while len(widget.calls) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            for callback, args in widget.calls:
+                callback(*args)
+            
+            states = [tab.state for tab in store.tabs]
+            if states != ['spilled', 'packed', 'resident'] or len(os.listdir(spill_dir)) != 1:
+                print(f"✗ Вкладки выгружены неверно: {states}")
+                return False
+            if [store.text(tab) for tab in store.tabs[:2]] != texts[:2]:
+                print("✗ Текст выгруженной вкладки не восстановлен")
+                return False
+            store.release(store.tabs[0])
+            store.close()
+            if os.listdir(spill_dir) or store.tabs[0].state != 'resident':
+                print("✗ Файлы выгруженных вкладок не удалены")
+                return False
+        print("✓ Неактивные вкладки сжимаются и сбрасываются на диск")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка во вкладках: {e}")
+        return False
+
+
+def test_outline_index():
+    """Проверка структуры документа"""
+    print("\nТестирование структуры документа...")
+    
+    from edit_tracker import TextEdit
+    from document_model import DocumentModel
+    from outline_index import OutlineIndex, heading_level
+    
+    try:
+        levels = [heading_level(line) for line in
+                  ("# Введение", "### Детали", "2.3 Область", "ГЛАВА 1", "2024 год был удачным", "Обычный текст.")]
+        if levels != [1, 3, 2, 1, 0, 0]:
+            print(f"✗ Заголовки распознаны неверно: {levels}")
+            return False
+        
+        text = "# Введение\nтекст\n1. Раздел\nтекст"
+        document = DocumentModel(text)
+        outline = OutlineIndex(document.text_lines)
+        outline.reset(text)
+        for edit in (TextEdit('insert', (2, 0), (4, 0), "абзац\nПРИЛОЖЕНИЕ\n"),
+                     TextEdit('delete', (1, 0), (2, 0), "# Введение\n")):
+            document.apply(edit)
+            outline.apply(edit)
+        if outline.headings() != [(2, 1), (4, 1)]:
+            print(f"✗ Структура после правок неверна: {outline.headings()}")
+            return False
+        print("✓ Заголовки находятся и обновляются по правкам")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в структуре документа: {e}")
+        return False
+
+
+def test_response_cache():
+    """Проверка кэша AI ответов"""
+    print("\nТестирование кэша AI ответов...")
+    
+    import tempfile
+    from ai_assistant import AIAssistant
+    from response_cache import ResponseCache
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            key = ResponseCache.cache_key("gemini-pro", {"temperature": 0.2}, "Исправь: превед")
+            if key == ResponseCache.cache_key("gemini-pro", {"temperature": 0.9}, "Исправь: превед"):
+                print("✗ Температура не влияет на ключ кэша")
+                return False
+            
+            cache = ResponseCache(tmp)
+            cache.put(key, "Привет")
+            cache.close()
+            reopened = ResponseCache(tmp)
+            if reopened.get(key) != "Привет":
+                print("✗ Ответ не сохранился на диске")
+                return False
+            reopened.clear()
+            if reopened.get(key) is not None:
+                print("✗ Очистка кэша не удаляет ответы")
+                return False
+            reopened.put(key, "Привет")
+            reopened.ttl = -1
+            reopened.memory.clear()
+            if reopened.get(key) is not None:
+                print("✗ Устаревший ответ возвращен из кэша")
+                return False
+            reopened.close()
+            print("✓ Ответы сохраняются на диске и устаревают по сроку")
+            
+            assistant = AIAssistant("", temperature=0.9, cache=ResponseCache(tmp))
+            if not assistant.uses_cache() or assistant.uses_cache(creative=True):
+                print("✗ Творческие действия при высокой температуре не обходят кэш")
+                return False
+            assistant.force_cache = True
+            if not assistant.uses_cache(creative=True):
+                print("✗ cache_creative_ai_responses не учитывается")
+                return False
+            assistant.cache.close()
+            print("✓ Творческие действия обходят кэш")
+        return True
+    except Exception as e:
+        print(f"✗ Ошибка в кэше AI ответов: {e}")
+        return False
+
+
 def test_dependencies():
     """Проверка зависимостей"""
     print("\nПроверка зависимостей...")
@@ -183,6 +700,18 @@ def main():
     results.append(("Зависимости", test_dependencies()))
     results.append(("AI Ассистент", test_ai_assistant()))
     results.append(("Файловые операции", test_file_operations()))
+    results.append(("Журнал правок", test_edit_journal()))
+    results.append(("Снимок сеанса", test_session_store()))
+    results.append(("Счетчик слов", test_word_counter()))
+    results.append(("Поиск", test_search()))
+    results.append(("Модель документа", test_document_model()))
+    results.append(("Большие файлы", test_virtual_document()))
+    results.append(("История отмены", test_undo_history()))
+    results.append(("Форматирование", test_rich_text()))
+    results.append(("Орфография", test_spell_checker()))
+    results.append(("Вкладки", test_document_tabs()))
+    results.append(("Структура", test_outline_index()))
+    results.append(("Кэш AI", test_response_cache()))
     
     # Результаты
     print("\n" + "=" * 50)
@@ -11,6 +11,7 @@ class AIPanel(ctk.CTkFrame):
         self.message_count = 0
         self.has_history = False
         self.placeholder_active = False
+        self.messages = []
         
         self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -169,6 +170,7 @@ class AIPanel(ctk.CTkFrame):
                 formatted_message = f"ℹ️ {message}"
         self.chat_display.insert("end", formatted_message, tag)
         self.chat_display.see("end")
+        self.messages.append((message, sender))
         self.chat_display.configure(state="disabled")
         self.has_history = self.message_count > 0
         self.update_message_count_label()
@@ -189,6 +191,7 @@ class AIPanel(ctk.CTkFrame):
         self.chat_display.configure(state="normal")
         self.chat_display.delete("1.0", "end")
         self.chat_display.configure(state="disabled")
+        self.messages = []
         self.message_count = 0
         self.has_history = False
         self.update_message_count_label()
@@ -339,15 +342,58 @@ class StatusBar(ctk.CTkFrame):
         self.save_status_label = ctk.CTkLabel(self, text="")
         self.save_status_label.pack(side="left", padx=10)
         
+        self.cache_label = ctk.CTkLabel(self, text="")
+        self.cache_label.pack(side="left", padx=10)
+        
         self.ai_status_label = ctk.CTkLabel(self, text="")
         self.ai_status_label.pack(side="right", padx=10)
-    
+
+        self.cancel_callback = None
+        self.cancel_btn = ctk.CTkButton(
+            self,
+            text="✕",
+            width=28,
+            height=22,
+            fg_color="transparent",
+            border_width=1,
+            text_color=("gray10", "gray90"),
+            command=self.cancel_progress
+        )
+        self.progress_bar = ctk.CTkProgressBar(self, width=160, height=10)
+        self.progress_bar.set(0)
+        self.progress_visible = False
+
+    def show_progress(self, fraction: float, cancel_callback: Optional[Callable] = None):
+        if not self.progress_visible:
+            self.cancel_btn.pack(side="right", padx=(0, 10))
+            self.progress_bar.pack(side="right", padx=5)
+            self.progress_visible = True
+        if cancel_callback is not None:
+            self.cancel_callback = cancel_callback
+        self.progress_bar.set(max(0.0, min(1.0, fraction)))
+
+    def hide_progress(self):
+        if self.progress_visible:
+            self.progress_bar.pack_forget()
+            self.cancel_btn.pack_forget()
+            self.progress_visible = False
+        self.cancel_callback = None
+        self.progress_bar.set(0)
+
+    def cancel_progress(self):
+        if callable(self.cancel_callback):
+            self.cancel_callback()
+
     def update_counts(self, text: str):
-        words = len(text.split())
-        chars = len(text)
+        self.set_counts(len(text.split()), len(text))
+    
+    def set_counts(self, words: int, chars: int):
         self.word_count_label.configure(text=f"Слов: {words}")
         self.char_count_label.configure(text=f"Символов: {chars}")
     
+    def set_cache_stats(self, hits: int, misses: int):
+        self.cache_label.configure(text=f"Кэш: {hits} попад. / {misses} пром.")
+    
     def set_save_status(self, status: str):
         self.save_status_label.configure(text=status)
     
@@ -355,6 +401,126 @@ class StatusBar(ctk.CTkFrame):
         self.ai_status_label.configure(text=status)
 
 
+class OutlinePanel(ctk.CTkFrame):
+    def __init__(self, parent, on_jump: Callable[[int], None]):
+        super().__init__(parent, width=220)
+        self.on_jump = on_jump
+        self.is_visible = False
+        # Document line of each entry, in the order they are listed.
+        self.lines = []
+        
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        
+        ctk.CTkLabel(
+            self,
+            text="📑 Структура",
+            font=ctk.CTkFont(size=14, weight="bold")
+        ).grid(row=0, column=0, padx=10, pady=(10, 5), sticky="w")
+        
+        self.list_display = ctk.CTkTextbox(
+            self,
+            width=220,
+            wrap="none",
+            font=ctk.CTkFont(size=12),
+            cursor="hand2"
+        )
+        self.list_display.grid(row=1, column=0, padx=5, pady=(0, 5), sticky="nsew")
+        # CTkTextbox refuses tag fonts, the underlying Tk widget takes them.
+        self.top_font = ctk.CTkFont(size=12, weight="bold")
+        self.list_display._textbox.tag_config("top", font=self.top_font)
+        self.list_display._textbox.tag_config("empty", foreground="gray50")
+        self.list_display.bind("<Button-1>", self._on_click)
+        self.list_display.configure(state="disabled")
+    
+    def set_headings(self, headings: list):
+        # headings: (line, level, title) in document order.
+        self.lines = [line for line, _, _ in headings]
+        self.list_display.configure(state="normal")
+        self.list_display.delete("1.0", "end")
+        if headings:
+            for row, (_, level, title) in enumerate(headings):
+                prefix = "\n" if row else ""
+                self.list_display.insert("end", prefix + "    " * (level - 1) + title, "top" if level == 1 else ())
+        else:
+            self.list_display.insert("1.0", "Заголовки не найдены", "empty")
+        self.list_display.configure(state="disabled")
+    
+    def _on_click(self, event):
+        row = int(str(self.list_display.index(f"@{event.x},{event.y}")).split('.')[0]) - 1
+        if 0 <= row < len(self.lines):
+            self.on_jump(self.lines[row])
+        return "break"
+
+
+class TabBar(ctk.CTkScrollableFrame):
+    def __init__(self, parent, on_select: Callable, on_close: Callable, on_new: Callable):
+        super().__init__(parent, orientation="horizontal", height=34)
+        self.on_select = on_select
+        self.on_close = on_close
+        # key -> (frame, button); buttons are rebuilt only when the set of
+        # tabs changes, a changed label or active tab just reconfigures them.
+        self.buttons = {}
+        self.labels = {}
+        self.active = None
+
+        self.new_btn = ctk.CTkButton(
+            self,
+            text="＋",
+            width=28,
+            height=26,
+            fg_color="transparent",
+            text_color=("gray10", "gray90"),
+            hover_color=("gray70", "gray30"),
+            command=on_new
+        )
+        self.new_btn.pack(side="right", padx=2)
+
+    def set_tabs(self, tabs: list, active):
+        keys = [key for key, _ in tabs]
+        if keys != list(self.buttons):
+            for frame, _ in self.buttons.values():
+                frame.destroy()
+            self.buttons = {}
+            self.labels = {}
+            self.active = None
+            for key in keys:
+                frame = ctk.CTkFrame(self, fg_color="transparent")
+                frame.pack(side="left", padx=2)
+                button = ctk.CTkButton(
+                    frame,
+                    text="",
+                    height=26,
+                    border_width=1,
+                    command=lambda k=key: self.on_select(k)
+                )
+                button.pack(side="left")
+                ctk.CTkButton(
+                    frame,
+                    text="✕",
+                    width=24,
+                    height=26,
+                    fg_color="transparent",
+                    text_color=("gray10", "gray90"),
+                    hover_color=("gray70", "gray30"),
+                    command=lambda k=key: self.on_close(k)
+                ).pack(side="left")
+                self.buttons[key] = (frame, button)
+
+        for key, label in tabs:
+            if self.labels.get(key) != label:
+                self.labels[key] = label
+                self.buttons[key][1].configure(text=label if len(label) <= 28 else label[:27] + "…")
+
+        if active is not self.active:
+            for key, (_, button) in self.buttons.items():
+                if key is active:
+                    button.configure(fg_color=("#3B8ED0", "#1F6AA5"), text_color="white")
+                else:
+                    button.configure(fg_color="transparent", text_color=("gray10", "gray90"))
+            self.active = active
+
+
 class TemplateDialog(ctk.CTkToplevel):
     def __init__(self, parent, callback: Callable):
         super().__init__(parent)
@@ -770,6 +936,9 @@ class KeyboardShortcutsDialog(ctk.CTkToplevel):
                 ("Ctrl+O", "Открыть файл"),
                 ("Ctrl+S", "Сохранить"),
                 ("Ctrl+Shift+S", "Сохранить как"),
+                ("Ctrl+W", "Закрыть вкладку"),
+                ("Ctrl+Tab", "Следующая вкладка"),
+                ("Ctrl+Shift+Tab", "Предыдущая вкладка"),
             ]),
             ("Редактирование", [
                 ("Ctrl+Z", "Отменить"),
@@ -787,6 +956,7 @@ class KeyboardShortcutsDialog(ctk.CTkToplevel):
                 ("Ctrl+-", "Уменьшить масштаб"),
                 ("Ctrl+0", "Сбросить масштаб"),
                 ("F11", "Полноэкранный режим"),
+                ("Ctrl+Shift+O", "Структура документа"),
             ])
         ]
         
@@ -894,12 +1064,13 @@ class WelcomeDialog(ctk.CTkToplevel):
 
 
 class ProgressDialog(ctk.CTkToplevel):
-    def __init__(self, parent, message: str):
+    def __init__(self, parent, message: str, cancel_callback: Optional[Callable] = None):
         super().__init__(parent)
         self.title("Обработка")
-        self.geometry("400x150")
+        self.geometry("400x190" if cancel_callback else "400x150")
         self.transient(parent)
         self.resizable(False, False)
+        self.cancel_callback = cancel_callback
         
         ctk.CTkLabel(
             self,
@@ -910,6 +1081,7 @@ class ProgressDialog(ctk.CTkToplevel):
         self.progress = ctk.CTkProgressBar(self, mode="indeterminate")
         self.progress.pack(padx=40, pady=10, fill="x")
         self.progress.start()
+        self.determinate = False
         
         self.status_label = ctk.CTkLabel(
             self,
@@ -917,7 +1089,109 @@ class ProgressDialog(ctk.CTkToplevel):
             font=ctk.CTkFont(size=11)
         )
         self.status_label.pack(pady=5)
+        
+        if cancel_callback:
+            self.cancel_btn = ctk.CTkButton(
+                self,
+                text="Отмена",
+                width=100,
+                command=self.cancel
+            )
+            self.cancel_btn.pack(pady=5)
+            self.protocol("WM_DELETE_WINDOW", self.cancel)
+    
+    def set_progress(self, fraction: float, status: Optional[str] = None):
+        if not self.determinate:
+            self.progress.stop()
+            self.progress.configure(mode="determinate")
+            self.determinate = True
+        self.progress.set(max(0.0, min(1.0, fraction)))
+        if status is not None:
+            self.status_label.configure(text=status)
+    
+    def cancel(self):
+        if callable(self.cancel_callback):
+            self.cancel_btn.configure(state="disabled", text="Отмена...")
+            self.cancel_callback()
+            self.cancel_callback = None
     
     def close(self):
         self.progress.stop()
         self.destroy()
+
+
+class FindReplaceDialog(ctk.CTkToplevel):
+    def __init__(self, parent, on_find: Callable, on_replace: Callable, on_replace_all: Callable,
+                 on_change: Callable, on_close: Callable):
+        super().__init__(parent)
+        self.on_close = on_close
+        self.title("Найти и заменить")
+        self.geometry("440x300")
+        self.transient(parent)
+        self.resizable(False, False)
+        
+        ctk.CTkLabel(self, text="Найти:").pack(padx=15, pady=(10, 0), anchor="w")
+        self.find_entry = ctk.CTkEntry(self, width=410)
+        self.find_entry.pack(padx=15, pady=5)
+        self.find_entry.bind("<KeyRelease>", lambda e: on_change())
+        self.find_entry.bind("<Return>", lambda e: on_find(False))
+        self.find_entry.bind("<Shift-Return>", lambda e: on_find(True))
+        
+        ctk.CTkLabel(self, text="Заменить на:").pack(padx=15, pady=(5, 0), anchor="w")
+        self.replace_entry = ctk.CTkEntry(self, width=410)
+        self.replace_entry.pack(padx=15, pady=5)
+        
+        options_frame = ctk.CTkFrame(self, fg_color="transparent")
+        options_frame.pack(padx=15, pady=5, fill="x")
+        self.case_var = ctk.BooleanVar(value=False)
+        self.word_var = ctk.BooleanVar(value=False)
+        self.regex_var = ctk.BooleanVar(value=False)
+        for text, variable in (("Учитывать регистр", self.case_var),
+                               ("Слово целиком", self.word_var),
+                               ("Регулярное выражение", self.regex_var)):
+            ctk.CTkCheckBox(
+                options_frame,
+                text=text,
+                variable=variable,
+                command=on_change,
+                font=ctk.CTkFont(size=11)
+            ).pack(side="left", padx=(0, 10))
+        
+        btn_frame = ctk.CTkFrame(self, fg_color="transparent")
+        btn_frame.pack(padx=15, pady=10, fill="x")
+        for text, command in (("◀ Назад", lambda: on_find(True)),
+                              ("Далее ▶", lambda: on_find(False)),
+                              ("Заменить", on_replace),
+                              ("Заменить все", on_replace_all)):
+            ctk.CTkButton(btn_frame, text=text, width=95, command=command).pack(side="left", padx=(0, 8))
+        
+        self.status_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=ctk.CTkFont(size=11),
+            text_color=("gray40", "gray70")
+        )
+        self.status_label.pack(padx=15, pady=5, anchor="w")
+        
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.find_entry.focus_set()
+    
+    def get_query(self) -> str:
+        return self.find_entry.get()
+    
+    def get_replacement(self) -> str:
+        return self.replace_entry.get()
+    
+    def get_options(self) -> dict:
+        return {
+            'regex': self.regex_var.get(),
+            'case_sensitive': self.case_var.get(),
+            'whole_word': self.word_var.get()
+        }
+    
+    def set_status(self, text: str):
+        self.status_label.configure(text=text)
+    
+    def close(self):
+        self.on_close()
+        self.destroy()
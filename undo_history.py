@@ -0,0 +1,165 @@
+import sys
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, List, Optional
+from edit_tracker import TextEdit, end_of_insert
+
+logger = logging.getLogger(__name__)
+
+MAX_BYTES = 16 * 1024 * 1024
+COALESCE_TIMEOUT = 1.0
+EDIT_OVERHEAD = 96
+
+
+def invert(edit: TextEdit) -> TextEdit:
+    return TextEdit('delete' if edit.kind == 'insert' else 'insert', edit.start, edit.end, edit.text)
+
+
+class UndoStep:
+    __slots__ = ('edits', 'size', 'time', 'is_open')
+
+    def __init__(self, edit: Optional[TextEdit] = None):
+        self.edits: List[TextEdit] = []
+        self.size = 0
+        self.time = time.monotonic()
+        # Only a step made of a single typed or erased character run may
+        # still absorb the next keystroke.
+        self.is_open = edit is not None
+        if edit is not None:
+            self.add(edit)
+
+    def add(self, edit: TextEdit):
+        self.edits.append(edit)
+        self.size += sys.getsizeof(edit.text) + EDIT_OVERHEAD
+
+    def absorb(self, edit: TextEdit) -> bool:
+        # Extends the typing run with one more character: an insert right
+        # after the run, or a Backspace/Delete next to the erased range.
+        # Typing the start of a new word, a line break or a pause of
+        # COALESCE_TIMEOUT closes it.
+        last = self.edits[-1]
+        if (not self.is_open or edit.kind != last.kind or len(edit.text) != 1 or edit.text == '\n'
+                or time.monotonic() - self.time > COALESCE_TIMEOUT):
+            return False
+        if edit.kind == 'insert':
+            if edit.start != last.end or (last.text[-1].isspace() and not edit.text.isspace()):
+                return False
+            merged = TextEdit('insert', last.start, end_of_insert(last.start, last.text + edit.text),
+                              last.text + edit.text)
+        elif edit.end == last.start:
+            merged = TextEdit('delete', edit.start, end_of_insert(edit.start, edit.text + last.text),
+                              edit.text + last.text)
+        elif edit.start == last.start:
+            merged = TextEdit('delete', last.start, end_of_insert(last.start, last.text + edit.text),
+                              last.text + edit.text)
+        else:
+            return False
+        self.size += sys.getsizeof(merged.text) - sys.getsizeof(last.text)
+        self.edits[-1] = merged
+        self.time = time.monotonic()
+        return True
+
+
+class UndoHistory:
+    # Command history in document coordinates: every step keeps only the
+    # TextEdit deltas needed to revert it (the inserted or removed text),
+    # never a copy of the document. Undo and redo hand the edits to an
+    # apply callback, which performs them on the editor; edits arriving
+    # while that runs are not recorded. Steps are evicted oldest first once
+    # their total size exceeds max_bytes.
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_steps: Deque[UndoStep] = deque()
+        self.redo_steps: List[UndoStep] = []
+        self.size = 0
+        self.group_step: Optional[UndoStep] = None
+        self.group_depth = 0
+        self.is_replaying = False
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_steps)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_steps)
+
+    def clear(self):
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.size = 0
+        self.group_step = None
+
+    def record(self, edit: TextEdit):
+        if self.is_replaying:
+            return
+        self.redo_steps.clear()
+        if self.group_step is not None:
+            self.group_step.add(edit)
+            return
+        last = self.undo_steps[-1] if self.undo_steps else None
+        if last is not None:
+            size = last.size
+            if last.absorb(edit):
+                self.size += last.size - size
+                self._evict()
+                return
+            last.is_open = False
+        self._push(UndoStep(edit))
+
+    def break_run(self):
+        if self.undo_steps:
+            self.undo_steps[-1].is_open = False
+
+    @contextmanager
+    def group(self):
+        # Everything recorded inside the block becomes one undo step.
+        if self.group_depth == 0:
+            self.break_run()
+            self.group_step = UndoStep()
+        self.group_depth += 1
+        try:
+            yield
+        finally:
+            self.group_depth -= 1
+            if self.group_depth == 0:
+                step, self.group_step = self.group_step, None
+                if step is not None and step.edits:
+                    self._push(step)
+
+    def undo(self, apply: Callable[[TextEdit], None]) -> Optional[UndoStep]:
+        if not self.undo_steps:
+            return None
+        step = self.undo_steps.pop()
+        step.is_open = False
+        self.size -= step.size
+        self._replay([invert(edit) for edit in reversed(step.edits)], apply)
+        self.redo_steps.append(step)
+        return step
+
+    def redo(self, apply: Callable[[TextEdit], None]) -> Optional[UndoStep]:
+        if not self.redo_steps:
+            return None
+        step = self.redo_steps.pop()
+        self._replay(step.edits, apply)
+        self.undo_steps.append(step)
+        self.size += step.size
+        self._evict()
+        return step
+
+    def _replay(self, edits: List[TextEdit], apply: Callable[[TextEdit], None]):
+        self.is_replaying = True
+        try:
+            for edit in edits:
+                apply(edit)
+        finally:
+            self.is_replaying = False
+
+    def _push(self, step: UndoStep):
+        self.undo_steps.append(step)
+        self.size += step.size
+        self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and len(self.undo_steps) > 1:
+            self.size -= self.undo_steps.popleft().size
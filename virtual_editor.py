@@ -0,0 +1,322 @@
+import threading
+import logging
+from typing import Callable, Iterable, Optional, Tuple
+from document_model import DocumentModel
+from edit_tracker import TextEdit
+from word_counter import WordCounter
+from outline_index import OutlineIndex
+
+logger = logging.getLogger(__name__)
+
+WINDOW_LINES = 1500
+MARGIN_LINES = 300
+# The window is also capped by characters, so a document with few, very
+# long lines (minified JSON, logs) does not end up in the widget whole;
+# such a window may then start and end in the middle of a line.
+WINDOW_CHARS = 256 * 1024
+MARGIN_CHARS = 32 * 1024
+
+
+class ModelLoader:
+    # Reads a document into a DocumentModel (and its word counts and
+    # outline) on a worker thread; callbacks are delivered on the Tk thread.
+    # Mirrors the ChunkedLoader interface so the editor treats both the same
+    # way.
+    def __init__(self, widget, chunks: Iterable[Tuple[str, int]], total_bytes: int,
+                 on_progress: Optional[Callable[[float], None]] = None,
+                 on_complete: Optional[Callable[[Optional[DocumentModel], Optional[WordCounter],
+                                                 Optional[OutlineIndex], Optional[str], bool], None]] = None):
+        self.widget = widget
+        self.chunks = chunks
+        self.total_bytes = max(1, total_bytes)
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.cancel_event = threading.Event()
+        self.is_running = False
+        self.last_fraction = 0.0
+
+    def start(self):
+        self.is_running = True
+        self.widget.configure(state="disabled")
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.is_running:
+            self._finish(None, None, None, None, cancelled=True)
+
+    def _read(self):
+        model = DocumentModel()
+        counter = None
+        outline = None
+        error = None
+        try:
+            if model.load_chunks(self.chunks, self._report, self.cancel_event.is_set):
+                counter = WordCounter(model.text_lines)
+                counter.reset_lines(model.lines())
+                outline = OutlineIndex(model.text_lines)
+                outline.reset_lines(model.lines())
+        except Exception as e:
+            logger.error(f"Error loading document: {e}")
+            error = str(e)
+        if not self.cancel_event.is_set():
+            self.widget.after(0, self._finish, model if counter else None, counter, outline, error, False)
+
+    def _report(self, position: int):
+        fraction = min(1.0, position / self.total_bytes)
+        if self.on_progress and fraction - self.last_fraction >= 0.01:
+            self.last_fraction = fraction
+            self.widget.after(0, self._progress, fraction)
+
+    def _progress(self, fraction: float):
+        if self.is_running and self.on_progress:
+            self.on_progress(fraction)
+
+    def _finish(self, model, counter, outline, error, cancelled: bool):
+        if not self.is_running:
+            return
+        self.is_running = False
+        self.widget.configure(state="normal")
+        if self.on_complete:
+            self.on_complete(model, counter, outline, error, cancelled)
+
+
+class DocumentText:
+    # The index()/get() subset of the Tk text API over a DocumentModel, so
+    # BlockSearch can scan the whole document rather than the window.
+    def __init__(self, document: DocumentModel):
+        self.document = document
+
+    def _position(self, index: str) -> Tuple[int, int]:
+        line, col = index.split('.')
+        line = max(1, min(int(line), self.document.line_count))
+        text = self.document.line(line)
+        return line, len(text) if col == 'end' else min(int(col), len(text))
+
+    def index(self, index: str) -> str:
+        if index == "end-1c":
+            return f"{self.document.line_count}.end"
+        return "{}.{}".format(*self._position(index))
+
+    def get(self, start: str, end: str) -> str:
+        return self.document.get(self._position(start), self._position(end))
+
+
+class VirtualEditor:
+    # Editing mode for documents too large for the Tk text widget: the
+    # DocumentModel holds the text and only a window of at most window_lines
+    # lines and window_chars characters lives in the widget, starting at
+    # column first_col of document line first_line. Edits in the window are
+    # translated to document positions by the editor (translate); scrolling
+    # near either end of the window swaps in another slice of the document
+    # around the view.
+    KEY_BINDINGS = ('<Control-Home>', '<Control-End>')
+
+    def __init__(self, widget, document: DocumentModel,
+                 on_position: Optional[Callable[[int, int, int], None]] = None,
+                 window_lines: int = WINDOW_LINES, margin_lines: int = MARGIN_LINES,
+                 window_chars: int = WINDOW_CHARS, margin_chars: int = MARGIN_CHARS):
+        self.widget = widget
+        self.text = widget._textbox
+        self.scrollbar = widget._y_scrollbar
+        self.document = document
+        self.on_position = on_position
+        self.window_lines = window_lines
+        self.margin_lines = margin_lines
+        self.window_chars = window_chars
+        self.margin_chars = margin_chars
+        self.first_line = 1
+        self.first_col = 0
+        # Whether the window was cut short by window_chars at either end;
+        # such an end is approached by characters rather than lines.
+        self.clipped_start = False
+        self.clipped_end = False
+        self.shown_top = (1, 0)
+        self.is_swapping = False
+        self.swap_pending = False
+
+    def open(self, line: int = 1, col: int = 0):
+        self.text.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.configure(command=self._on_scrollbar)
+        for sequence in self.KEY_BINDINGS:
+            self.text.bind(sequence, self._on_key)
+        self.show(line, line, col, col)
+
+    def close(self):
+        for sequence in self.KEY_BINDINGS:
+            self.text.unbind(sequence)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.text.yview)
+        self._replace_window("", 1, 0)
+
+    @property
+    def window_count(self) -> int:
+        return int(str(self.text.index("end-1c")).split('.')[0])
+
+    def translate(self, edit: TextEdit) -> TextEdit:
+        return TextEdit(edit.kind, self._shift(*edit.start), self._shift(*edit.end), edit.text)
+
+    def to_document(self, index: str) -> Tuple[int, int]:
+        line, col = str(self.text.index(index)).split('.')
+        return self._shift(int(line), int(col))
+
+    def to_widget(self, line: int, col: int) -> str:
+        if line == self.first_line:
+            col -= self.first_col
+        return f"{line - self.first_line + 1}.{col}"
+
+    def contains(self, line: int, col: int = 0) -> bool:
+        return (self.first_line, self.first_col) <= (line, col) <= self.to_document("end-1c")
+
+    def reveal(self, line: int, col: int = 0) -> str:
+        # Makes a document position part of the window and returns its
+        # widget index.
+        if not self.contains(line, col):
+            self.show(line, line, col, col)
+        return self.to_widget(line, col)
+
+    def goto(self, line: int, col: int = 0):
+        index = self.reveal(line, col)
+        self.text.mark_set("insert", index)
+        self.text.see(index)
+
+    def show(self, top: int, cursor_line: int, cursor_col: int = 0, top_col: int = 0):
+        total = self.document.line_count
+        first = max(1, min(top - self.window_lines // 2, total - self.window_lines + 1))
+        last = min(total, first + self.window_lines - 1)
+        top = min(max(first, top), last)
+        lines = list(self.document.lines(first, last))
+        anchor = top - first
+        anchor_col = min(top_col, len(lines[anchor]))
+
+        # Half the character budget before the anchor, whole lines where
+        # they fit; the rest after it.
+        start, start_col = anchor, max(0, anchor_col - self.window_chars // 2)
+        budget = self.window_chars // 2 - (anchor_col - start_col)
+        while start_col == 0 and start > 0 and len(lines[start - 1]) + 1 <= budget:
+            start -= 1
+            budget -= len(lines[start]) + 1
+        budget = self.window_chars - self._span(lines, start, start_col, anchor, anchor_col)
+        end, end_col = anchor, anchor_col
+        while True:
+            available = len(lines[end]) - end_col
+            if available > budget:
+                end_col += budget
+                break
+            budget -= available
+            end_col = len(lines[end])
+            if end + 1 == len(lines) or budget < 1:
+                break
+            end, end_col, budget = end + 1, 0, budget - 1
+
+        if start == end:
+            window = [lines[start][start_col:end_col]]
+        else:
+            window = [lines[start][start_col:]] + lines[start + 1:end] + [lines[end][:end_col]]
+        self.clipped_start = (start, start_col) != (0, 0)
+        self.clipped_end = (end, end_col) != (len(lines) - 1, len(lines[-1]))
+        self._replace_window('\n'.join(window), first + start, start_col)
+        self.text.yview(self.to_widget(top, anchor_col))
+        self.shown_top = (top, anchor_col)
+        if self.contains(cursor_line, cursor_col):
+            self.text.mark_set("insert", self.to_widget(cursor_line, cursor_col))
+        else:
+            self.text.mark_set("insert", self.to_widget(top, anchor_col))
+        self._report_position()
+
+    @staticmethod
+    def _span(lines, start: int, start_col: int, end: int, end_col: int) -> int:
+        if start == end:
+            return end_col - start_col
+        return (len(lines[start]) - start_col + 1 + sum(len(line) + 1 for line in lines[start + 1:end])
+                + end_col)
+
+    def _shift(self, line: int, col: int) -> Tuple[int, int]:
+        if line == 1:
+            col += self.first_col
+        return line + self.first_line - 1, col
+
+    def _chars(self, start: str, end: str) -> int:
+        counted = self.text.count(start, end, "chars")
+        return counted[0] if counted else 0
+
+    def _replace_window(self, text: str, first_line: int, first_col: int):
+        self.is_swapping = True
+        try:
+            self.text.delete("1.0", "end")
+            self.text.insert("1.0", text)
+        finally:
+            self.is_swapping = False
+        self.first_line = first_line
+        self.first_col = first_col
+
+    def _visible_range(self) -> Tuple[int, int]:
+        top = int(str(self.text.index("@0,0")).split('.')[0])
+        bottom = int(str(self.text.index(f"@0,{max(0, self.text.winfo_height() - 1)}")).split('.')[0])
+        return top, bottom
+
+    def _on_yscroll(self, first, last):
+        total = max(1, self.document.line_count)
+        count = max(1, self.window_count)
+        offset = self.first_line - 1
+        self.scrollbar.set((offset + float(first) * count) / total, (offset + float(last) * count) / total)
+        self._report_position()
+
+        top, bottom = self._visible_range()
+        if self.clipped_start:
+            near_top = self._chars("1.0", "@0,0") < self.margin_chars
+        else:
+            near_top = top <= self.margin_lines and self.first_line > 1
+        if self.clipped_end:
+            bottom_index = f"@0,{max(0, self.text.winfo_height() - 1)}"
+            near_bottom = self._chars(bottom_index, "end-1c") < self.margin_chars
+        else:
+            near_bottom = bottom > count - self.margin_lines and self.first_line + count - 1 < total
+        # A window just centred on the current view has nothing more to
+        # offer, however close its ends are.
+        if (near_top or near_bottom) and not self.swap_pending and self.to_document("@0,0") != self.shown_top:
+            self.swap_pending = True
+            self.text.after_idle(self._swap)
+
+    def _swap(self):
+        self.swap_pending = False
+        top, top_col = self.to_document("@0,0")
+        line, col = self.to_document("insert")
+        self.show(top, line, col, top_col)
+
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        if args[0] == 'moveto':
+            target = int(float(args[1]) * self.document.line_count) + 1
+            line, col = self.to_document("insert")
+            total = self.document.line_count
+            if self.clipped_start or self.clipped_end:
+                # Lines are too long for the line scale to be useful: the
+                # fraction is applied to the window, and reaching its end
+                # swaps in the next slice.
+                fraction = (float(args[1]) * total - self.first_line + 1) / max(1, self.window_count)
+                if 0.0 <= fraction <= 1.0:
+                    self.text.yview('moveto', fraction)
+                else:
+                    self.show(target, line, col)
+            elif self.contains(max(1, target - self.margin_lines)) and \
+                    self.contains(min(total, target + self.margin_lines)):
+                self.text.yview(self.to_widget(target, 0))
+            else:
+                self.show(target, line, col)
+        else:
+            self.text.yview(*args)
+
+    def _on_key(self, event):
+        if event.keysym == 'Home':
+            self.goto(1, 0)
+        else:
+            last = self.document.line_count
+            self.goto(last, len(self.document.line(last)))
+        return "break"
+
+    def _report_position(self):
+        if self.on_position:
+            top, bottom = self._visible_range()
+            self.on_position(top + self.first_line - 1, bottom + self.first_line - 1, self.document.line_count)
@@ -0,0 +1,61 @@
+import logging
+from array import array
+from typing import Callable, Iterable, Optional
+from edit_tracker import TextEdit
+
+logger = logging.getLogger(__name__)
+
+
+def line_stats(lines: Iterable[str]):
+    words = array('l')
+    chars = array('l')
+    for line in lines:
+        words.append(len(line.split()))
+        chars.append(len(line))
+    return words, chars
+
+
+class WordCounter:
+    # Words never span a line break, so per-line counts add up to exactly
+    # what text.split() would return for the whole buffer. An edit only
+    # re-counts the lines it touched; get_lines(first, last) returns the
+    # current text of that line range from the widget (last=None: to the end).
+    def __init__(self, get_lines: Callable[[int, Optional[int]], str]):
+        self.get_lines = get_lines
+        self.line_words = array('l', [0])
+        self.line_chars = array('l', [0])
+        self.words = 0
+        self.line_chars_total = 0
+
+    @property
+    def chars(self) -> int:
+        return self.line_chars_total + len(self.line_chars) - 1
+
+    @property
+    def lines(self) -> int:
+        return len(self.line_chars)
+
+    def reset(self, text: str):
+        self.reset_lines(text.split('\n'))
+
+    def reset_lines(self, lines: Iterable[str]):
+        self.line_words, self.line_chars = line_stats(lines)
+        self.words = sum(self.line_words)
+        self.line_chars_total = sum(self.line_chars)
+
+    def apply(self, edit: TextEdit):
+        first = edit.start[0]
+        if edit.kind == 'insert':
+            old_last, new_last = first, edit.end[0]
+        else:
+            old_last, new_last = edit.end[0], first
+        if old_last > len(self.line_chars):
+            logger.warning("Word counter is out of sync with the buffer, recounting")
+            self.reset(self.get_lines(1, None))
+            return
+
+        words, chars = line_stats(self.get_lines(first, new_last).split('\n'))
+        self.words += sum(words) - sum(self.line_words[first - 1:old_last])
+        self.line_chars_total += sum(chars) - sum(self.line_chars[first - 1:old_last])
+        self.line_words[first - 1:old_last] = words
+        self.line_chars[first - 1:old_last] = chars